@@ -6,35 +6,62 @@ from flask import (
     session,
     request,
     url_for,
-    send_from_directory,
+    send_file,
     flash
 )
 
 from tools.utils import redirect
-from lightdb import LightDB
+from lightdb import open_database
 from tools.geo_loc import geo_loc_bp
 from tools.auth import auth_bp
+from tools.chunked import chunked_bp, remove_expired_session
 from tools.db_auth import is_admin_user
+from tools import codes, usage, uploads
 
 from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 from werkzeug.middleware.proxy_fix import ProxyFix
+from werkzeug.wsgi import ClosingIterator
 
 
 import os
 import random
-import threading
-import time
 
-l_db = LightDB()
+# Seconds before an unused upload expires (0 = never)
+ONE_TIME_CODE_TTL = float(os.environ.get('ADRIVE_ONE_TIME_TTL', 0)) or None
+REUSABLE_CODE_TTL = float(os.environ.get('ADRIVE_REUSABLE_TTL', 0)) or None
+
+l_db = open_database(cache_size=1024)
+l_db.create_collection('files').create_index('owner')
+codes.open_codes(l_db)
+usage.open_usage(l_db)
 
 app = Flask('adrive', static_folder='static', template_folder='templates')
 app.config['UPLOAD_DIRECTORY'] = 'uploads/'
 app.config['MAX_CONTENT_LENGTH'] = 1000000 * 1024 * 1024
 app.config['SECRET_KEY'] = str(random.randint(99999, 9999999))
+app.config['ONE_TIME_CODE_TTL'] = ONE_TIME_CODE_TTL
+app.config['REUSABLE_CODE_TTL'] = REUSABLE_CODE_TTL
+app.request_class = uploads.UploadRequest
+uploads.UploadRequest.upload_directory = app.config['UPLOAD_DIRECTORY']
 app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1)
 app.register_blueprint(geo_loc_bp)
 app.register_blueprint(auth_bp)
+app.register_blueprint(chunked_bp)
+
+def remove_expired_upload(collection, file, entry):
+    if collection == 'uploads':
+        remove_expired_session(file, entry)
+        return
+    if collection != 'files':
+        return
+    usage.remove_file(l_db, file, entry)
+    try:
+        os.remove(os.path.join(app.config['UPLOAD_DIRECTORY'], file))
+    except FileNotFoundError:
+        pass
+
+l_db.start_sweeper(interval=60, on_expire=remove_expired_upload)
 
 @app.route('/')
 def index():
@@ -51,7 +78,6 @@ def dashboard():
 
     username = session.get('username')
     userfiles = []
-    quota_usage_gb = 0
 
     if not username:
         flash('An error occurred. Please sign in again.', 'error')
@@ -59,19 +85,15 @@ def dashboard():
         session.pop('username', None)
         return redirect(url_for('upload'))
 
-    for file in db:
-        if db[file].get('owner') == username:
-            db[file]['file'] = file
-            db[file]['code'] = file.split('_')[-1]
-            db[file]['display_name'] = db[file].get('original_filename', file)
-            userfiles.append(db[file])
+    for file, entry in db.get_many(usage.get_usage(l_db, username)['keys']).items():
+        if entry is None:
+            continue
+        entry['file'] = file
+        entry['code'] = file.split('_')[-1]
+        entry['display_name'] = entry.get('original_filename', file)
+        userfiles.append(entry)
 
-    for userfile in userfiles:
-        usf_mb = userfile['size_megabytes']
-        if usf_mb:
-            quota_usage_gb += usf_mb / 1024
-
-    quota_usage_gb = round(quota_usage_gb, 1)
+    quota_usage_gb = usage.usage_gb(l_db, username)
 
     return render_template(
         'dashboard.html',
@@ -84,7 +106,6 @@ def dashboard():
 
 @app.route('/upload')
 def upload():
-    db = l_db['files']
     udb = l_db['users']
     loggedIn = session.get('loggedIn', False)
     username = session.get('username', '')
@@ -101,15 +122,7 @@ def upload():
                 quota_gb = user_rec.get('quota_gb', 0)
             else:
                 quota_gb = 0
-            userfiles = []
-            for file in db:
-                if db[file].get('owner') == username:
-                    userfiles.append(db[file])
-            for userfile in userfiles:
-                usf_mb = userfile.get('size_megabytes', 0)
-                if usf_mb:
-                    quota_usage_gb += usf_mb / 1024
-            quota_usage_gb = round(quota_usage_gb, 1)
+            quota_usage_gb = usage.usage_gb(l_db, username)
         else:
             quota_gb = 5.0
             quota_usage_gb = 0.0
@@ -121,7 +134,6 @@ def upload():
 
 @app.route('/upload_kr')
 def upload_kr():
-    db = l_db['files']
     udb = l_db['users']
     loggedIn = session.get('loggedIn', False)
     username = session.get('username', '')
@@ -138,15 +150,7 @@ def upload_kr():
                 quota_gb = user_rec.get('quota_gb', 0)
             else:
                 quota_gb = 0
-            userfiles = []
-            for file in db:
-                if db[file].get('owner') == username:
-                    userfiles.append(db[file])
-            for userfile in userfiles:
-                usf_mb = userfile.get('size_megabytes', 0)
-                if usf_mb:
-                    quota_usage_gb += usf_mb / 1024
-            quota_usage_gb = round(quota_usage_gb, 1)
+            quota_usage_gb = usage.usage_gb(l_db, username)
         else:
             quota_gb = 5.0
             quota_usage_gb = 0.0
@@ -156,66 +160,71 @@ def upload_kr():
 
     return render_template('upload_kr.html', loggedIn=loggedIn, username=username, quota_gb=quota_gb, quota_usage=quota_usage_gb)
 
+def reject_upload(message):
+    # The rest of the body is never read, so don't keep the connection alive
+    flash(message, 'error')
+    response = redirect(url_for('upload'))
+    response.headers['Connection'] = 'close'
+    return response
+
 @app.route('/sendfile', methods=['POST'])
 def sendfile():
-        db = l_db['files']
-        udb = l_db['users']
-        file = request.files['file']
-        reusable = request.form.get('reusable')
         loggedIn = session.get('loggedIn', False)
         username = session.get('username', '')
 
+        if loggedIn and username:
+            remaining_bytes = usage.remaining_bytes(l_db, username, usage.user_quota_gb(l_db, username))
+            # Refuse before reading the body when it can't fit; otherwise stop it once it doesn't
+            if request.content_length is not None and request.content_length > remaining_bytes + uploads.FORM_OVERHEAD:
+                return reject_upload('This file is larger than your remaining quota.')
+            request.upload_limit = remaining_bytes
+
+        try:
+            file = request.files['file']
+        except uploads.QuotaExceeded:
+            return reject_upload('This file is larger than your remaining quota.')
+        except RequestEntityTooLarge:
+            return 'File is larger than the size limit.'
+        reusable = request.form.get('reusable')
+
         if file:
             try:
                 original_filename = file.filename
                 extension = os.path.splitext(file.filename)[1].lower()
 
-                fileid = str(random.randint(100000, 99999999))
                 safe_filename = secure_filename(original_filename) or 'file'
-                dest_name = safe_filename + f'_{fileid}'
+                fileid, dest_name = codes.reserve_code(l_db, safe_filename)
                 dest_path = os.path.join(app.config['UPLOAD_DIRECTORY'], dest_name)
 
-                file.save(dest_path)
-
                 try:
-                    size_bytes = os.path.getsize(dest_path)
-                except Exception:
-                    size_bytes = 0
+                    size_bytes = file.stream.commit(dest_path)
+                except BaseException:
+                    codes.release_code(l_db, fileid)
+                    raise
                 size_megabytes = round(size_bytes / (1024 * 1024), 1)
                 file_gb = size_megabytes / 1024
 
-                remaining_gb = None
-                if loggedIn and username:
-                    try:
-                        udb = l_db['users']
-                        user_rec = None
-                        for u in udb:
-                            if u.get('username') == username:
-                                user_rec = u
-                                break
-                        user_quota_gb = user_rec.get('quota_gb', 0) if user_rec else 0
-                        usage_gb = 0.0
-                        for fkey, fval in db.get('files', {}).items():
-                            if fval.get('owner') == username:
-                                usf_mb = fval.get('size_megabytes', 0)
-                                if usf_mb:
-                                    usage_gb += usf_mb / 1024
-                        usage_gb = round(usage_gb, 1)
-                        remaining_gb = max(0.0, user_quota_gb - usage_gb)
-                    except Exception:
+                # Check the quota and count the file in one transaction, so
+                # concurrent uploads can't both fit into the same free space
+                with l_db.batch():
+                    remaining_gb = None
+                    if loggedIn and username:
+                        remaining_gb = max(0.0, usage.user_quota_gb(l_db, username) - usage.usage_gb(l_db, username))
+                    else:
                         remaining_gb = 0.0
-                else:
-                    remaining_gb = 0.0
 
-                entry = {
-                    "reusable": True if reusable else False,
-                    "size_megabytes": size_megabytes,
-                    "original_filename": original_filename
-                }
-                if loggedIn and username and file_gb <= remaining_gb:
-                    entry["owner"] = username
+                    entry = {
+                        "reusable": True if reusable else False,
+                        "size_megabytes": size_megabytes,
+                        "size_bytes": size_bytes,
+                        "original_filename": original_filename
+                    }
+                    if loggedIn and username and file_gb <= remaining_gb:
+                        entry["owner"] = username
 
-                db[dest_name] = entry
+                    codes.add_file(l_db, fileid, dest_name, entry,
+                                   ttl=REUSABLE_CODE_TTL if reusable else ONE_TIME_CODE_TTL)
+                    usage.add_file(l_db, dest_name, entry)
 
                 if reusable:
                     flash('Download code: ' + fileid, 'info')
@@ -230,22 +239,23 @@ def sendfile():
 @app.route('/delete/<code>', methods=['GET', 'POST'])
 def delete(code):
     db = l_db['files']
-    for file in db:
-        if file.split('_')[-1] == code:
-            if db[file].get('owner') != session.get('username'):
-                flash('You do not own this file and cannot delete it.', 'error')
-                return redirect(url_for('upload'))
-            try:
-                os.remove('uploads/' + file)
-            except FileNotFoundError:
-                pass
-            try:
-                os.remove('uploads/' + file.split('_')[0])
-            except FileNotFoundError:
-                pass
-            db.pop(file)
-            flash('File with code ' + code + ' has been deleted.', 'info')
-            return redirect(url_for('dashboard'))
+    file = codes.lookup(l_db, code)
+    if file is None:
+        flash('Invalid code!', 'error')
+        return redirect(url_for('upload'))
+    entry = db[file]
+    if entry.get('owner') != session.get('username'):
+        flash('You do not own this file and cannot delete it.', 'error')
+        return redirect(url_for('upload'))
+    try:
+        os.remove('uploads/' + file)
+    except FileNotFoundError:
+        pass
+    with l_db.batch():
+        codes.remove_files(l_db, [file])
+        usage.remove_file(l_db, file, entry)
+    flash('File with code ' + code + ' has been deleted.', 'info')
+    return redirect(url_for('dashboard'))
 
 @app.route('/download')
 def download_without_code():
@@ -256,38 +266,54 @@ def download_without_code():
 def download(code):
     db = l_db['files']
     try:
-        found = False
-        filename = ''
-        files = os.listdir('uploads')
-        for file in files:
-            if file.split('_')[-1] == code:
-                found = True
-                filename = file
-
-        if not found:
-            for file_entry in list(db.keys()):
-                if file_entry.split('_')[-1] == code:
-                    db.pop(file_entry)
-                    break
+        filename = codes.lookup(l_db, code)
+
+        if filename is None:
             flash('Invalid code! Check if you typed the correct code, and for one-time codes, make sure nobody else entered the code before you did.', 'error')
             return redirect(url_for('upload'))
-        else:
-            original_filename = db[filename].get('original_filename', filename.replace(f'_{code}', ''))
-
-            os.rename('uploads/' + filename, 'uploads/' + filename.replace(f'_{code}', ''))
-            def deleteFile():
-                db.pop(filename)
-            def backRename():
-                time.sleep(1)
-                os.rename('uploads/' + filename.replace(f'_{code}', ''), 'uploads/' + filename)
-            if db[filename]['reusable']:
-                backToNameFunc = threading.Thread(target=backRename)
-                backToNameFunc.start()
-            if db[filename]['reusable'] == False:
-                deleteFunc = threading.Thread(target=deleteFile)
-                deleteFunc.start()
-
-            return send_from_directory(app.config['UPLOAD_DIRECTORY'], filename.replace(f'_{code}', ''), as_attachment=True, download_name=original_filename)
+
+        entry = db[filename]
+        path = os.path.join(app.config['UPLOAD_DIRECTORY'], filename)
+        original_filename = entry.get('original_filename', filename.replace(f'_{code}', ''))
+
+        if entry['reusable']:
+            # send_file answers Range, If-Range and If-None-Match (206/304/416)
+            return send_file(path, as_attachment=True, download_name=original_filename,
+                             conditional=True, etag=True)
+
+        # Open the file before claiming the code, so a missing file can't use the code up;
+        # then claim it, so only one request gets a one-time file
+        file = open(path, 'rb')
+        try:
+            with l_db.batch():
+                taken = codes.take_file(l_db, code)
+                if taken is None:
+                    raise KeyError(code)
+                usage.remove_file(l_db, *taken)
+            try:
+                response = send_file(file, as_attachment=True, download_name=original_filename,
+                                     conditional=False, etag=False)
+            except Exception:
+                # Nothing was sent; give the code back
+                with l_db.batch():
+                    codes.add_file(l_db, code, *taken, ttl=ONE_TIME_CODE_TTL)
+                    usage.add_file(l_db, *taken)
+                raise
+            response.content_length = os.fstat(file.fileno()).st_size
+        except BaseException:
+            file.close()
+            raise
+
+        def remove_sent_file():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+        # send_file responses are passed through as they are, so call_on_close
+        # would never run; close the body through a ClosingIterator instead
+        response.response = ClosingIterator(response.response, [remove_sent_file])
+        return response
 
     except Exception:
         flash('Invalid code! Check if you typed the correct code, and for one-time codes, make sure nobody else entered the code before you did.', 'error')
@@ -311,9 +337,9 @@ def admin():
     user_file_count = {}
     total_storage_mb = 0.0
 
-    for file_key in db:
-        owner = db[file_key].get('owner')
-        size_mb = db[file_key].get('size_megabytes', 0) or 0
+    for file_key, entry in db.items():
+        owner = entry.get('owner')
+        size_mb = entry.get('size_megabytes', 0) or 0
         total_storage_mb += size_mb
         if owner:
             user_usage[owner] = user_usage.get(owner, 0) + size_mb
@@ -358,14 +384,14 @@ def admin_update_quota():
         flash('Invalid quota value.', 'error')
         return redirect(url_for('admin'))
 
-    udb = l_db['users']
-    users = list(udb)
-    for i, user in enumerate(users):
-        if user.get('username') == target:
-            users[i]['quota_gb'] = new_quota
-            l_db['users'] = users
-            flash(f"Quota for {target} updated to {new_quota}GB.", 'info')
-            return redirect(url_for('admin'))
+    with l_db.batch():
+        index = l_db.index_of('users', 'username', target)
+        if index is not None:
+            l_db.set_path('users', f'$[{index}].quota_gb', new_quota)
+
+    if index is not None:
+        flash(f"Quota for {target} updated to {new_quota}GB.", 'info')
+        return redirect(url_for('admin'))
 
     flash('User not found.', 'error')
     return redirect(url_for('admin'))
@@ -389,15 +415,17 @@ def admin_delete_user():
         flash('User not found.', 'error')
         return redirect(url_for('admin'))
 
-    l_db['users'] = new_users
     db = l_db['files']
-    files_to_delete = [fkey for fkey in db if db[fkey].get('owner') == target]
+    files_to_delete = list(db.find(owner=target))
+    with l_db.batch():
+        l_db['users'] = new_users
+        codes.remove_files(l_db, files_to_delete)
+        usage.drop_user(l_db, target)
     for fkey in files_to_delete:
         try:
             os.remove(os.path.join(app.config['UPLOAD_DIRECTORY'], fkey))
         except FileNotFoundError:
             pass
-        db.pop(fkey)
     flash(f"User {target} has been deleted.", 'info')
     return redirect(url_for('admin'))
 
@@ -413,15 +441,16 @@ def admin_toggle_admin():
         flash('You cannot change your own admin status.', 'error')
         return redirect(url_for('admin'))
 
-    udb = l_db['users']
-    users = list(udb)
-    for i, user in enumerate(users):
-        if user.get('username') == target:
-            users[i]['is_admin'] = not bool(user.get('is_admin', False))
-            l_db['users'] = users
-            status = 'granted' if users[i]['is_admin'] else 'revoked'
-            flash(f"Admin privileges {status} for {target}.", 'info')
-            return redirect(url_for('admin'))
+    with l_db.batch():
+        index = l_db.index_of('users', 'username', target)
+        if index is not None:
+            is_admin = not bool(l_db.get_path('users', f'$[{index}].is_admin', False))
+            l_db.set_path('users', f'$[{index}].is_admin', is_admin)
+
+    if index is not None:
+        status = 'granted' if is_admin else 'revoked'
+        flash(f"Admin privileges {status} for {target}.", 'info')
+        return redirect(url_for('admin'))
 
     flash('User not found.', 'error')
     return redirect(url_for('admin'))
@@ -0,0 +1,79 @@
+"""
+Serializer micro-benchmark for LightDB
+Measures encode/decode cost of a 'files'-shaped document per serializer
+
+Run from the repository root:
+    python -m benchmarks.serializers
+    python -m benchmarks.serializers --sizes 10000 100000 --repeat 5
+
+Reference results (Python 3.11, orjson 3.8, best of 3; msgpack was not
+installed for this run):
+
+     entries  serializer  encode ms  decode ms   size MB
+       10000  json             14.7        8.2       1.3
+       10000  orjson            2.3        4.5       1.2
+      100000  json            162.8      118.9      12.9
+      100000  orjson           43.3       90.5      12.0
+     1000000  json           2619.3     1976.9     130.9
+     1000000  orjson          571.0     1343.3     122.3
+
+orjson encodes 4-6x faster and decodes about 1.5x faster, but LightDB keeps
+'json' as its default because the two formats don't round-trip the same
+values (see lightdb.serializers.OrjsonSerializer); pass serializer='orjson'
+to opt in.
+"""
+
+import argparse
+import time
+
+from lightdb.serializers import available_serializers, get_serializer
+
+
+def make_document(entries: int) -> dict:
+    """Build a dict shaped like the ADrive 'files' collection."""
+    return {
+        f'report_{i}.pdf_{10000000 + i}': {
+            'reusable': i % 2 == 0,
+            'size_megabytes': round(i % 4096 / 3, 1),
+            'original_filename': f'report {i}.pdf',
+            'owner': f'user{i % 500}',
+        }
+        for i in range(entries)
+    }
+
+
+def best_of(repeat: int, fn) -> float:
+    """Return the fastest of `repeat` runs of fn, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(sizes, repeat):
+    names = available_serializers()
+    print(f"{'entries':>10}  {'serializer':<10} {'encode ms':>10} {'decode ms':>10} {'size MB':>9}")
+
+    for size in sizes:
+        document = make_document(size)
+        for name in names:
+            serializer = get_serializer(name)
+            encoded = serializer.dumps(document)
+            encode = best_of(repeat, lambda: serializer.dumps(document))
+            decode = best_of(repeat, lambda: serializer.loads(encoded))
+            size_mb = len(encoded) / (1024 * 1024)
+            print(f"{size:>10}  {name:<10} {encode * 1000:>10.1f} {decode * 1000:>10.1f} {size_mb:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,47 @@
+import argparse
+import os
+
 from .installer import install_lightdb, detect_installation
 from .prompt import prompt_yes_no
 
 def verify_args(args):
     if not args:
         raise ValueError("No arguments provided.")
-    
+
+def run_backup(args):
+    """Back up the configured database (every shard when SHARDS > 1): backup <target> [--compress] [--keep N] ..."""
+    parser = argparse.ArgumentParser(prog="cli backup", description="Online backup of the LightDB database.")
+    parser.add_argument("target", help="Snapshot file, or a directory for timestamped snapshots (a directory when sharded)")
+    parser.add_argument("--pages", type=int, default=256, help="Pages copied per step (default: 256)")
+    parser.add_argument("--sleep", type=float, default=0.01, help="Seconds to pause between steps (default: 0.01)")
+    parser.add_argument("--compress", action="store_true", help="gzip the snapshot")
+    parser.add_argument("--keep", type=int, default=None, help="Keep only the newest N snapshots in the target directory")
+    options = parser.parse_args(args)
+
+    from lightdb.backup import backup_database, backup_shards
+    from lightdb.dbconnect import get_manager, load_config
+    from lightdb.sharding import get_shard_paths
+
+    last_percent = [-1]
+
+    def report(done, total):
+        percent = done * 100 // total if total else 100
+        if percent != last_percent[0]:
+            last_percent[0] = percent
+            print(f"\rBacking up: {percent:3d}% ({done}/{total} pages)", end="", flush=True)
+
+    config = load_config()
+    shards = config.get('SHARDS', 1)
+    if shards > 1:
+        paths = backup_shards([get_manager(path) for path in get_shard_paths(shards, config)], options.target,
+                              pages_per_step=options.pages, sleep=options.sleep, progress=report,
+                              compress=options.compress, keep=options.keep)
+        print(f"\nBackup of {shards} shards written to {os.path.dirname(paths[0])}")
+        return
+    path = backup_database(get_manager(), options.target, pages_per_step=options.pages, sleep=options.sleep,
+                           progress=report, compress=options.compress, keep=options.keep)
+    print(f"\nBackup written to {path}")
+
 def run_cli(args):
     print("=== LightDB CLI ===")
     if args[0] == "install":
@@ -13,5 +50,7 @@ def run_cli(args):
             exit(0)
         if prompt_yes_no("This command will install LightDB in the current working directory. Do you want to continue?"):
             install_lightdb()
+    elif args[0] == "backup":
+        run_backup(args[1:])
     else:
-        print(f"Unknown command: {args[0]}")
\ No newline at end of file
+        print(f"Unknown command: {args[0]}")
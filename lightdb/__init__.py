@@ -1,20 +1,35 @@
 """
 LightDB by Andrew (Fybe)
 
-A lightweight database library with two interfaces:
+A lightweight database library with four interfaces:
 
-1. LightDB - Dictionary-like key-value store (simple, fast)
+1. LightDB - Dictionary-like key-value store (simple, fast),
+   with row-per-entry collections for large dicts
 2. Table - Traditional SQL tables with schemas (powerful, queryable)
+3. AsyncLightDB / AsyncTable - awaitable versions of both for asyncio
+4. ShardedLightDB - LightDB spread over several files for parallel writes
 
 Choose the one that fits your needs!
 
 https://www.fybe.dev/
 """
 
-from .lightdb import LightDB
+from .lightdb import LightDB, Collection, VersionConflict
 from .lightsql import Table
-from .dbconnect import get_connection
+from .predicates import col, any_of, all_of
+from .dbconnect import get_connection, get_manager, ConnectionManager
+from .aio import AsyncLightDB, AsyncTable
+from .sharding import ShardedLightDB, open_database
 
-connection = get_connection()
 
-__all__ = ['LightDB', 'Table', 'get_connection']
\ No newline at end of file
+def __getattr__(name):
+    # The legacy module-level connection is opened on first use, not on import
+    global connection
+    if name == 'connection':
+        connection = get_connection()
+        return connection
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ['LightDB', 'Collection', 'Table', 'col', 'any_of', 'all_of', 'get_connection', 'get_manager', 'ConnectionManager',
+           'AsyncLightDB', 'AsyncTable', 'ShardedLightDB', 'open_database', 'VersionConflict']
\ No newline at end of file
@@ -0,0 +1,445 @@
+"""
+LightDB for asyncio - Awaitable LightDB and Table interfaces
+Runs the blocking sqlite3 work on a dedicated thread pool so the event loop never waits on disk
+
+Usage:
+    from lightdb.aio import AsyncLightDB, AsyncTable
+
+    db = await AsyncLightDB.open()
+    await db.set('key', 'value')
+    value = await db.get('key')
+    files = await db.collection('files')
+    entry = await files.get('report.pdf_1234')
+    async for key in db:
+        ...
+
+    users = await AsyncTable.open('users')
+    admins = await users.find(role='admin')
+    async for row in users.iter_find(order_by='id'):
+        ...
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from .dbconnect import get_connection, get_manager
+from .lightdb import LightDB, Collection, ListProxy, DictProxy
+from .lightsql import Table
+
+
+def _plain(value: Any) -> Any:
+    """Strip auto-saving proxies; saving from the event loop would block it."""
+    if isinstance(value, ListProxy):
+        return list(value)
+    if isinstance(value, DictProxy):
+        return dict(value)
+    return value
+
+
+class AsyncExecutor:
+    """
+    A dedicated thread pool for database calls with back-pressure.
+
+    At most max_pending calls are queued or running; further callers wait
+    (asynchronously) for a slot instead of piling work onto the pool.
+    A call cancelled while still queued never runs; a call that already
+    started finishes in the background and its result is discarded.
+
+    Iterators run on a separate single thread (see run_pinned): an open
+    cursor belongs to the connection of the thread that created it, so it
+    must never be advanced from another pool thread.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 64):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='lightdb')
+        self._pinned = ThreadPoolExecutor(max_workers=1, thread_name_prefix='lightdb-iter')
+        self._slots = None
+
+    async def _submit(self, pool: ThreadPoolExecutor, fn: Callable, args, kwargs) -> Any:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(pool, partial(fn, *args, **kwargs))
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on the pool and await its result."""
+        return await self._submit(self._pool, fn, args, kwargs)
+
+    async def run_pinned(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on the iteration thread, always the same one."""
+        return await self._submit(self._pinned, fn, args, kwargs)
+
+    def shutdown(self, wait: bool = True):
+        """Stop the pool (cancelling calls that haven't started)."""
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+        self._pinned.shutdown(wait=wait, cancel_futures=True)
+
+
+class AsyncCollection:
+    """Awaitable counterpart of lightdb.Collection."""
+
+    def __init__(self, collection: Collection, executor: AsyncExecutor):
+        self._collection = collection
+        self._executor = executor
+        self.name = collection.name
+
+    async def get(self, key: str, default=None) -> Any:
+        return await self._executor.run(self._collection.get, key, default)
+
+    async def set(self, key: str, value: Any, ttl: float = None) -> None:
+        await self._executor.run(self._collection.set, key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        """Delete an entry. Raises KeyError if it doesn't exist."""
+        await self._executor.run(self._collection.__delitem__, key)
+
+    async def pop(self, key: str, *default) -> Any:
+        return await self._executor.run(self._collection.pop, key, *default)
+
+    async def get_many(self, keys, default=None) -> dict:
+        return await self._executor.run(self._collection.get_many, list(keys), default)
+
+    async def set_many(self, items, ttl: float = None) -> dict:
+        return await self._executor.run(self._collection.set_many, items, ttl)
+
+    async def delete_many(self, keys) -> dict:
+        return await self._executor.run(self._collection.delete_many, list(keys))
+
+    async def get_versioned(self, key: str) -> tuple:
+        return await self._executor.run(self._collection.get_versioned, key)
+
+    async def compare_and_set(self, key: str, expected_version: int, value: Any) -> bool:
+        return await self._executor.run(self._collection.compare_and_set, key, expected_version, value)
+
+    async def atomic_update(self, key: str, fn: Callable[[Any], Any], **kwargs) -> Any:
+        """Replace an entry with fn(entry) on the pool, retrying on conflicts."""
+        return await self._executor.run(self._collection.atomic_update, key, fn, **kwargs)
+
+    async def contains(self, key: str) -> bool:
+        return await self._executor.run(self._collection.__contains__, key)
+
+    async def count(self, conditions: dict = None, **kwargs) -> int:
+        """Count all entries, or those matching JSON field conditions."""
+        if conditions or kwargs:
+            return await self._executor.run(self._collection.count, conditions, **kwargs)
+        return await self._executor.run(self._collection.__len__)
+
+    async def keys(self) -> list:
+        return await self._executor.run(self._collection.keys)
+
+    async def values(self) -> list:
+        return await self._executor.run(self._collection.values)
+
+    async def items(self) -> list:
+        return await self._executor.run(self._collection.items)
+
+    async def find(self, conditions: dict = None, **kwargs) -> dict:
+        return await self._executor.run(self._collection.find, conditions, **kwargs)
+
+    async def update(self, other=None, **kwargs) -> None:
+        await self._executor.run(self._collection.update, other, **kwargs)
+
+    async def clear(self) -> None:
+        await self._executor.run(self._collection.clear)
+
+    def scan(self, prefix: str = None, start: str = None, end: str = None,
+             limit: int = None) -> AsyncIterator[tuple]:
+        """Key-ordered (key, value) scan, see Collection.scan."""
+        return _aiter_batches(self._executor, lambda: self._collection.scan(prefix, start, end, limit))
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return _aiter_batches(self._executor, lambda: iter(self._collection))
+
+    def __repr__(self) -> str:
+        return f"<AsyncCollection '{self.name}'>"
+
+
+class AsyncLightDB:
+    """
+    Awaitable counterpart of LightDB.
+
+    Shares the process-wide connection manager by default (WAL readers per
+    pool thread, one writer per file) and uses its own executor, so blocking
+    SQLite calls never run on the event loop.
+    Values come back as plain lists/dicts; write changes back with set().
+    """
+
+    def __init__(self, connection=None, table_name: str = 'keyvalue', max_workers: int = 4,
+                 max_pending: int = 64, executor: Optional[AsyncExecutor] = None, **options):
+        """
+        Initialize AsyncLightDB. Prefer `await AsyncLightDB.open(...)` inside
+        a running loop, since creating the tables touches the database.
+
+        Args:
+            connection: SQLite connection or ConnectionManager (default: the
+                        shared manager for the configured database, see get_manager)
+            table_name: Name of the table to use for key-value storage
+            max_workers: Threads in the dedicated executor
+            max_pending: Maximum queued or running calls before callers wait
+            executor: Share an AsyncExecutor instead of creating one
+            **options: Passed to LightDB (serializer, cache_size, ...)
+        """
+        if connection is None:
+            connection = get_manager()
+
+        self._executor = executor or AsyncExecutor(max_workers, max_pending)
+        self._owns_executor = executor is None
+        self._db = LightDB(connection, table_name, **options)
+        self._owns_manager = self._db._owns_manager
+
+    @classmethod
+    async def open(cls, *args, **kwargs) -> 'AsyncLightDB':
+        """Create an AsyncLightDB without blocking the running loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, partial(cls, *args, **kwargs))
+
+    @property
+    def db(self) -> LightDB:
+        """The underlying synchronous LightDB."""
+        return self._db
+
+    async def run(self, fn: Callable[[LightDB], Any]) -> Any:
+        """
+        Run fn(db) on the executor with the synchronous LightDB.
+        Use it for multi-step work such as batches:
+
+            await adb.run(lambda db: db.update(pairs))
+        """
+        return await self._executor.run(fn, self._db)
+
+    async def get(self, key: str, default=None) -> Any:
+        """Get a value (a collection comes back as an AsyncCollection)."""
+        value = await self._executor.run(self._db.get, key, default)
+        if isinstance(value, Collection):
+            return AsyncCollection(value, self._executor)
+        return _plain(value)
+
+    async def set(self, key: str, value: Any, ttl: float = None) -> None:
+        await self._executor.run(self._db.set, key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        """Delete a key. Raises KeyError if it doesn't exist."""
+        await self._executor.run(self._db.__delitem__, key)
+
+    async def get_many(self, keys, default=None) -> dict:
+        """Get several values at once (see LightDB.get_many)."""
+        values = await self._executor.run(self._db.get_many, list(keys), default)
+        return {
+            key: AsyncCollection(value, self._executor) if isinstance(value, Collection) else _plain(value)
+            for key, value in values.items()
+        }
+
+    async def set_many(self, items, ttl: float = None) -> dict:
+        return await self._executor.run(self._db.set_many, items, ttl)
+
+    async def delete_many(self, keys) -> dict:
+        return await self._executor.run(self._db.delete_many, list(keys))
+
+    async def get_versioned(self, key: str) -> tuple:
+        return await self._executor.run(self._db.get_versioned, key)
+
+    async def compare_and_set(self, key: str, expected_version: int, value: Any) -> bool:
+        return await self._executor.run(self._db.compare_and_set, key, expected_version, value)
+
+    async def atomic_update(self, key: str, fn: Callable[[Any], Any], **kwargs) -> Any:
+        """Replace a key's value with fn(value) on the pool, retrying on conflicts."""
+        return await self._executor.run(self._db.atomic_update, key, fn, **kwargs)
+
+    async def contains(self, key: str) -> bool:
+        return await self._executor.run(self._db.__contains__, key)
+
+    async def count(self) -> int:
+        return await self._executor.run(self._db.__len__)
+
+    async def keys(self) -> list:
+        return await self._executor.run(self._db.keys)
+
+    async def values(self) -> list:
+        values = await self._executor.run(self._db.values)
+        return [AsyncCollection(v, self._executor) if isinstance(v, Collection) else v for v in values]
+
+    async def items(self) -> list:
+        items = await self._executor.run(self._db.items)
+        return [(k, AsyncCollection(v, self._executor) if isinstance(v, Collection) else v) for k, v in items]
+
+    async def update(self, other=None, **kwargs) -> None:
+        await self._executor.run(self._db.update, other, **kwargs)
+
+    async def clear(self) -> None:
+        await self._executor.run(self._db.clear)
+
+    async def collection(self, name: str) -> AsyncCollection:
+        """Create or open a collection."""
+        collection = await self._executor.run(self._db.create_collection, name)
+        return AsyncCollection(collection, self._executor)
+
+    def cache_info(self):
+        return self._db.cache_info()
+
+    def scan(self, prefix: str = None, start: str = None, end: str = None,
+             limit: int = None) -> AsyncIterator[tuple]:
+        """Key-ordered (key, value) scan, see LightDB.scan."""
+        return _aiter_batches(
+            self._executor,
+            lambda: ((key, _plain(value)) for key, value in self._db.scan(prefix, start, end, limit))
+        )
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return _aiter_batches(self._executor, lambda: iter(self._db))
+
+    async def close(self) -> None:
+        """Shut down the executor and close the connections (a shared manager stays open)."""
+        if self._owns_executor:
+            await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+        self._db.stop_sweeper()
+        if self._owns_manager:
+            self._db._manager.close()
+
+    def __repr__(self) -> str:
+        return f"<AsyncLightDB table='{self._db.table_name}'>"
+
+
+class AsyncTable:
+    """
+    Awaitable counterpart of lightsql.Table.
+    The table gets its own connection; calls on it are serialized.
+    """
+
+    def __init__(self, table_name: str, schema: Dict[str, str] = None, connection=None,
+                 max_workers: int = 2, max_pending: int = 64,
+                 executor: Optional[AsyncExecutor] = None, **options):
+        """
+        Args:
+            table_name: Name of the table
+            schema: Column definitions, see Table
+            connection: SQLite connection (default: a new one from config)
+            max_workers: Threads in the dedicated executor
+            max_pending: Maximum queued or running calls before callers wait
+            executor: Share an AsyncExecutor instead of creating one
+            **options: Passed to Table (recreate)
+        """
+        self._executor = executor or AsyncExecutor(max_workers, max_pending)
+        self._owns_executor = executor is None
+        self._lock = threading.Lock()
+        self._owns_connection = connection is None
+        self._table = Table(table_name, schema, connection or get_connection(), **options)
+
+    @classmethod
+    async def open(cls, *args, **kwargs) -> 'AsyncTable':
+        """Create an AsyncTable without blocking the running loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, partial(cls, *args, **kwargs))
+
+    @property
+    def table(self) -> Table:
+        """The underlying synchronous Table."""
+        return self._table
+
+    def _locked(self, fn: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            return fn(*args, **kwargs)
+
+    async def _call(self, name: str, *args, **kwargs) -> Any:
+        return await self._executor.run(self._locked, getattr(self._table, name), *args, **kwargs)
+
+    async def insert(self, record: Dict[str, Any]) -> None:
+        await self._call('insert', record)
+
+    async def insert_many(self, records, **kwargs) -> int:
+        return await self._call('insert_many', records, **kwargs)
+
+    async def upsert(self, record: Dict[str, Any], **kwargs) -> None:
+        await self._call('upsert', record, **kwargs)
+
+    async def upsert_many(self, records, **kwargs) -> int:
+        return await self._call('upsert_many', records, **kwargs)
+
+    async def find(self, *predicates, **kwargs) -> List[Dict[str, Any]]:
+        return await self._call('find', *predicates, **kwargs)
+
+    async def find_one(self, *predicates, **kwargs) -> Optional[Dict[str, Any]]:
+        return await self._call('find_one', *predicates, **kwargs)
+
+    async def count(self, *predicates, **conditions) -> int:
+        return await self._call('count', *predicates, **conditions)
+
+    async def update(self, conditions, updates: Dict[str, Any]) -> int:
+        return await self._call('update', conditions, updates)
+
+    async def delete(self, *predicates, **conditions) -> int:
+        return await self._call('delete', *predicates, **conditions)
+
+    async def all(self) -> List[Dict[str, Any]]:
+        return await self._call('all')
+
+    async def clear(self) -> int:
+        return await self._call('clear')
+
+    async def create_index(self, columns, **kwargs) -> str:
+        return await self._call('create_index', columns, **kwargs)
+
+    async def drop_index(self, name_or_columns) -> None:
+        await self._call('drop_index', name_or_columns)
+
+    async def explain(self, *predicates, **kwargs) -> List[str]:
+        return await self._call('explain', *predicates, **kwargs)
+
+    def iter_find(self, *predicates, batch_size: int = 1000, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """Lazily yield matching rows, fetching batch_size rows per executor call."""
+        return _aiter_batches(
+            self._executor,
+            lambda: self._table.iter_find(*predicates, batch_size=batch_size, **kwargs),
+            batch_size,
+            self._lock
+        )
+
+    async def close(self) -> None:
+        """Shut down the executor and close the connection (one passed in stays open)."""
+        if self._owns_executor:
+            await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+        if self._owns_connection:
+            self._table.conn.close()
+
+    def __repr__(self) -> str:
+        return f"<AsyncTable '{self._table.table_name}'>"
+
+
+async def _aiter_batches(executor: AsyncExecutor, make_iterator: Callable, batch_size: int = 500,
+                         lock: Optional[threading.Lock] = None):
+    """
+    Drive a blocking iterator from the executor, one batch per call, and
+    yield its items on the event loop. Memory use is bounded by batch_size.
+    Every call runs on the executor's pinned thread, so the iterator's cursor
+    is only ever used by the thread whose connection opened it.
+    """
+    def next_batch(state):
+        if lock is not None:
+            lock.acquire()
+        try:
+            if state['iterator'] is None:
+                state['iterator'] = make_iterator()
+            return list(islice(state['iterator'], batch_size))
+        finally:
+            if lock is not None:
+                lock.release()
+
+    state = {'iterator': None}
+    try:
+        while True:
+            batch = await executor.run_pinned(next_batch, state)
+            if not batch:
+                return
+            for item in batch:
+                yield item
+    finally:
+        iterator = state['iterator']
+        if iterator is not None and hasattr(iterator, 'close'):
+            await executor.run_pinned(iterator.close)
@@ -0,0 +1,187 @@
+"""
+Backups - Online, throttled snapshots of a LightDB database
+Built on sqlite3.Connection.backup, so the copy is consistent while the app keeps writing
+
+Usage:
+    from lightdb import LightDB, ShardedLightDB
+
+    db = LightDB()
+    db.backup('backups/', compress=True, keep=24)   # backups/db-20250101-120000-000000.sqlite.gz
+    db.backup('snapshot.sqlite', pages_per_step=512, sleep=0.02,
+              progress=lambda done, total: print(f'{done}/{total} pages'))
+
+    sharded = ShardedLightDB()
+    sharded.backup('backups/')                      # backups/db.shard0-<timestamp>.sqlite, ...
+"""
+
+import gzip
+import os
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from .dbconnect import ConnectionManager
+
+_TIMESTAMP_FORMAT = '%Y%m%d-%H%M%S-%f'
+
+
+def _is_directory(target: str) -> bool:
+    return os.path.isdir(target) or target.endswith(os.sep)
+
+
+def _snapshot_name(source_path: Optional[str]) -> str:
+    return os.path.splitext(os.path.basename(source_path or 'db.sqlite'))[0]
+
+
+def _snapshot_path(target: str, source_path: Optional[str], compress: bool, stamp: str = None) -> str:
+    """Resolve target to a file path; a directory gets a timestamped file name."""
+    if _is_directory(target):
+        os.makedirs(target, exist_ok=True)
+        stamp = stamp or datetime.now().strftime(_TIMESTAMP_FORMAT)
+        target = os.path.join(target, f'{_snapshot_name(source_path)}-{stamp}.sqlite')
+    if compress and not target.endswith('.gz'):
+        target += '.gz'
+    return target
+
+
+def _rotate(directory: str, prefix: str, keep: int) -> list:
+    """Delete all but the newest `keep` snapshots starting with prefix; return the removed paths."""
+    snapshots = sorted(
+        name for name in os.listdir(directory)
+        if name.startswith(prefix) and name.endswith(('.sqlite', '.sqlite.gz'))
+    )
+    removed = []
+    for name in snapshots[:max(len(snapshots) - keep, 0)]:
+        path = os.path.join(directory, name)
+        os.remove(path)
+        removed.append(path)
+    return removed
+
+
+def backup_database(manager: ConnectionManager, target: str, pages_per_step: int = 256,
+                    sleep: float = 0.01, progress: Optional[Callable[[int, int], None]] = None,
+                    compress: bool = False, keep: Optional[int] = None) -> str:
+    """
+    Copy the database behind a ConnectionManager to target, a few pages at a time.
+
+    The copy reads through the writer connection, holding the write lock only
+    while a step runs. Writes made between steps go through the same
+    connection, so SQLite carries them into the copy instead of restarting it.
+    Writes waiting for a group commit are committed before each step.
+
+    Args:
+        manager: ConnectionManager of the database to back up
+        target: File path, or a directory for timestamped snapshots
+        pages_per_step: Pages copied per step (4 KiB each by default)
+        sleep: Seconds to pause between steps, with the write lock released
+        progress: Called with (pages_done, pages_total) after every step
+        compress: gzip the snapshot (adds .gz)
+        keep: When target is a directory, keep only the newest `keep` snapshots
+
+    Returns:
+        Path of the written snapshot
+    """
+    if pages_per_step < 1:
+        raise ValueError("pages_per_step must be at least 1")
+
+    path = _snapshot_path(target, manager.path, compress)
+    _copy(manager, path, pages_per_step, sleep, progress, compress)
+
+    if _is_directory(target) and keep:
+        _rotate(os.path.dirname(path), _snapshot_name(manager.path) + '-', keep)
+    return path
+
+
+def backup_shards(managers: List[ConnectionManager], directory: str, pages_per_step: int = 256,
+                  sleep: float = 0.01, progress: Optional[Callable[[int, int], None]] = None,
+                  compress: bool = False, keep: Optional[int] = None) -> List[str]:
+    """
+    Back up every shard of a sharded database into directory as one set:
+    one snapshot per shard file, all with the same timestamp. Shards are
+    copied one after another, so the set is consistent per shard, not
+    across shards (like ShardedLightDB.batch).
+
+    Args:
+        managers: ConnectionManager of every shard, in shard order
+        directory: Directory for the snapshots
+        keep: Keep only the newest `keep` snapshots of every shard
+        (others as in backup_database; progress is reported per shard)
+
+    Returns:
+        Paths of the written snapshots, in shard order
+    """
+    if pages_per_step < 1:
+        raise ValueError("pages_per_step must be at least 1")
+    if os.path.exists(directory) and not os.path.isdir(directory):
+        raise ValueError("A sharded backup needs a directory target")
+
+    directory = os.path.join(directory, '')
+    stamp = datetime.now().strftime(_TIMESTAMP_FORMAT)
+    paths = [_snapshot_path(directory, manager.path, compress, stamp) for manager in managers]
+    for manager, path in zip(managers, paths):
+        _copy(manager, path, pages_per_step, sleep, progress, compress)
+
+    if keep:
+        for manager in managers:
+            _rotate(directory, _snapshot_name(manager.path) + '-', keep)
+    return paths
+
+
+def _copy(manager: ConnectionManager, path: str, pages_per_step: int, sleep: float,
+          progress: Optional[Callable[[int, int], None]], compress: bool):
+    """Copy one database to path step by step (see backup_database)."""
+    if manager.holds_writer():
+        raise RuntimeError("Cannot back up from inside a batch or while holding the writer")
+
+    temp_path = f'{path}.partial'
+    copy_path = f'{path[:-3]}.partial' if compress else temp_path
+
+    lock = manager.write_lock
+
+    def on_step(status, remaining, total):
+        if progress is not None:
+            progress(total - remaining, total)
+        if remaining and sleep:
+            lock.release()
+            try:
+                time.sleep(sleep)
+            finally:
+                lock.acquire()
+                manager.flush()
+
+    destination = sqlite3.connect(copy_path)
+    try:
+        with lock:
+            manager.flush()
+            manager.writer_connection.backup(destination, pages=pages_per_step, progress=on_step)
+    except BaseException:
+        destination.close()
+        os.remove(copy_path)
+        raise
+    destination.close()
+
+    if compress:
+        with open(copy_path, 'rb') as src, gzip.open(temp_path, 'wb', compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.remove(copy_path)
+    os.replace(temp_path, path)
+
+
+def restore_database(snapshot: str, target: str) -> str:
+    """
+    Restore a snapshot (plain or .gz) to target. Run it while the app is stopped;
+    target is replaced atomically.
+    """
+    temp_path = f'{target}.partial'
+    if snapshot.endswith('.gz'):
+        with gzip.open(snapshot, 'rb') as src, open(temp_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+    else:
+        shutil.copyfile(snapshot, temp_path)
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(target + suffix):
+            os.remove(target + suffix)
+    os.replace(temp_path, target)
+    return target
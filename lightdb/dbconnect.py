@@ -1,12 +1,324 @@
 import sqlite3
 import os
+import threading
+from contextlib import contextmanager
 import yaml
 
-def get_connection():
-    config_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'db.yaml')
-    with open(config_path, 'r') as f:
-        config = yaml.safe_load(f)
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', 'config', 'db.yaml')
+
+# Config key -> (PRAGMA name, default). JOURNAL_MODE WAL lets readers run
+# while a write is in progress instead of waiting behind it.
+PRAGMA_SETTINGS = {
+    'JOURNAL_MODE': ('journal_mode', 'WAL'),
+    'SYNCHRONOUS': ('synchronous', 'NORMAL'),
+    'CACHE_SIZE': ('cache_size', -20000),
+    'MMAP_SIZE': ('mmap_size', 268435456),
+    'BUSY_TIMEOUT': ('busy_timeout', 5000),
+}
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def load_config() -> dict:
+    """Read config/db.yaml."""
+    with open(CONFIG_PATH, 'r') as f:
+        return yaml.safe_load(f) or {}
+
+
+def get_database_path(config: dict = None) -> str:
+    """Return the absolute path of the configured database file."""
+    config = config if config is not None else load_config()
+    return os.path.abspath(os.path.join(os.path.dirname(__file__), '..', config['DATABASE_LOCATION']))
 
-    db_path = os.path.join(os.path.dirname(__file__), '..', config['DATABASE_LOCATION'])
-    conn = sqlite3.connect(db_path, check_same_thread=False)
+
+def get_pragmas(config: dict = None) -> dict:
+    """Return the PRAGMA settings from the config, with defaults for missing keys."""
+    config = config if config is not None else load_config()
+    return {pragma: config.get(key, default) for key, (pragma, default) in PRAGMA_SETTINGS.items()}
+
+
+def configure_connection(conn: sqlite3.Connection, pragmas: dict) -> sqlite3.Connection:
+    """Apply PRAGMA settings to a connection."""
+    for pragma, value in pragmas.items():
+        if value is None:
+            continue
+        if not pragma.replace('_', '').isalpha():
+            raise ValueError(f"Invalid pragma name '{pragma}'")
+        if not str(value).lstrip('-').isalnum():
+            raise ValueError(f"Invalid value for pragma '{pragma}': {value!r}")
+        conn.execute(f'PRAGMA {pragma} = {value}').fetchall()
     return conn
+
+
+class Connection(sqlite3.Connection):
+    """A sqlite3 connection that supports weak references."""
+
+
+def get_connection():
+    config = load_config()
+    conn = sqlite3.connect(get_database_path(config), check_same_thread=False, factory=Connection)
+    return configure_connection(conn, get_pragmas(config))
+
+
+class _ReaderLease:
+    """Holds a pooled reader for one thread and returns it when the thread ends."""
+
+    def __init__(self, manager, conn):
+        self.manager = manager
+        self.conn = conn
+
+    def __del__(self):
+        self.manager._release_reader(self.conn)
+
+
+class ConnectionManager:
+    """
+    Hands out connections to one SQLite database file.
+
+    Every thread reads through its own connection, borrowed from a pool and
+    returned when the thread finishes. All writes go through a single writer
+    connection, serialized by a lock. With WAL enabled, reads never wait for
+    a write to commit.
+
+    Usage:
+        manager = get_manager()
+        rows = manager.reader().execute('SELECT ...').fetchall()
+        with manager.writer() as conn:
+            conn.execute('INSERT ...')
+            conn.commit()
+    """
+
+    def __init__(self, path: str, pragmas: dict = None, pool_size: int = 8):
+        """
+        Args:
+            path: Database file path
+            pragmas: PRAGMA name -> value applied to every connection
+            pool_size: Number of idle reader connections kept for reuse
+        """
+        self.path = path
+        self.pragmas = dict(pragmas or {})
+        self.pool_size = pool_size
+        self.write_lock = threading.RLock()
+        self.write_generation = 0
+        self._writer = None
+        self._writer_owner = None
+        self._writer_depth = 0
+        self._idle = []
+        self._pool_lock = threading.Lock()
+        self._local = threading.local()
+        self._closed = False
+        self.shared = False
+        self.group_commit = False
+        self.commit_interval = 0.005
+        self.commit_max_ops = 256
+        self._group_applied = 0
+        self._group_durable = 0
+        self._group_cond = threading.Condition(threading.Lock())
+        self._committer = None
+        self._committer_stop = threading.Event()
+
+    @classmethod
+    def from_connection(cls, conn: sqlite3.Connection) -> 'ConnectionManager':
+        """Wrap an existing connection; it serves both reads and writes."""
+        manager = cls(path=None, pool_size=0)
+        manager._writer = conn
+        manager.shared = True
+        return manager
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, factory=Connection)
+        return configure_connection(conn, self.pragmas)
+
+    @property
+    def writer_connection(self) -> sqlite3.Connection:
+        """The connection all writes go through."""
+        if self._writer is None:
+            with self.write_lock:
+                if self._writer is None:
+                    self._writer = self._connect()
+        return self._writer
+
+    def holds_writer(self) -> bool:
+        """Check whether the calling thread currently holds the writer."""
+        return self._writer_owner == threading.get_ident()
+
+    @contextmanager
+    def writer(self):
+        """Hold the writer connection exclusively for the duration of the block."""
+        with self.write_lock:
+            conn = self.writer_connection
+            self._writer_owner = threading.get_ident()
+            self._writer_depth += 1
+            try:
+                yield conn
+            finally:
+                self._writer_depth -= 1
+                if self._writer_depth == 0:
+                    self._writer_owner = None
+
+    def committed(self):
+        """Record that the writer committed (lets caches notice same-process writes)."""
+        self.write_generation += 1
+        with self._group_cond:
+            self._group_durable = self._group_applied
+            self._group_cond.notify_all()
+
+    def enable_group_commit(self, interval: float = 0.005, max_ops: int = 256):
+        """
+        Coalesce writes from all threads into shared transactions.
+
+        Each write still runs under the write lock, but inside a savepoint of
+        one long transaction instead of committing on its own. A background
+        committer commits that transaction every `interval` seconds, or as
+        soon as `max_ops` writes are waiting, so many writes share one fsync.
+        Other connections see a write once it is committed.
+
+        Args:
+            interval: Seconds between commits while writes are waiting
+            max_ops: Commit immediately once this many writes are waiting
+        """
+        if interval <= 0 or max_ops < 1:
+            raise ValueError("interval must be positive and max_ops at least 1")
+        self.commit_interval = interval
+        self.commit_max_ops = max_ops
+        self.group_commit = True
+        if self._committer is None:
+            self._committer_stop.clear()
+            self._committer = threading.Thread(target=self._run_committer, name='lightdb-committer',
+                                               daemon=True)
+            self._committer.start()
+
+    def disable_group_commit(self):
+        """Commit anything waiting, stop the committer and go back to one commit per write."""
+        self._committer_stop.set()
+        if self._committer is not None:
+            self._committer.join()
+            self._committer = None
+        with self.write_lock:
+            self.group_commit = False
+            self.flush()
+
+    def _run_committer(self):
+        while not self._committer_stop.wait(self.commit_interval):
+            if self._group_durable != self._group_applied:
+                self.flush()
+
+    @property
+    def uncommitted(self) -> int:
+        """Number of group-commit writes applied but not committed yet."""
+        return self._group_applied - self._group_durable
+
+    def group_begin(self, conn: sqlite3.Connection):
+        """Open a savepoint for one write inside the shared group transaction."""
+        if not conn.in_transaction:
+            conn.execute('BEGIN')
+        conn.execute('SAVEPOINT lightdb_write')
+
+    def group_rollback(self, conn: sqlite3.Connection):
+        """Undo the current write only; writes from other threads stay queued."""
+        conn.execute('ROLLBACK TO lightdb_write')
+        conn.execute('RELEASE lightdb_write')
+
+    def group_release(self, conn: sqlite3.Connection) -> int:
+        """
+        Finish the current write and queue it for the next commit.
+        Commits right away once commit_max_ops writes are waiting.
+
+        Returns:
+            Ticket to pass to wait_for_commit
+        """
+        conn.execute('RELEASE lightdb_write')
+        with self._group_cond:
+            self._group_applied += 1
+            ticket = self._group_applied
+        if ticket - self._group_durable >= self.commit_max_ops:
+            self.flush()
+        return ticket
+
+    def flush(self):
+        """Commit the writes waiting for a group commit."""
+        with self.write_lock:
+            conn = self._writer
+            if conn is not None and conn.in_transaction:
+                conn.commit()
+            if self._group_durable != self._group_applied:
+                self.committed()
+
+    def wait_for_commit(self, ticket: int, timeout: float = None) -> bool:
+        """
+        Block until the write behind ticket is committed.
+        Must not be called while holding the writer.
+
+        Returns:
+            False if the timeout ran out first
+        """
+        with self._group_cond:
+            return self._group_cond.wait_for(
+                lambda: self._group_durable >= ticket or self._closed, timeout
+            )
+
+    def reader(self) -> sqlite3.Connection:
+        """
+        Return the calling thread's reader connection.
+        A thread holding the writer reads through it, so it sees its own
+        uncommitted changes.
+        """
+        if self.shared or self.holds_writer():
+            return self.writer_connection
+
+        lease = getattr(self._local, 'lease', None)
+        if lease is None:
+            with self._pool_lock:
+                conn = self._idle.pop() if self._idle else None
+            lease = self._local.lease = _ReaderLease(self, conn or self._connect())
+        return lease.conn
+
+    def _release_reader(self, conn: sqlite3.Connection):
+        with self._pool_lock:
+            if not self._closed and len(self._idle) < self.pool_size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        """Close the writer and all idle readers."""
+        if self.group_commit:
+            self.disable_group_commit()
+        with self._pool_lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+        if self._writer is not None:
+            self._writer.close()
+
+
+def configure_group_commit(manager: ConnectionManager, config: dict = None) -> ConnectionManager:
+    """Turn on group commit for a manager when GROUP_COMMIT is set in the config."""
+    config = config if config is not None else load_config()
+    if config.get('GROUP_COMMIT'):
+        manager.enable_group_commit(
+            interval=config.get('GROUP_COMMIT_INTERVAL_MS', 5) / 1000,
+            max_ops=config.get('GROUP_COMMIT_MAX_OPS', 256)
+        )
+    return manager
+
+
+def get_manager(path: str = None) -> ConnectionManager:
+    """
+    Return the process-wide connection manager for a database file
+    (default: the configured database). Every caller in the process shares
+    it, so each file has exactly one writer.
+    """
+    config = load_config()
+    path = os.path.abspath(path) if path is not None else get_database_path(config)
+    with _managers_lock:
+        if path not in _managers:
+            _managers[path] = ConnectionManager(
+                path,
+                pragmas=get_pragmas(config),
+                pool_size=config.get('READER_POOL_SIZE', 8)
+            )
+            configure_group_commit(_managers[path], config)
+        return _managers[path]
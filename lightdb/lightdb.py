@@ -3,75 +3,192 @@ LightDB - Dictionary-like interface for SQLite database
 Translates dict operations to SQL automatically
 """
 
+import logging
+import re
 import sqlite3
-import json
-from typing import Any, Iterator
+import threading
+import time
+import weakref
+from collections import OrderedDict, namedtuple
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator, Optional, Union
+
+from .backup import backup_database
+from .dbconnect import ConnectionManager
+from .predicates import _prefix_upper_bound
+from .serializers import decode_value, get_serializer
+
+_MISSING = object()
+
+# Rows with an expiry are invisible once it passes, even before the sweeper deletes them
+_LIVE = '(expires_at IS NULL OR expires_at > ?)'
+
+logger = logging.getLogger(__name__)
+
+# Keys per IN (...) query; stays under SQLITE_MAX_VARIABLE_NUMBER on every SQLite build
+_IN_CHUNK = 900
+
+# Compare-and-set attempts before a proxy save or atomic_update gives up
+_CAS_RETRIES = 10
+
+_JSON_PATH = re.compile(r'^\$(\.[A-Za-z_][A-Za-z0-9_]*|\[\d+\])+$')
+_JSON_PATH_STEP = re.compile(r'\.([A-Za-z_][A-Za-z0-9_]*)|\[(\d+)\]')
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+Change = namedtuple('Change', ['seq', 'op', 'collection', 'key', 'value', 'timestamp', 'expires_at', 'version'],
+                    defaults=(None, None))
+
+
+class ChangeLogGap(LookupError):
+    """The requested changes were compacted away; the reader has to resync from a snapshot."""
+
+
+class VersionConflict(RuntimeError):
+    """A compare-and-set kept losing to concurrent writers, or its change no longer applies."""
+
+
+def _chunks(items: list, size: int = _IN_CHUNK):
+    """Split a list into consecutive slices of at most size items."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _placeholders(count: int) -> str:
+    return ', '.join(['?'] * count)
+
+
+def _upsert(table: str, columns: tuple, conflict: tuple) -> str:
+    """
+    INSERT ... ON CONFLICT DO UPDATE that bumps the row's version.
+    (INSERT OR REPLACE would delete the row and reset it.)
+    """
+    updates = ', '.join(f'{column} = excluded.{column}' for column in columns if column not in conflict)
+    return (
+        f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({_placeholders(len(columns))}) '
+        f'ON CONFLICT ({", ".join(conflict)}) DO UPDATE SET {updates}, version = version + 1'
+    )
+
+
+def _stream(cursor: sqlite3.Cursor, batch_size: int) -> Iterator[tuple]:
+    """Yield a cursor's rows, fetching batch_size of them at a time."""
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def _key_range(prefix: Optional[str], start: Optional[str], end: Optional[str]):
+    """Build key range clauses (answered from the primary key index) and their params."""
+    clauses, params = [], []
+    if prefix:
+        clauses.append('key >= ?')
+        params.append(prefix)
+        upper = _prefix_upper_bound(prefix)
+        if upper is not None:
+            clauses.append('key < ?')
+            params.append(upper)
+    if start is not None:
+        clauses.append('key >= ?')
+        params.append(start)
+    if end is not None:
+        clauses.append('key < ?')
+        params.append(end)
+    return clauses, params
+
+
+def _copy_value(value: Any) -> Any:
+    """Copy a decoded value so callers can't mutate cached data."""
+    if isinstance(value, dict):
+        return {k: _copy_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_value(v) for v in value]
+    if isinstance(value, tuple):
+        return tuple(_copy_value(v) for v in value)
+    return value
 
 
 class ListProxy(list):
     """
     A list proxy that automatically saves changes back to the database.
     Intercepts mutation methods to trigger database updates.
+    Saves are compare-and-set against the version that was read; if another
+    writer got there first, the recorded mutations are replayed on its value.
     """
 
-    def __init__(self, data, db, key):
+    def __init__(self, data, db, key, version=None):
         super().__init__(data)
         self._db = db
         self._key = key
+        self._version = version
+        self._ops = []
+
+    def _save(self, op, *args):
+        """Record a mutation and save (deferred inside a batch)."""
+        self._ops.append((op, args))
+        self._db._save_proxy(self._key, self, list)
 
-    def _save(self):
-        """Save the current state back to the database."""
-        self._db[self._key] = list(self)
+    def _saved(self, value, version):
+        """Adopt the value and version that were written."""
+        if value is not None:
+            list.clear(self)
+            list.extend(self, value)
+        self._version = version
+        self._ops.clear()
 
     def append(self, item):
         super().append(item)
-        self._save()
+        self._save(list.append, item)
 
     def extend(self, items):
+        items = list(items)
         super().extend(items)
-        self._save()
+        self._save(list.extend, items)
 
     def insert(self, index, item):
         super().insert(index, item)
-        self._save()
+        self._save(list.insert, index, item)
 
     def remove(self, item):
         super().remove(item)
-        self._save()
+        self._save(list.remove, item)
 
     def pop(self, index=-1):
         result = super().pop(index)
-        self._save()
+        self._save(list.pop, index)
         return result
 
     def clear(self):
         super().clear()
-        self._save()
+        self._save(list.clear)
 
     def sort(self, *args, **kwargs):
         super().sort(*args, **kwargs)
-        self._save()
+        self._save(lambda data: data.sort(*args, **kwargs))
 
     def reverse(self):
         super().reverse()
-        self._save()
+        self._save(list.reverse)
 
     def __setitem__(self, index, value):
         super().__setitem__(index, value)
-        self._save()
+        self._save(list.__setitem__, index, value)
 
     def __delitem__(self, index):
         super().__delitem__(index)
-        self._save()
+        self._save(list.__delitem__, index)
 
     def __iadd__(self, other):
+        other = list(other)
         result = super().__iadd__(other)
-        self._save()
+        self._save(list.extend, other)
         return result
 
     def __imul__(self, other):
         result = super().__imul__(other)
-        self._save()
+        self._save(list.__imul__, other)
         return result
 
 
@@ -79,49 +196,433 @@ class DictProxy(dict):
     """
     A dict proxy that automatically saves changes back to the database.
     Intercepts mutation methods to trigger database updates.
+    Saves are compare-and-set like ListProxy's.
     """
 
-    def __init__(self, data, db, key):
+    def __init__(self, data, db, key, version=None):
         super().__init__(data)
         self._db = db
         self._key = key
+        self._version = version
+        self._ops = []
 
-    def _save(self):
-        """Save the current state back to the database."""
-        self._db[self._key] = dict(self)
+    def _save(self, op, *args):
+        """Record a mutation and save (deferred inside a batch)."""
+        self._ops.append((op, args))
+        self._db._save_proxy(self._key, self, dict)
+
+    def _saved(self, value, version):
+        """Adopt the value and version that were written."""
+        if value is not None:
+            dict.clear(self)
+            dict.update(self, value)
+        self._version = version
+        self._ops.clear()
 
     def __setitem__(self, key, value):
         super().__setitem__(key, value)
-        self._save()
+        self._save(dict.__setitem__, key, value)
 
     def __delitem__(self, key):
         super().__delitem__(key)
-        self._save()
+        self._save(dict.pop, key, None)
 
     def pop(self, *args):
         result = super().pop(*args)
-        self._save()
+        self._save(dict.pop, args[0], None)
         return result
 
     def popitem(self):
         result = super().popitem()
-        self._save()
+        self._save(dict.pop, result[0], None)
         return result
 
     def clear(self):
         super().clear()
-        self._save()
+        self._save(dict.clear)
 
     def update(self, *args, **kwargs):
-        super().update(*args, **kwargs)
-        self._save()
+        other = dict(*args, **kwargs)
+        super().update(other)
+        self._save(dict.update, other)
 
     def setdefault(self, key, default=None):
         result = super().setdefault(key, default)
-        self._save()
+        self._save(dict.setdefault, key, default)
         return result
 
 
+class Collection(MutableMapping):
+    """
+    A dict-like view over a LightDB collection.
+    Every entry is stored as its own row, so reading or writing one entry
+    only touches that entry instead of re-serializing the whole collection.
+
+    Usage:
+        files = db.create_collection('files')
+        files['report.pdf_1234'] = {'owner': 'andrew'}
+        entry = files['report.pdf_1234']
+        del files['report.pdf_1234']
+
+        files.create_index('owner')  # Index a JSON field of the entries
+        files.find(owner='andrew')   # {key: value} of matching entries
+    """
+
+    def __init__(self, db, name):
+        self._db = db
+        self.name = name
+
+    @property
+    def _table(self) -> str:
+        return self._db.items_table
+
+    def __getitem__(self, key: str) -> Any:
+        """
+        Get one entry of the collection.
+        Translates to: SELECT value FROM items WHERE collection = ? AND key = ?
+        """
+        cache_key = (self.name, key)
+        cached, generation = self._db._cache_get(cache_key)
+        if cached is not _MISSING:
+            return _copy_value(cached)
+
+        cursor = self._db._reader().cursor()
+        cursor.execute(
+            f'SELECT value, expires_at FROM {self._table} WHERE collection = ? AND key = ? AND {_LIVE}',
+            (self.name, key, time.time())
+        )
+        result = cursor.fetchone()
+
+        if result is None:
+            raise KeyError(key)
+
+        value = self._db._deserialize_value(result[0])
+        if result[1] is not None:
+            return value
+        return self._db._cache_put(cache_key, value, generation)
+
+    def __setitem__(self, key: str, value: Any):
+        """
+        Set one entry of the collection.
+        Translates to: INSERT INTO items (collection, key, value) VALUES (?, ?, ?) ON CONFLICT DO UPDATE ...
+        """
+        self.set(key, value)
+
+    def set(self, key: str, value: Any, ttl: float = None):
+        """
+        Set one entry of the collection, optionally expiring after ttl seconds.
+        An expired entry is invisible to reads until the sweeper deletes it
+        (see LightDB.start_sweeper).
+        """
+        serialized_value = self._db._serialize_value(value)
+        expires_at = self._db._expires_at(ttl)
+        with self._db._write_cursor() as cursor:
+            cursor.execute(
+                _upsert(self._table, ('collection', 'key', 'value', 'expires_at'), ('collection', 'key')),
+                (self.name, key, serialized_value, expires_at)
+            )
+            self._db._log_changes(cursor, [('set', self.name, key)])
+            self._db._cache_discard((self.name, key))
+
+    def __delitem__(self, key: str):
+        """
+        Delete one entry of the collection.
+        Raises KeyError if the entry doesn't exist.
+        """
+        with self._db._write_cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self._table} WHERE collection = ? AND key = ?',
+                (self.name, key)
+            )
+            self._db._cache_discard((self.name, key))
+
+            if cursor.rowcount == 0:
+                raise KeyError(key)
+            self._db._log_changes(cursor, [('delete', self.name, key)])
+
+    def __contains__(self, key: str) -> bool:
+        cursor = self._db._reader().cursor()
+        cursor.execute(
+            f'SELECT 1 FROM {self._table} WHERE collection = ? AND key = ? AND {_LIVE} LIMIT 1',
+            (self.name, key, time.time())
+        )
+        return cursor.fetchone() is not None
+
+    def __len__(self) -> int:
+        cursor = self._db._reader().cursor()
+        cursor.execute(
+            f'SELECT COUNT(*) FROM {self._table} WHERE collection = ? AND {_LIVE}',
+            (self.name, time.time())
+        )
+        return cursor.fetchone()[0]
+
+    def __iter__(self) -> Iterator[str]:
+        return self.iterkeys()
+
+    def _select(self, columns: str, batch_size: int) -> Iterator[tuple]:
+        cursor = self._db._reader().cursor()
+        cursor.execute(
+            f'SELECT {columns} FROM {self._table} WHERE collection = ? AND {_LIVE}',
+            (self.name, time.time())
+        )
+        return _stream(cursor, batch_size)
+
+    def iterkeys(self, batch_size: int = 1000) -> Iterator[str]:
+        """Lazily iterate over entry keys, fetching batch_size rows at a time."""
+        for row in self._select('key', batch_size):
+            yield row[0]
+
+    def itervalues(self, batch_size: int = 1000) -> Iterator[Any]:
+        """Lazily iterate over entry values, decoding them one at a time."""
+        for row in self._select('value', batch_size):
+            yield self._db._deserialize_value(row[0])
+
+    def iteritems(self, batch_size: int = 1000) -> Iterator[tuple]:
+        """Lazily iterate over (key, value) tuples."""
+        for key, value in self._select('key, value', batch_size):
+            yield key, self._db._deserialize_value(value)
+
+    def scan(self, prefix: str = None, start: str = None, end: str = None, limit: int = None,
+             batch_size: int = 1000) -> Iterator[tuple]:
+        """
+        Yield (key, value) tuples in key order, for keys starting with prefix
+        and/or in the range start <= key < end. Uses the primary key index.
+        """
+        clauses, params = _key_range(prefix, start, end)
+        where = ' AND '.join(['collection = ?', _LIVE] + clauses)
+        cursor = self._db._reader().cursor()
+        cursor.execute(
+            f'SELECT key, value FROM {self._table} WHERE {where} ORDER BY key LIMIT ?',
+            (self.name, time.time(), *params, -1 if limit is None else limit)
+        )
+        for key, value in _stream(cursor, batch_size):
+            yield key, self._db._deserialize_value(value)
+
+    def keys(self) -> list:
+        """Return a list of all entry keys."""
+        return list(self.iterkeys())
+
+    def values(self) -> list:
+        """Return a list of all entry values."""
+        return list(self.itervalues())
+
+    def items(self) -> list:
+        """Return a list of (key, value) tuples."""
+        return list(self.iteritems())
+
+    def get(self, key: str, default=None) -> Any:
+        """Get an entry by key, returning default if it doesn't exist."""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def pop(self, key: str, *default) -> Any:
+        """Remove an entry and return its value."""
+        with self._db.batch():
+            try:
+                value = self[key]
+            except KeyError:
+                if default:
+                    return default[0]
+                raise
+            del self[key]
+        return value
+
+    def clear(self):
+        """
+        Remove all entries of the collection.
+        Translates to: DELETE FROM items WHERE collection = ?
+        """
+        with self._db._write_cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self._table} WHERE collection = ?',
+                (self.name,)
+            )
+            self._db._log_changes(cursor, [('clear', self.name, None)])
+            self._db._cache_discard_collection(self.name)
+
+    def update(self, other=None, **kwargs):
+        """Update the collection with entries from a dict, pairs or kwargs."""
+        pairs = []
+        if other is not None:
+            pairs.extend(other.items() if hasattr(other, 'items') else other)
+        pairs.extend(kwargs.items())
+        if not pairs:
+            return
+
+        rows = [(self.name, key, self._db._serialize_value(value), None) for key, value in pairs]
+        with self._db._write_cursor() as cursor:
+            cursor.executemany(
+                _upsert(self._table, ('collection', 'key', 'value', 'expires_at'), ('collection', 'key')),
+                rows
+            )
+            self._db._log_changes(cursor, [('set', name, key) for name, key, _, _ in rows])
+            self._db._cache_discard_collection(self.name)
+
+    def _existing(self, cursor: sqlite3.Cursor, keys: list) -> set:
+        """Which of keys have a live entry, one IN query per chunk."""
+        existing = set()
+        now = time.time()
+        for chunk in _chunks(keys, _IN_CHUNK - 2):
+            cursor.execute(
+                f'SELECT key FROM {self._table} '
+                f'WHERE collection = ? AND key IN ({_placeholders(len(chunk))}) AND {_LIVE}',
+                (self.name, *chunk, now)
+            )
+            existing.update(row[0] for row in cursor)
+        return existing
+
+    def get_many(self, keys: Iterable[str], default=None) -> dict:
+        """
+        Get several entries with one query per chunk of keys.
+        Returns a dict of every requested key to its value (or default).
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        now = time.time()
+        cursor = self._db._reader().cursor()
+        for chunk in _chunks(keys, _IN_CHUNK - 2):
+            cursor.execute(
+                f'SELECT key, value FROM {self._table} '
+                f'WHERE collection = ? AND key IN ({_placeholders(len(chunk))}) AND {_LIVE}',
+                (self.name, *chunk, now)
+            )
+            for key, value in cursor:
+                found[key] = self._db._deserialize_value(value)
+        return {key: found.get(key, default) for key in keys}
+
+    def set_many(self, items, ttl: float = None) -> dict:
+        """
+        Set several entries in one transaction with a single executemany.
+        Returns a dict of every key to True if it was created, False if replaced.
+        """
+        pairs = dict(items.items() if hasattr(items, 'items') else items)
+        if not pairs:
+            return {}
+
+        expires_at = self._db._expires_at(ttl)
+        rows = [(self.name, key, self._db._serialize_value(value), expires_at) for key, value in pairs.items()]
+        with self._db._write_cursor() as cursor:
+            existing = self._existing(cursor, list(pairs))
+            cursor.executemany(
+                _upsert(self._table, ('collection', 'key', 'value', 'expires_at'), ('collection', 'key')),
+                rows
+            )
+            self._db._log_changes(cursor, [('set', name, key) for name, key, _, _ in rows])
+            self._db._cache_discard_collection(self.name)
+        return {key: key not in existing for key in pairs}
+
+    def delete_many(self, keys: Iterable[str]) -> dict:
+        """
+        Delete several entries in one transaction.
+        Returns a dict of every key to True if it existed and was deleted.
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+
+        with self._db._write_cursor() as cursor:
+            existing = self._existing(cursor, keys)
+            cursor.executemany(
+                f'DELETE FROM {self._table} WHERE collection = ? AND key = ?',
+                [(self.name, key) for key in keys]
+            )
+            self._db._log_changes(cursor, [('delete', self.name, key) for key in keys if key in existing])
+            self._db._cache_discard_collection(self.name)
+        return {key: key in existing for key in keys}
+
+    def get_path(self, key: str, path: str, default=None) -> Any:
+        """Read one JSON path of an entry. See LightDB.get_path."""
+        return self._db._get_path(self.name, key, path, default)
+
+    def set_path(self, key: str, path: str, value: Any):
+        """Set one JSON path of an entry in place. See LightDB.set_path."""
+        self._db._set_path(self.name, key, path, value)
+
+    def remove_path(self, key: str, path: str):
+        """Remove one JSON path of an entry. See LightDB.remove_path."""
+        self._db._remove_path(self.name, key, path)
+
+    def append_path(self, key: str, path: str, value: Any):
+        """Append to an array inside an entry. See LightDB.append_path."""
+        self._db._append_path(self.name, key, path, value)
+
+    def index_of(self, key: str, field: str, value: Any, path: str = '$') -> Optional[int]:
+        """Position of the first matching object in an array of an entry. See LightDB.index_of."""
+        return self._db._index_of(self.name, key, field, value, path)
+
+    def get_versioned(self, key: str) -> tuple:
+        """Return (value, version) of an entry. See LightDB.get_versioned."""
+        return self._db._get_versioned(self.name, key)
+
+    def compare_and_set(self, key: str, expected_version: int, value: Any) -> bool:
+        """Set an entry only if it is still at expected_version. See LightDB.compare_and_set."""
+        return self._db._compare_and_set(self.name, key, expected_version, value) is not None
+
+    def atomic_update(self, key: str, fn: Callable[[Any], Any], retries: int = _CAS_RETRIES,
+                      default=_MISSING) -> Any:
+        """Replace an entry with fn(entry), retrying on conflicts. See LightDB.atomic_update."""
+        return self._db._atomic_update(self.name, key, fn, retries, default)
+
+    def create_index(self, field: str):
+        """Index a JSON field of the entries. See LightDB.create_index."""
+        self._db.create_index(field)
+
+    def _where(self, conditions: dict, kwargs: dict):
+        """Build a WHERE clause matching JSON fields of the entries."""
+        conditions = {**(conditions or {}), **kwargs}
+        clauses = ['collection = ?', _LIVE]
+        values = [self.name, time.time()]
+        for field, value in conditions.items():
+            expression = self._db._json_expression(field)
+            clauses.append(f'{expression} IS ?')
+            values.append(value)
+        return ' AND '.join(clauses), tuple(values)
+
+    def find(self, conditions: dict = None, **kwargs) -> dict:
+        """
+        Find the entries whose JSON fields match all conditions.
+        Translates to: SELECT key, value FROM items
+                       WHERE collection = ? AND json_extract(value, '$.field') IS ?
+        Indexed fields (see create_index) are looked up without a full scan.
+
+        Args:
+            conditions: Dict of JSON paths ('$.meta.size') or field names to values
+            **kwargs: Field names to values
+
+        Returns:
+            Dict of matching keys to values
+        """
+        where_clause, values = self._where(conditions, kwargs)
+        cursor = self._db._reader().cursor()
+        cursor.execute(
+            f'SELECT key, value FROM {self._table} WHERE {where_clause}',
+            values
+        )
+        return {row[0]: self._db._deserialize_value(row[1]) for row in cursor}
+
+    def count(self, conditions: dict = None, **kwargs) -> int:
+        """Count the entries whose JSON fields match all conditions."""
+        where_clause, values = self._where(conditions, kwargs)
+        cursor = self._db._reader().cursor()
+        cursor.execute(
+            f'SELECT COUNT(*) FROM {self._table} WHERE {where_clause}',
+            values
+        )
+        return cursor.fetchone()[0]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Collection):
+            return self._db is other._db and self.name == other.name
+        if isinstance(other, dict):
+            return dict(self.items()) == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"<Collection '{self.name}' entries={len(self)}>"
+
+
 class LightDB:
     """
     A dictionary-like interface for SQLite database.
@@ -135,24 +636,87 @@ class LightDB:
         del db['key']                # Delete
         'key' in db                  # Check existence
         len(db)                      # Count entries
+
+        with db.batch():             # One commit for many writes
+            db['a'] = 1
+            db['users'].append(...)
+
+        db.atomic_update('count', lambda n: n + 1, default=0)  # Retries on conflicts
+
+        files = db.create_collection('files')
+        files['a.txt_1234'] = {...}  # Stored as its own row
+        db['files']['a.txt_1234']    # Collections work through db[...] too
     """
 
-    def __init__(self, connection=None, table_name='keyvalue'):
+    def __init__(self, connection=None, table_name='keyvalue', serializer='json', cache_size=0,
+                 changelog=False, durable=True):
         """
         Initialize LightDB instance.
 
         Args:
-            connection: SQLite connection object (if None, creates from config)
+            connection: SQLite connection or ConnectionManager (if None, uses the
+                        shared manager for the configured database: WAL, one
+                        reader connection per thread, one serialized writer)
             table_name: Name of the table to use for key-value storage
+            serializer: Value format for writes: 'json' (default), 'orjson' or 'msgpack'
+                        (see lightdb.serializers). Existing values in any format
+                        stay readable and are converted when next written.
+            cache_size: Number of decoded values to keep in an in-process LRU cache
+                        (0 disables it). The cache is invalidated by this instance's
+                        writes and by PRAGMA data_version when other connections
+                        or processes commit.
+            changelog: Record every write in an append-only change log, in the
+                       same transaction as the write (see changes_since and
+                       lightdb.replica)
+            durable: With group commit on (see ConnectionManager.enable_group_commit),
+                     wait for each write to be committed before returning. False
+                     returns as soon as the write is queued (see deferred)
         """
         if connection is None:
-            from .dbconnect import get_connection
-            connection = get_connection()
+            from .dbconnect import get_manager
+            connection = get_manager()
+
+        if isinstance(connection, ConnectionManager):
+            self._manager = connection
+            self._owns_manager = False
+        else:
+            self._manager = ConnectionManager.from_connection(connection)
+            self._owns_manager = True
 
-        self.conn = connection
         self.table_name = self._validate_table_name(table_name)
+        self.serializer = get_serializer(serializer)
+        self.items_table = f'{self.table_name}_items'
+        self.collections_table = f'{self.table_name}_collections'
+        self.changes_table = f'{self.table_name}_changes'
+        self.changelog = changelog
+        self.durable = durable
+        self._local = threading.local()
+        self._collections = set()
+        self._batch_depth = 0
+        self._batch_owner = None
+        self._pending = {}
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_generation = 0
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._data_versions = weakref.WeakKeyDictionary()
+        self._plain_data_versions = {}
+        self._known_generation = self._manager.write_generation
+        self._sweeper = None
+        self._sweeper_stop = threading.Event()
         self._initialize_table()
 
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """The writer connection."""
+        return self._manager.writer_connection
+
+    def _reader(self) -> sqlite3.Connection:
+        """The calling thread's reader connection."""
+        return self._manager.reader()
+
     def _validate_table_name(self, table_name: str) -> str:
         """
         Validate and sanitize table name to prevent SQL injection.
@@ -173,60 +737,954 @@ class LightDB:
         return table_name
 
     def _initialize_table(self):
-        """Create the key-value table if it doesn't exist."""
-        cursor = self.conn.cursor()
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS {self.table_name} (
-                key TEXT PRIMARY KEY,
-                value TEXT NOT NULL
+        """Create the key-value and collection tables if they don't exist."""
+        with self._write_cursor() as cursor:
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS {self.table_name} (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL,
+                    version INTEGER NOT NULL DEFAULT 1
+                )
+            ''')
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS {self.collections_table} (
+                    name TEXT PRIMARY KEY
+                )
+            ''')
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS {self.items_table} (
+                    collection TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL,
+                    version INTEGER NOT NULL DEFAULT 1,
+                    PRIMARY KEY (collection, key)
+                )
+            ''')
+            for table in (self.table_name, self.items_table):
+                cursor.execute(f'PRAGMA table_info({table})')
+                columns = [row[1] for row in cursor.fetchall()]
+                if 'expires_at' not in columns:
+                    cursor.execute(f'ALTER TABLE {table} ADD COLUMN expires_at REAL')
+                if 'version' not in columns:
+                    cursor.execute(f'ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 1')
+                # Partial index: only keys with a TTL are in it, so sweeping
+                # costs O(expired keys) whatever the size of the table
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS {table}_expires_at ON {table} (expires_at) '
+                    f'WHERE expires_at IS NOT NULL'
+                )
+            if self.changelog:
+                cursor.execute(f'''
+                    CREATE TABLE IF NOT EXISTS {self.changes_table} (
+                        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                        op TEXT NOT NULL,
+                        collection TEXT,
+                        key TEXT,
+                        value,
+                        timestamp REAL NOT NULL,
+                        expires_at REAL,
+                        version INTEGER
+                    )
+                ''')
+                cursor.execute(f'PRAGMA table_info({self.changes_table})')
+                if 'version' not in [row[1] for row in cursor.fetchall()]:
+                    cursor.execute(f'ALTER TABLE {self.changes_table} ADD COLUMN expires_at REAL')
+                    cursor.execute(f'ALTER TABLE {self.changes_table} ADD COLUMN version INTEGER')
+
+    def _is_collection(self, key: str) -> bool:
+        """Check whether a key names a collection."""
+        if key in self._collections:
+            return True
+
+        cursor = self._reader().cursor()
+        cursor.execute(
+            f'SELECT 1 FROM {self.collections_table} WHERE name = ? LIMIT 1',
+            (key,)
+        )
+        if cursor.fetchone() is None:
+            return False
+
+        self._collections.add(key)
+        return True
+
+    def create_collection(self, name: str) -> Collection:
+        """
+        Create a collection (or open it if it already exists).
+        If a plain dict is stored under the same key, its entries are moved
+        into the collection, one row per entry.
+        """
+        if self._is_collection(name):
+            return Collection(self, name)
+
+        with self._write_cursor() as cursor:
+            cursor.execute(
+                f'SELECT value FROM {self.table_name} WHERE key = ?',
+                (name,)
+            )
+            result = cursor.fetchone()
+            existing = self._deserialize_value(result[0]) if result else {}
+            if not isinstance(existing, dict):
+                raise TypeError(f"Key '{name}' holds a {type(existing).__name__}, not a dict")
+
+            cursor.execute(
+                f'INSERT OR IGNORE INTO {self.collections_table} (name) VALUES (?)',
+                (name,)
+            )
+            cursor.executemany(
+                _upsert(self.items_table, ('collection', 'key', 'value', 'expires_at'), ('collection', 'key')),
+                [(name, key, self._serialize_value(value), None) for key, value in existing.items()]
+            )
+            cursor.execute(f'DELETE FROM {self.table_name} WHERE key = ?', (name,))
+            self._log_changes(cursor, [('create', name, None)])
+            self._cache_discard(name)
+
+        self._collections.add(name)
+        return Collection(self, name)
+
+    def drop_collection(self, name: str):
+        """Delete a collection and all of its entries."""
+        if not self._is_collection(name):
+            raise KeyError(name)
+
+        with self._write_cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.items_table} WHERE collection = ?', (name,))
+            cursor.execute(f'DELETE FROM {self.collections_table} WHERE name = ?', (name,))
+            self._log_changes(cursor, [('drop', name, None)])
+            self._cache_discard_collection(name)
+        self._collections.discard(name)
+
+    def collections(self) -> list:
+        """Return a list of all collection names."""
+        cursor = self._reader().cursor()
+        cursor.execute(f'SELECT name FROM {self.collections_table}')
+        return [row[0] for row in cursor]
+
+    def _json_path(self, field: str, allow_root: bool = False) -> str:
+        """
+        Turn a field name or JSON path into a validated JSON path.
+        Paths end up inside index expressions, so only plain
+        '$.field.sub[0]' style paths are accepted ('$' too if allow_root).
+        """
+        path = field if field.startswith('$') else f'$.{field}'
+        if not (_JSON_PATH.match(path) or (allow_root and path == '$')):
+            raise ValueError(
+                f"Invalid JSON path '{field}'. "
+                "Use field names or paths like '$.owner' or '$.meta[0].size'."
+            )
+        if self.serializer.tag is not None:
+            raise ValueError(
+                f"JSON paths need a JSON serializer, not '{self.serializer.name}'"
+            )
+        return path
+
+    def _json_expression(self, field: str) -> str:
+        """SQL expression extracting a JSON field from collection entries."""
+        return f"json_extract(value, '{self._json_path(field)}')"
+
+    def _index_name(self, field: str) -> str:
+        path = self._json_path(field)
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', path[1:]).strip('_')
+        return f'{self.items_table}_json_{slug}'
+
+    def create_index(self, field: str):
+        """
+        Index a JSON field of collection entries.
+        Translates to: CREATE INDEX ... ON items (collection, json_extract(value, '$.field'))
+        The index covers every collection, so Collection.find on that field
+        becomes an index lookup instead of a full scan.
+
+        Args:
+            field: Field name ('owner') or JSON path ('$.meta.owner')
+        """
+        with self._write_cursor() as cursor:
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {self._index_name(field)} '
+                f'ON {self.items_table} (collection, {self._json_expression(field)})'
+            )
+
+    def drop_index(self, field: str):
+        """Drop the index created by create_index for a field."""
+        with self._write_cursor() as cursor:
+            cursor.execute(f'DROP INDEX IF EXISTS {self._index_name(field)}')
+
+    def _row(self, collection: Optional[str], key: str):
+        """(table, WHERE clause, params) selecting one live plain key or collection entry."""
+        if collection is None:
+            return self.table_name, f'key = ? AND {_LIVE}', (key, time.time())
+        return self.items_table, f'collection = ? AND key = ? AND {_LIVE}', (collection, key, time.time())
+
+    def _get_path(self, collection: Optional[str], key: str, path: str, default) -> Any:
+        path = self._json_path(path, allow_root=True)
+        table, where, params = self._row(collection, key)
+        cursor = self._reader().cursor()
+        cursor.execute(
+            f"SELECT typeof(value), CASE WHEN typeof(value) = 'text' THEN json_type(value, ?) END, "
+            f"CASE WHEN typeof(value) = 'text' THEN json_extract(value, ?) ELSE value END "
+            f"FROM {table} WHERE {where}",
+            (path, path, *params)
+        )
+        result = cursor.fetchone()
+        if result is None:
+            if collection is None and self._is_collection(key):
+                raise TypeError(f"'{key}' is a collection; use its entries' paths")
+            raise KeyError(key)
+
+        storage, json_type, value = result
+        if storage != 'text':
+            # Binary (e.g. msgpack) values written before a JSON serializer was configured
+            value = self._deserialize_value(value)
+            for field, index in _JSON_PATH_STEP.findall(path):
+                try:
+                    value = value[field] if field else value[int(index)]
+                except (KeyError, IndexError, TypeError):
+                    return default
+            return value
+
+        if json_type is None:
+            return default
+        if json_type in ('object', 'array'):
+            return self._deserialize_value(value)
+        if json_type in ('true', 'false'):
+            return json_type == 'true'
+        return value
+
+    def _update_path(self, collection: Optional[str], key: str, expression: str, args: tuple):
+        """Rewrite one value with a JSON1 expression of value, inside SQLite."""
+        if collection is None and self._in_batch() and key in self._pending:
+            proxy, kind = self._pending.pop(key)
+            self._store_proxy(key, proxy, kind)
+
+        table, where, params = self._row(collection, key)
+        with self._write_cursor() as cursor:
+            cursor.execute(f'SELECT value FROM {table} WHERE {where}', params)
+            result = cursor.fetchone()
+            if result is None:
+                if collection is None and self._is_collection(key):
+                    raise TypeError(f"'{key}' is a collection; use its entries' paths")
+                raise KeyError(key)
+            if isinstance(result[0], bytes):
+                # JSON1 only reads JSON text; convert a binary value first
+                cursor.execute(
+                    f'UPDATE {table} SET value = ? WHERE {where}',
+                    (self._serialize_value(self._deserialize_value(result[0])), *params)
+                )
+
+            cursor.execute(
+                f'UPDATE {table} SET value = {expression}, version = version + 1 WHERE {where}',
+                (*args, *params)
             )
-        ''')
-        self.conn.commit()
+            self._log_changes(cursor, [('set', collection, key)])
+            self._cache_discard(key if collection is None else (collection, key))
+
+    def _set_path(self, collection: Optional[str], key: str, path: str, value: Any):
+        path = self._json_path(path, allow_root=True)
+        self._update_path(collection, key, 'json_set(value, ?, json(?))', (path, self._serialize_value(value)))
+
+    def _remove_path(self, collection: Optional[str], key: str, path: str):
+        self._update_path(collection, key, 'json_remove(value, ?)', (self._json_path(path),))
+
+    def _append_path(self, collection: Optional[str], key: str, path: str, value: Any):
+        path = self._json_path(path, allow_root=True)
+        current = self._get_path(collection, key, path, _MISSING)
+        if current is _MISSING:
+            self._set_path(collection, key, path, [value])
+            return
+        if not isinstance(current, list):
+            raise TypeError(f"'{path}' of '{key}' holds a {type(current).__name__}, not a list")
+        self._update_path(collection, key, 'json_insert(value, ?, json(?))',
+                          (f'{path}[#]', self._serialize_value(value)))
+
+    def _index_of(self, collection: Optional[str], key: str, field: str, value: Any, path: str) -> Optional[int]:
+        path = self._json_path(path, allow_root=True)
+        field_path = self._json_path(field)
+        table, where, params = self._row(collection, key)
+        if isinstance(value, bool):
+            value = int(value)
+        cursor = self._reader().cursor()
+        cursor.execute(
+            f'SELECT element.key FROM json_each((SELECT value FROM {table} WHERE {where}), ?) AS element '
+            f'WHERE json_extract(element.value, ?) = ? ORDER BY element.id LIMIT 1',
+            (*params, path, field_path, value)
+        )
+        result = cursor.fetchone()
+        return None if result is None else result[0]
 
-    def _serialize_value(self, value: Any) -> str:
-        """Convert Python value to JSON string for storage."""
-        return json.dumps(value)
+    def get_path(self, key: str, path: str, default=None) -> Any:
+        """
+        Read one JSON path of a value without decoding the rest of it.
+        Translates to: SELECT json_extract(value, '$[3].quota_gb') FROM table WHERE key = ?
+        Returns default if the path doesn't exist; raises KeyError if the key doesn't.
 
-    def _deserialize_value(self, value: str) -> Any:
-        """Convert JSON string back to Python value."""
-        return json.loads(value)
+        Usage:
+            quota = db.get_path('users', '$[3].quota_gb')
+        """
+        return self._get_path(None, key, path, default)
+
+    def set_path(self, key: str, path: str, value: Any):
+        """
+        Set one JSON path of a value in place, creating it if missing.
+        Translates to: UPDATE table SET value = json_set(value, ?, json(?)) WHERE key = ?
+        Raises KeyError if the key doesn't exist.
+        """
+        self._set_path(None, key, path, value)
+
+    def remove_path(self, key: str, path: str):
+        """
+        Remove one JSON path (an object field or an array element) from a value.
+        Translates to: UPDATE table SET value = json_remove(value, ?) WHERE key = ?
+        """
+        self._remove_path(None, key, path)
+
+    def append_path(self, key: str, path: str, value: Any):
+        """
+        Append to the array at a JSON path ('$' for a value that is a list).
+        Translates to: UPDATE table SET value = json_insert(value, '$[#]', json(?)) WHERE key = ?
+        A missing path is created as a one-element array.
+        """
+        self._append_path(None, key, path, value)
+
+    def index_of(self, key: str, field: str, value: Any, path: str = '$') -> Optional[int]:
+        """
+        Position of the first object in the array at path whose field equals value,
+        or None. Runs json_each inside SQLite.
+
+        Usage:
+            i = db.index_of('users', 'username', 'andrew')
+            db.set_path('users', f'$[{i}].quota_gb', 10)
+        """
+        return self._index_of(None, key, field, value, path)
+
+    def _get_versioned(self, collection: Optional[str], key: str) -> tuple:
+        table, where, params = self._row(collection, key)
+        cursor = self._reader().cursor()
+        cursor.execute(f'SELECT value, version FROM {table} WHERE {where}', params)
+        result = cursor.fetchone()
+        if result is None:
+            if collection is None and self._is_collection(key):
+                raise TypeError(f"'{key}' is a collection; version its entries instead")
+            raise KeyError(key)
+        return self._deserialize_value(result[0]), result[1]
+
+    def _compare_and_set(self, collection: Optional[str], key: str, expected_version: Optional[int],
+                         value: Any) -> Optional[int]:
+        """
+        Write value if the row is still at expected_version (0: doesn't exist
+        or has expired, None: unconditionally), keeping a live row's expiry.
+        Returns the new version, or None if the row had moved on.
+        """
+        if collection is None:
+            if self._is_collection(key):
+                raise TypeError(f"'{key}' is a collection; version its entries instead")
+            if self._in_batch() and key in self._pending:
+                proxy, kind = self._pending.pop(key)
+                self._store_proxy(key, proxy, kind)
+
+        serialized_value = self._serialize_value(value)
+        table, where, params = self._row(collection, key)
+        row = (key, serialized_value) if collection is None else (collection, key, serialized_value)
+        columns = ('key', 'value') if collection is None else ('collection', 'key', 'value')
+        conflict = columns[:-1]
+        with self._write_cursor() as cursor:
+            if expected_version is None:
+                cursor.execute(f'{_upsert(table, columns, conflict)} RETURNING version', row)
+            elif expected_version == 0:
+                # Only an expired row may be taken over; it becomes a new key without an expiry
+                cursor.execute(
+                    f'{_upsert(table, columns + ("expires_at",), conflict)} '
+                    f'WHERE expires_at IS NOT NULL AND expires_at <= ? RETURNING version',
+                    (*row, None, params[-1])
+                )
+            else:
+                cursor.execute(
+                    f'UPDATE {table} SET value = ?, version = version + 1 '
+                    f'WHERE {where} AND version = ? RETURNING version',
+                    (serialized_value, *params, expected_version)
+                )
+            result = cursor.fetchall()
+            if not result:
+                return None
+            self._log_changes(cursor, [('set', collection, key)])
+            self._cache_discard(key if collection is None else (collection, key))
+        return result[0][0]
+
+    def _atomic_update(self, collection: Optional[str], key: str, fn: Callable[[Any], Any],
+                       retries: int, default) -> Any:
+        for _ in range(retries + 1):
+            try:
+                value, version = self._get_versioned(collection, key)
+            except KeyError:
+                if default is _MISSING:
+                    raise
+                value, version = _copy_value(default), 0
+            new_value = fn(value)
+            if self._compare_and_set(collection, key, version, new_value) is not None:
+                return new_value
+        raise VersionConflict(f"'{key}' kept changing; gave up after {retries + 1} attempts")
+
+    def get_versioned(self, key: str) -> tuple:
+        """
+        Return (value, version) of a key; the value is a plain list/dict, not a proxy.
+        Raises KeyError if the key doesn't exist.
+        """
+        return self._get_versioned(None, key)
+
+    def compare_and_set(self, key: str, expected_version: int, value: Any) -> bool:
+        """
+        Set a key only if nobody wrote it since expected_version was read
+        (0 means the key must not exist). The expiry is kept.
+        Translates to: UPDATE table SET value = ?, version = version + 1 WHERE key = ? AND version = ?
+
+        Returns:
+            True if the value was written, False on a conflict
+        """
+        return self._compare_and_set(None, key, expected_version, value) is not None
+
+    def atomic_update(self, key: str, fn: Callable[[Any], Any], retries: int = _CAS_RETRIES,
+                      default=_MISSING) -> Any:
+        """
+        Replace a key's value with fn(value), retrying on conflicting writes
+        instead of locking. fn may run more than once and must return the new
+        value. A missing key raises KeyError unless default is given.
+        Raises VersionConflict when every attempt lost a race.
+
+        Usage:
+            db.atomic_update('users', lambda users: users + [new_user])
+            db.atomic_update('downloads', lambda n: n + 1, default=0)
+        """
+        return self._atomic_update(None, key, fn, retries, default)
+
+    def _log_changes(self, cursor: sqlite3.Cursor, changes: list):
+        """
+        Append (op, collection, key) rows to the change log. A 'set' copies
+        the value, expiry and version of the row it just wrote, so a replica
+        can reproduce the row exactly.
+        """
+        if not self.changelog or not changes:
+            return
+        now = time.time()
+        columns = f'INSERT INTO {self.changes_table} (op, collection, key, value, expires_at, version, timestamp)'
+        sets = [(collection, key) for op, collection, key in changes if op == 'set']
+        cursor.executemany(
+            f"{columns} SELECT 'set', NULL, key, value, expires_at, version, ? FROM {self.table_name} WHERE key = ?",
+            [(now, key) for collection, key in sets if collection is None]
+        )
+        cursor.executemany(
+            f"{columns} SELECT 'set', collection, key, value, expires_at, version, ? FROM {self.items_table} "
+            f'WHERE collection = ? AND key = ?',
+            [(now, collection, key) for collection, key in sets if collection is not None]
+        )
+        cursor.executemany(
+            f'INSERT INTO {self.changes_table} (op, collection, key, timestamp) VALUES (?, ?, ?, ?)',
+            [(op, collection, key, now) for op, collection, key in changes if op != 'set']
+        )
+
+    def _require_changelog(self):
+        if not self.changelog:
+            raise ValueError("The change log is not enabled (LightDB(changelog=True))")
+
+    def last_change_seq(self) -> int:
+        """Sequence number of the newest change, or 0 if there are none."""
+        self._require_changelog()
+        cursor = self._reader().cursor()
+        cursor.execute(f'SELECT MAX(seq) FROM {self.changes_table}')
+        return cursor.fetchone()[0] or 0
+
+    def changes_since(self, seq: int = 0, batch_size: int = 1000) -> Iterator[Change]:
+        """
+        Stream the changes committed after seq, oldest first, as Change tuples:
+        op is 'set', 'delete', 'clear', 'create' or 'drop'; collection is None
+        for plain keys; clear with no collection clears everything. A 'set'
+        carries the row's expires_at and version (None if it was logged
+        before they were recorded).
+        Raises ChangeLogGap if changes after seq were compacted away.
+        """
+        self._require_changelog()
+        cursor = self._reader().cursor()
+        cursor.execute(f'SELECT MIN(seq), MAX(seq) FROM {self.changes_table}')
+        oldest, newest = cursor.fetchone()
+        if oldest is not None and seq < oldest - 1 and seq < newest:
+            raise ChangeLogGap(f"Changes {seq + 1}..{oldest - 1} were compacted")
+
+        while True:
+            cursor.execute(
+                f'SELECT seq, op, collection, key, value, timestamp, expires_at, version '
+                f'FROM {self.changes_table} WHERE seq > ? ORDER BY seq LIMIT ?',
+                (seq, batch_size)
+            )
+            rows = cursor.fetchall()
+            for row_seq, op, collection, key, value, timestamp, expires_at, version in rows:
+                if value is not None:
+                    value = self._deserialize_value(value)
+                yield Change(row_seq, op, collection, key, value, timestamp, expires_at, version)
+            if len(rows) < batch_size:
+                return
+            seq = rows[-1][0]
+
+    def compact_changes(self, keep: int = None, max_age: float = None, before_seq: int = None) -> int:
+        """
+        Delete old change log entries; the newest entry is always kept so
+        readers can tell how far the log reaches.
+
+        Entries beyond keep or older than max_age are deleted, but never
+        those at or after before_seq (e.g. what the slowest replica has applied).
+
+        Args:
+            keep: Keep at most this many of the newest entries
+            max_age: Delete entries older than this many seconds
+            before_seq: Only delete entries with a lower seq
+
+        Returns:
+            Number of entries deleted
+        """
+        self._require_changelog()
+        policies, params = [], []
+        if keep is not None:
+            policies.append(f'seq <= (SELECT MAX(seq) FROM {self.changes_table}) - ?')
+            params.append(max(keep, 1))
+        if max_age is not None:
+            policies.append('timestamp < ?')
+            params.append(time.time() - max_age)
+        if not policies and before_seq is None:
+            raise ValueError("Pass keep, max_age or before_seq")
+
+        clauses = [f'seq < (SELECT MAX(seq) FROM {self.changes_table})']
+        if policies:
+            clauses.append('(' + ' OR '.join(policies) + ')')
+        if before_seq is not None:
+            clauses.append('seq < ?')
+            params.append(before_seq)
+
+        with self._write_cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.changes_table} WHERE ' + ' AND '.join(clauses), params)
+            return cursor.rowcount
+
+    def _expires_at(self, ttl: Optional[float]) -> Optional[float]:
+        """Turn a TTL in seconds into an absolute expiry time (None: never)."""
+        if ttl is None:
+            return None
+        if ttl <= 0:
+            raise ValueError("ttl must be a positive number of seconds")
+        return time.time() + ttl
+
+    def sweep_expired(self, limit: int = 500,
+                      on_expire: Optional[Callable[[Optional[str], str, Any], None]] = None) -> int:
+        """
+        Delete up to limit expired keys and collection entries in one transaction.
+        Uses the expires_at index, so the cost depends on the number of expired
+        rows, not on the size of the database.
+
+        Args:
+            limit: Maximum rows deleted
+            on_expire: Called after the commit with (collection, key, value) for
+                       every deleted row; collection is None for plain keys
+
+        Returns:
+            Number of rows deleted
+        """
+        if self._in_batch():
+            raise RuntimeError("Cannot sweep inside a batch")
+
+        now = time.time()
+        with self._write_cursor() as cursor:
+            cursor.execute(
+                f'SELECT key, value FROM {self.table_name} '
+                f'WHERE expires_at <= ? ORDER BY expires_at LIMIT ?',
+                (now, limit)
+            )
+            expired = [(None, key, value) for key, value in cursor.fetchall()]
+            cursor.execute(
+                f'SELECT collection, key, value FROM {self.items_table} '
+                f'WHERE expires_at <= ? ORDER BY expires_at LIMIT ?',
+                (now, limit - len(expired))
+            )
+            expired.extend(cursor.fetchall())
+
+            plain = [(key, now) for collection, key, _ in expired if collection is None]
+            entries = [(collection, key, now) for collection, key, _ in expired if collection is not None]
+            cursor.executemany(f'DELETE FROM {self.table_name} WHERE key = ? AND expires_at <= ?', plain)
+            cursor.executemany(
+                f'DELETE FROM {self.items_table} WHERE collection = ? AND key = ? AND expires_at <= ?',
+                entries
+            )
+            self._log_changes(cursor, [('delete', collection, key) for collection, key, _ in expired])
+            for collection, key, _ in expired:
+                self._cache_discard(key if collection is None else (collection, key))
+
+        if on_expire is not None:
+            for collection, key, value in expired:
+                on_expire(collection, key, self._deserialize_value(value))
+        return len(expired)
+
+    def start_sweeper(self, interval: float = 60.0, batch_size: int = 500,
+                      on_expire: Optional[Callable[[Optional[str], str, Any], None]] = None) -> threading.Thread:
+        """
+        Delete expired rows in a background thread: every interval seconds,
+        or right away again while whole batches keep expiring.
+        See sweep_expired for on_expire.
+        """
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return self._sweeper
+
+        stop = self._sweeper_stop
+        stop.clear()
+
+        def run():
+            while not stop.is_set():
+                try:
+                    swept = self.sweep_expired(batch_size, on_expire)
+                except Exception:
+                    logger.exception("Expiry sweep of '%s' failed", self.table_name)
+                    swept = 0
+                if swept < batch_size:
+                    stop.wait(interval)
+
+        self._sweeper = threading.Thread(target=run, name=f'lightdb-sweeper-{self.table_name}', daemon=True)
+        self._sweeper.start()
+        return self._sweeper
+
+    def stop_sweeper(self):
+        """Stop the background sweeper and wait for it."""
+        self._sweeper_stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+
+    def _cache_get(self, cache_key):
+        """
+        Look up a decoded value in the cache.
+        Returns (value, generation); value is _MISSING on a miss and the
+        generation must be passed back to _cache_put.
+        """
+        if not self.cache_size:
+            return _MISSING, None
+
+        conn = self._reader()
+        data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+
+        with self._cache_lock:
+            try:
+                last_version = self._data_versions.get(conn)
+                self._data_versions[conn] = data_version
+            except TypeError:
+                last_version = self._plain_data_versions.get(id(conn))
+                self._plain_data_versions[id(conn)] = data_version
+
+            # A connection seen for the first time has no version to compare
+            # against, so nothing cached can be trusted for it.
+            write_generation = self._manager.write_generation
+            if last_version != data_version or write_generation != self._known_generation:
+                self._known_generation = write_generation
+                self._cache.clear()
+                self._cache_generation += 1
+
+            value = self._cache.get(cache_key, _MISSING)
+            if value is _MISSING:
+                self._cache_misses += 1
+            else:
+                self._cache.move_to_end(cache_key)
+                self._cache_hits += 1
+            return value, self._cache_generation
+
+    def _cache_put(self, cache_key, value: Any, generation) -> Any:
+        """
+        Store a freshly read value unless the cache was invalidated since the
+        lookup. Returns a value that is safe to hand to the caller.
+        """
+        if not self.cache_size:
+            return value
+        if self._reads_uncommitted():
+            return _copy_value(value)
+
+        with self._cache_lock:
+            if generation == self._cache_generation:
+                self._cache[cache_key] = value
+                self._cache.move_to_end(cache_key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return _copy_value(value)
+
+    def _reads_uncommitted(self) -> bool:
+        """Check whether this thread reads through the writer while a transaction is open."""
+        manager = self._manager
+        if not (manager.shared or manager.holds_writer()):
+            return False
+        return manager.writer_connection.in_transaction
+
+    def _cache_discard(self, cache_key):
+        """Drop one cached value after a write."""
+        if not self.cache_size:
+            return
+        with self._cache_lock:
+            self._cache.pop(cache_key, None)
+            self._cache_generation += 1
+
+    def _cache_discard_collection(self, name: str):
+        """Drop every cached entry of a collection."""
+        if not self.cache_size:
+            return
+        with self._cache_lock:
+            for cache_key in [k for k in self._cache if isinstance(k, tuple) and k[0] == name]:
+                del self._cache[cache_key]
+            self._cache_generation += 1
+
+    def cache_clear(self):
+        """Empty the read cache."""
+        with self._cache_lock:
+            self._cache.clear()
+            self._cache_generation += 1
+
+    def cache_info(self) -> CacheInfo:
+        """Return cache statistics as (hits, misses, maxsize, currsize)."""
+        with self._cache_lock:
+            return CacheInfo(self._cache_hits, self._cache_misses, self.cache_size, len(self._cache))
+
+    def _in_batch(self) -> bool:
+        """Check whether the calling thread is inside a batch."""
+        return self._batch_depth > 0 and self._batch_owner == threading.get_ident()
+
+    def _commit(self, conn: sqlite3.Connection):
+        """Commit the writer and record the commit with the manager."""
+        conn.commit()
+        if self._known_generation == self._manager.write_generation:
+            self._known_generation += 1
+        self._manager.committed()
+
+    @contextmanager
+    def _write_cursor(self):
+        """
+        Yield a writer cursor and commit afterwards.
+        Inside a batch the commit is left to the batch; otherwise the write
+        is committed on success and rolled back on error. With group commit
+        the write is queued for the next group commit instead.
+        """
+        ticket = None
+        with self._manager.writer() as conn:
+            cursor = conn.cursor()
+            if self._in_batch():
+                yield cursor
+                return
+
+            if self._manager.group_commit:
+                self._manager.group_begin(conn)
+                try:
+                    yield cursor
+                except Exception:
+                    self._manager.group_rollback(conn)
+                    self.cache_clear()
+                    raise
+                ticket = self._manager.group_release(conn)
+            else:
+                try:
+                    yield cursor
+                    self._commit(conn)
+                except Exception:
+                    conn.rollback()
+                    self.cache_clear()
+                    raise
+        self._wait_for_commit(ticket)
+
+    def _wait_for_commit(self, ticket: Optional[int]):
+        """Block until a group-commit write is committed, unless writes are deferred."""
+        if ticket is not None and getattr(self._local, 'durable', self.durable):
+            self._manager.wait_for_commit(ticket)
+
+    @contextmanager
+    def deferred(self):
+        """
+        Don't wait for group commits inside the block (fire and forget).
+        The writes are still applied in order and committed within the
+        group-commit interval; call flush() to wait for them. Without group
+        commit every write commits immediately and this has no effect.
+
+        Usage:
+            with db.deferred():
+                db['last_seen'] = time.time()
+        """
+        previous = getattr(self._local, 'durable', self.durable)
+        self._local.durable = False
+        try:
+            yield self
+        finally:
+            self._local.durable = previous
+
+    def flush(self):
+        """Commit every write waiting for a group commit."""
+        self._manager.flush()
+
+    def _save_proxy(self, key: str, proxy, kind):
+        """Save a proxy's value, or defer it until the end of the current batch."""
+        if self._in_batch():
+            self._pending[key] = (proxy, kind)
+            return
+        self._store_proxy(key, proxy, kind)
+
+    def _store_proxy(self, key: str, proxy, kind):
+        """
+        Compare-and-set a proxy's value against the version it was read at.
+        On a conflict the proxy's recorded mutations are replayed on the
+        current value; if the key was deleted meanwhile it is recreated.
+        """
+        value = kind(proxy)
+        replayed = False
+        for _ in range(_CAS_RETRIES):
+            version = self._compare_and_set(None, key, proxy._version, value)
+            if version is not None:
+                proxy._saved(value if replayed else None, version)
+                return
+
+            try:
+                current, proxy._version = self._get_versioned(None, key)
+            except KeyError:
+                value, proxy._version = kind(proxy), 0
+                continue
+            if not isinstance(current, kind):
+                raise VersionConflict(f"'{key}' was replaced by a {type(current).__name__}")
+            try:
+                for op, args in proxy._ops:
+                    op(current, *args)
+            except (LookupError, ValueError) as e:
+                raise VersionConflict(f"A change to '{key}' no longer applies after a concurrent write") from e
+            value, replayed = current, True
+        raise VersionConflict(f"'{key}' kept changing; gave up after {_CAS_RETRIES} attempts")
+
+    def _flush_pending(self):
+        """Write every proxy saved during the batch, once per key."""
+        while self._pending:
+            key, (proxy, kind) = self._pending.popitem()
+            self._store_proxy(key, proxy, kind)
+
+    @contextmanager
+    def batch(self):
+        """
+        Group writes into a single transaction.
+        Proxy saves are deferred and merged per key, everything commits once
+        when the block exits and rolls back if it raises. Nested batches join
+        the outermost one.
+
+        Usage:
+            with db.batch():
+                for key in stale_keys:
+                    files.pop(key)
+        """
+        ticket = None
+        with self._manager.writer() as conn:
+            self._batch_depth += 1
+            self._batch_owner = threading.get_ident()
+            group = self._batch_depth == 1 and self._manager.group_commit
+            if group:
+                self._manager.group_begin(conn)
+            try:
+                yield self
+                if self._batch_depth == 1:
+                    self._flush_pending()
+                    if group:
+                        ticket = self._manager.group_release(conn)
+                    else:
+                        self._commit(conn)
+            except BaseException:
+                if self._batch_depth == 1:
+                    self._pending.clear()
+                    if group:
+                        self._manager.group_rollback(conn)
+                    else:
+                        conn.rollback()
+                    self.cache_clear()
+                raise
+            finally:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._batch_owner = None
+        self._wait_for_commit(ticket)
+
+    transaction = batch
+
+    def _serialize_value(self, value: Any) -> Union[str, bytes]:
+        """Convert Python value to its stored form using the configured serializer."""
+        return self.serializer.dumps(value)
+
+    def _deserialize_value(self, value: Union[str, bytes]) -> Any:
+        """Convert a stored value back to Python, whichever serializer wrote it."""
+        tag = self.serializer.tag
+        if tag is None and isinstance(value, str):
+            return self.serializer.loads(value)
+        if tag is not None and isinstance(value, bytes) and value[:1] == tag:
+            return self.serializer.loads(value)
+        return decode_value(value)
 
     def __setitem__(self, key: str, value: Any):
         """
         Set a key-value pair in the database.
-        Translates to: INSERT OR REPLACE INTO table (key, value) VALUES (?, ?)
+        Translates to: INSERT INTO table (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE ...
+        Every write bumps the key's version (see compare_and_set).
+        Assigning a dict to a collection replaces all of its entries.
         """
-        cursor = self.conn.cursor()
+        self.set(key, value)
+
+    def set(self, key: str, value: Any, ttl: float = None):
+        """
+        Set a key-value pair, optionally expiring after ttl seconds.
+        An expired key is invisible to reads until the sweeper deletes it
+        (see start_sweeper). Setting a key again without ttl removes its expiry.
+        """
+        if self._is_collection(key):
+            if ttl is not None:
+                raise TypeError("A collection can't expire; set ttl on its entries instead")
+            if not isinstance(value, dict):
+                raise TypeError(f"Collection '{key}' can only be assigned a dict")
+            collection = Collection(self, key)
+            with self.batch():
+                collection.clear()
+                collection.update(value)
+            return
+
         serialized_value = self._serialize_value(value)
-        cursor.execute(
-            f'INSERT OR REPLACE INTO {self.table_name} (key, value) VALUES (?, ?)',
-            (key, serialized_value)
-        )
-        self.conn.commit()
+        with self._write_cursor() as cursor:
+            cursor.execute(
+                _upsert(self.table_name, ('key', 'value', 'expires_at'), ('key',)),
+                (key, serialized_value, self._expires_at(ttl))
+            )
+            self._log_changes(cursor, [('set', None, key)])
+            self._pending.pop(key, None)
+            self._cache_discard(key)
 
     def __getitem__(self, key: str) -> Any:
         """
         Get a value by key from the database.
         Translates to: SELECT value FROM table WHERE key = ?
         Raises KeyError if key doesn't exist.
-        Returns ListProxy for lists and DictProxy for dicts to enable auto-saving.
+        Returns ListProxy for lists and DictProxy for dicts to enable auto-saving,
+        and a Collection for collections.
+        Inside a batch, a proxy whose save is still pending is returned as is.
         """
-        cursor = self.conn.cursor()
-        cursor.execute(
-            f'SELECT value FROM {self.table_name} WHERE key = ?',
-            (key,)
-        )
-        result = cursor.fetchone()
+        if self._in_batch() and key in self._pending:
+            return self._pending[key][0]
 
-        if result is None:
-            raise KeyError(key)
+        cached, generation = self._cache_get(key)
+        if cached is not _MISSING:
+            value, version = _copy_value(cached)
+        else:
+            cursor = self._reader().cursor()
+            cursor.execute(
+                f'SELECT value, expires_at, version FROM {self.table_name} WHERE key = ? AND {_LIVE}',
+                (key, time.time())
+            )
+            result = cursor.fetchone()
 
-        value = self._deserialize_value(result[0])
+            if result is None:
+                if self._is_collection(key):
+                    return Collection(self, key)
+                raise KeyError(key)
+
+            value, version = self._deserialize_value(result[0]), result[2]
+            if result[1] is None:
+                value, version = self._cache_put(key, (value, version), generation)
 
         if isinstance(value, list):
-            return ListProxy(value, self, key)
+            return ListProxy(value, self, key, version)
         elif isinstance(value, dict):
-            return DictProxy(value, self, key)
+            return DictProxy(value, self, key, version)
 
         return value
 
@@ -235,64 +1693,115 @@ class LightDB:
         Delete a key-value pair from the database.
         Translates to: DELETE FROM table WHERE key = ?
         Raises KeyError if key doesn't exist.
+        Deleting a collection drops all of its entries.
         """
-        cursor = self.conn.cursor()
-        cursor.execute(
-            f'DELETE FROM {self.table_name} WHERE key = ?',
-            (key,)
-        )
+        if self._is_collection(key):
+            self.drop_collection(key)
+            return
 
-        if cursor.rowcount == 0:
-            raise KeyError(key)
+        with self._write_cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table_name} WHERE key = ?',
+                (key,)
+            )
+            self._cache_discard(key)
 
-        self.conn.commit()
+            if cursor.rowcount == 0:
+                raise KeyError(key)
+            self._log_changes(cursor, [('delete', None, key)])
+            self._pending.pop(key, None)
 
     def __contains__(self, key: str) -> bool:
         """
         Check if a key exists in the database.
         Translates to: SELECT 1 FROM table WHERE key = ? LIMIT 1
         """
-        cursor = self.conn.cursor()
+        cursor = self._reader().cursor()
         cursor.execute(
-            f'SELECT 1 FROM {self.table_name} WHERE key = ? LIMIT 1',
-            (key,)
+            f'SELECT 1 FROM {self.table_name} WHERE key = ? AND {_LIVE} LIMIT 1',
+            (key, time.time())
         )
-        return cursor.fetchone() is not None
+        return cursor.fetchone() is not None or self._is_collection(key)
 
     def __len__(self) -> int:
         """
         Return the number of key-value pairs in the database.
         Translates to: SELECT COUNT(*) FROM table
         """
-        cursor = self.conn.cursor()
-        cursor.execute(f'SELECT COUNT(*) FROM {self.table_name}')
-        return cursor.fetchone()[0]
+        cursor = self._reader().cursor()
+        cursor.execute(f'SELECT COUNT(*) FROM {self.table_name} WHERE {_LIVE}', (time.time(),))
+        count = cursor.fetchone()[0]
+        cursor.execute(f'SELECT COUNT(*) FROM {self.collections_table}')
+        return count + cursor.fetchone()[0]
 
     def __iter__(self) -> Iterator[str]:
         """
         Iterate over all keys in the database.
         Translates to: SELECT key FROM table
         """
-        cursor = self.conn.cursor()
-        cursor.execute(f'SELECT key FROM {self.table_name}')
-        for row in cursor:
+        return self.iterkeys()
+
+    def _select(self, columns: str, batch_size: int) -> Iterator[tuple]:
+        cursor = self._reader().cursor()
+        cursor.execute(f'SELECT {columns} FROM {self.table_name} WHERE {_LIVE}', (time.time(),))
+        return _stream(cursor, batch_size)
+
+    def iterkeys(self, batch_size: int = 1000) -> Iterator[str]:
+        """
+        Lazily iterate over all keys (collections last), fetching
+        batch_size rows at a time so memory use stays constant.
+        """
+        for row in self._select('key', batch_size):
             yield row[0]
+        yield from self.collections()
+
+    def itervalues(self, batch_size: int = 1000) -> Iterator[Any]:
+        """Lazily iterate over all values, decoding them one at a time."""
+        for row in self._select('value', batch_size):
+            yield self._deserialize_value(row[0])
+        for name in self.collections():
+            yield Collection(self, name)
+
+    def iteritems(self, batch_size: int = 1000) -> Iterator[tuple]:
+        """Lazily iterate over all (key, value) tuples."""
+        for key, value in self._select('key, value', batch_size):
+            yield key, self._deserialize_value(value)
+        for name in self.collections():
+            yield name, Collection(self, name)
+
+    def scan(self, prefix: str = None, start: str = None, end: str = None, limit: int = None,
+             batch_size: int = 1000) -> Iterator[tuple]:
+        """
+        Yield (key, value) tuples in key order, for keys starting with prefix
+        and/or in the range start <= key < end (collections are not included).
+        Translates to: SELECT key, value FROM table WHERE key >= ? AND key < ? ORDER BY key
+        which is answered from the primary key index.
+
+        Usage:
+            for key, value in db.scan(prefix='session:', limit=100):
+                ...
+        """
+        clauses, params = _key_range(prefix, start, end)
+        where = ' AND '.join([_LIVE] + clauses)
+        cursor = self._reader().cursor()
+        cursor.execute(
+            f'SELECT key, value FROM {self.table_name} WHERE {where} ORDER BY key LIMIT ?',
+            (time.time(), *params, -1 if limit is None else limit)
+        )
+        for key, value in _stream(cursor, batch_size):
+            yield key, self._deserialize_value(value)
 
     def keys(self) -> list:
         """Return a list of all keys."""
-        return list(self.__iter__())
+        return list(self.iterkeys())
 
     def values(self) -> list:
         """Return a list of all values."""
-        cursor = self.conn.cursor()
-        cursor.execute(f'SELECT value FROM {self.table_name}')
-        return [self._deserialize_value(row[0]) for row in cursor]
+        return list(self.itervalues())
 
     def items(self) -> list:
         """Return a list of (key, value) tuples."""
-        cursor = self.conn.cursor()
-        cursor.execute(f'SELECT key, value FROM {self.table_name}')
-        return [(row[0], self._deserialize_value(row[1])) for row in cursor]
+        return list(self.iteritems())
 
     def get(self, key: str, default=None) -> Any:
         """
@@ -309,32 +1818,163 @@ class LightDB:
 
     def clear(self):
         """
-        Remove all key-value pairs from the database.
+        Remove all key-value pairs and collections from the database.
         Translates to: DELETE FROM table
         """
-        cursor = self.conn.cursor()
-        cursor.execute(f'DELETE FROM {self.table_name}')
-        self.conn.commit()
+        with self._write_cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table_name}')
+            cursor.execute(f'DELETE FROM {self.items_table}')
+            cursor.execute(f'DELETE FROM {self.collections_table}')
+            self._log_changes(cursor, [('clear', None, None)])
+            self._pending.clear()
+            self.cache_clear()
+        self._collections.clear()
 
     def update(self, other=None, **kwargs):
         """
         Update the database with key-value pairs from dict or kwargs.
+        All pairs are written in a single transaction (see set_many).
         """
+        pairs = []
         if other is not None:
-            if hasattr(other, 'items'):
-                for key, value in other.items():
-                    self[key] = value
-            else:
-                for key, value in other:
-                    self[key] = value
+            pairs.extend(other.items() if hasattr(other, 'items') else other)
+        pairs.extend(kwargs.items())
+        self.set_many(pairs)
+
+    def _existing(self, cursor: sqlite3.Cursor, keys: list) -> set:
+        """Which of keys hold a live value, one IN query per chunk."""
+        existing = set()
+        now = time.time()
+        for chunk in _chunks(keys, _IN_CHUNK - 1):
+            cursor.execute(
+                f'SELECT key FROM {self.table_name} WHERE key IN ({_placeholders(len(chunk))}) AND {_LIVE}',
+                (*chunk, now)
+            )
+            existing.update(row[0] for row in cursor)
+        return existing
+
+    def get_many(self, keys: Iterable[str], default=None) -> dict:
+        """
+        Get several values with one query per chunk of keys (bypassing the cache).
+        Returns a dict of every requested key to its value, or default if it
+        doesn't exist. Values are proxies and collections, as with db[key].
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        if self._in_batch():
+            found.update((key, self._pending[key][0]) for key in keys if key in self._pending)
+
+        now = time.time()
+        cursor = self._reader().cursor()
+        for chunk in _chunks([key for key in keys if key not in found], _IN_CHUNK - 1):
+            cursor.execute(
+                f'SELECT key, value, version FROM {self.table_name} '
+                f'WHERE key IN ({_placeholders(len(chunk))}) AND {_LIVE}',
+                (*chunk, now)
+            )
+            for key, value, version in cursor:
+                value = self._deserialize_value(value)
+                if isinstance(value, list):
+                    value = ListProxy(value, self, key, version)
+                elif isinstance(value, dict):
+                    value = DictProxy(value, self, key, version)
+                found[key] = value
+
+        collections = set(self.collections()) if len(found) < len(keys) else set()
+        return {
+            key: found[key] if key in found else Collection(self, key) if key in collections else default
+            for key in keys
+        }
+
+    def set_many(self, items, ttl: float = None) -> dict:
+        """
+        Set several key-value pairs in one transaction with a single executemany.
+        Assigning a dict to a collection replaces its entries, as with db[key].
+
+        Returns:
+            Dict of every key to True if it was created, False if replaced
+        """
+        pairs = dict(items.items() if hasattr(items, 'items') else items)
+        if not pairs:
+            return {}
+
+        collections = set(self.collections())
+        plain = {key: value for key, value in pairs.items() if key not in collections}
+        expires_at = self._expires_at(ttl)
+        rows = [(key, self._serialize_value(value), expires_at) for key, value in plain.items()]
+
+        with self.batch():
+            with self._write_cursor() as cursor:
+                existing = self._existing(cursor, list(plain))
+                cursor.executemany(
+                    _upsert(self.table_name, ('key', 'value', 'expires_at'), ('key',)),
+                    rows
+                )
+                self._log_changes(cursor, [('set', None, key) for key, _, _ in rows])
+                for key in plain:
+                    self._pending.pop(key, None)
+                    self._cache_discard(key)
 
-        for key, value in kwargs.items():
-            self[key] = value
+            for key in pairs:
+                if key in collections:
+                    self.set(key, pairs[key], ttl)
+        return {key: key not in collections and key not in existing for key in pairs}
+
+    def delete_many(self, keys: Iterable[str]) -> dict:
+        """
+        Delete several keys in one transaction. Deleting a collection drops it.
+
+        Returns:
+            Dict of every key to True if it existed and was deleted
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+
+        collections = set(self.collections())
+        plain = [key for key in keys if key not in collections]
+        with self.batch():
+            with self._write_cursor() as cursor:
+                existing = self._existing(cursor, plain)
+                cursor.executemany(f'DELETE FROM {self.table_name} WHERE key = ?', [(key,) for key in plain])
+                self._log_changes(cursor, [('delete', None, key) for key in plain if key in existing])
+                for key in plain:
+                    self._pending.pop(key, None)
+                    self._cache_discard(key)
+
+            for key in keys:
+                if key in collections:
+                    self.drop_collection(key)
+        return {key: key in collections or key in existing for key in keys}
 
     def __repr__(self) -> str:
         """String representation of the database."""
         return f"<LightDB table='{self.table_name}' entries={len(self)}>"
 
+    def backup(self, target: str, pages_per_step: int = 256, sleep: float = 0.01,
+               progress: Optional[Callable[[int, int], None]] = None,
+               compress: bool = False, keep: Optional[int] = None) -> str:
+        """
+        Write a consistent snapshot of the database while it stays in use.
+        Copies pages_per_step pages at a time and pauses `sleep` seconds between
+        steps so live writes only ever wait for one step.
+
+        Args:
+            target: File path, or a directory for timestamped snapshots
+            pages_per_step: Pages copied per step
+            sleep: Seconds to pause between steps
+            progress: Called with (pages_done, pages_total) after every step
+            compress: gzip the snapshot
+            keep: When target is a directory, keep only the newest `keep` snapshots
+
+        Returns:
+            Path of the written snapshot
+        """
+        return backup_database(self._manager, target, pages_per_step=pages_per_step, sleep=sleep,
+                               progress=progress, compress=compress, keep=keep)
+
     def close(self):
-        """Close the database connection."""
-        self.conn.close()
+        """Close the database connection (a shared manager stays open for other instances)."""
+        self.stop_sweeper()
+        if self._owns_manager:
+            self._manager.close()
@@ -4,7 +4,10 @@ Provides row-based storage with schema definitions and query capabilities
 """
 
 import sqlite3
-from typing import Any, Dict, List, Optional, Union
+from itertools import groupby, islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .predicates import Predicate
 
 
 class Table:
@@ -19,22 +22,34 @@ class Table:
             'username': 'TEXT NOT NULL',
             'email': 'TEXT',
             'role': 'TEXT DEFAULT "user"'
-        })
+        })                           # Opens existing data, adds missing columns
 
         users.insert({'id': 'user_001', 'username': 'andrew', 'email': 'andrew@example.com'})
+        users.upsert({'id': 'user_001', 'email': 'new@example.com'})
+        users.insert_many(rows_generator(), chunk_size=5000)
         user = users.find_one(username='andrew')
         admins = users.find(role='admin')
+        recent = users.find(col('created') > cutoff, col('role').in_(['admin', 'mod']))
+        users.create_index(['role', 'created'])
+        page = users.find(columns=['id', 'username'], order_by='id', limit=50, after=last_row)
+        for user in users.iter_find(order_by='-id'):
+            ...
     """
 
-    def __init__(self, table_name: str, schema: Dict[str, str] = None, connection=None):
+    def __init__(self, table_name: str, schema: Dict[str, str] = None, connection=None,
+                 recreate: bool = False):
         """
         Initialize a SQL table.
+        An existing table is opened in place; columns in the schema that the
+        table lacks are added (see migrate). Existing rows are never dropped
+        unless recreate is True.
 
         Args:
             table_name: Name of the table
             schema: Dict mapping column names to SQL type definitions
                    Example: {'id': 'TEXT PRIMARY KEY', 'name': 'TEXT NOT NULL'}
             connection: SQLite connection object (if None, creates from config)
+            recreate: Drop and recreate the table from the schema
         """
         if connection is None:
             from .dbconnect import get_connection
@@ -43,9 +58,23 @@ class Table:
         self.conn = connection
         self.table_name = self._validate_table_name(table_name)
         self.schema = schema or {}
+        self._sql_cache = {}
 
         if self.schema:
-            self._create_table()
+            self._create_table(recreate)
+
+    def _cached_sql(self, key: tuple, build):
+        """
+        Return the SQL built for key, building (and validating) it only once.
+        Reusing the exact same text also lets sqlite3 reuse its prepared statement.
+        """
+        try:
+            return self._sql_cache[key]
+        except KeyError:
+            if len(self._sql_cache) >= 512:
+                self._sql_cache.clear()
+            sql = self._sql_cache[key] = build()
+            return sql
 
     def _validate_table_name(self, table_name: str) -> str:
         """Validate table name to prevent SQL injection."""
@@ -72,8 +101,8 @@ class Table:
             )
         return column_name
 
-    def _create_table(self):
-        """Create the table with the specified schema."""
+    def _create_table(self, recreate: bool = False):
+        """Create the table with the specified schema, or migrate the existing one."""
         if not self.schema:
             raise ValueError("Schema is required to create table")
 
@@ -81,17 +110,59 @@ class Table:
             self._validate_column_name(col)
 
         cursor = self.conn.cursor()
-        cursor.execute(f'DROP TABLE IF EXISTS {self.table_name}')
+        if recreate:
+            cursor.execute(f'DROP TABLE IF EXISTS {self.table_name}')
 
         columns_sql = ', '.join([f"{col} {definition}"
                                 for col, definition in self.schema.items()])
 
         cursor.execute(f'''
-            CREATE TABLE {self.table_name} (
+            CREATE TABLE IF NOT EXISTS {self.table_name} (
                 {columns_sql}
             )
         ''')
         self.conn.commit()
+        self.migrate()
+
+    def columns(self) -> List[str]:
+        """
+        Return the column names of the live table.
+        Translates to: PRAGMA table_info(table)
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(f'PRAGMA table_info({self.table_name})')
+        return [row[1] for row in cursor.fetchall()]
+
+    def migrate(self) -> List[str]:
+        """
+        Add the schema columns that the live table is missing.
+        Translates to: ALTER TABLE table ADD COLUMN col definition
+        Columns that exist in the table but not in the schema are kept.
+
+        Returns:
+            Names of the columns that were added
+        """
+        existing = set(self.columns())
+        missing = [col for col in self.schema if col not in existing]
+        if not missing:
+            return []
+
+        cursor = self.conn.cursor()
+        try:
+            for col in missing:
+                cursor.execute(
+                    f'ALTER TABLE {self.table_name} ADD COLUMN {self._validate_column_name(col)} {self.schema[col]}'
+                )
+        except sqlite3.OperationalError as e:
+            self.conn.rollback()
+            raise ValueError(
+                f"Cannot add column '{col}' to '{self.table_name}': {e}. "
+                "SQLite can't add PRIMARY KEY/UNIQUE columns or NOT NULL columns "
+                "without a default; use recreate=True or migrate the data by hand."
+            ) from e
+        self.conn.commit()
+        self._sql_cache.clear()
+        return missing
 
     def insert(self, record: Dict[str, Any]) -> None:
         """
@@ -104,95 +175,341 @@ class Table:
         if not record:
             raise ValueError("Record cannot be empty")
 
-        for col in record.keys():
+        cursor = self.conn.cursor()
+        cursor.execute(self._insert_sql(tuple(record), None, None), tuple(record.values()))
+        self.conn.commit()
+
+    def _primary_key_columns(self) -> List[str]:
+        """Return the primary key columns of the table, in key order."""
+        cursor = self.conn.cursor()
+        cursor.execute(f'PRAGMA table_info({self.table_name})')
+        pk_columns = sorted((row[5], row[1]) for row in cursor.fetchall() if row[5])
+        return [name for _, name in pk_columns]
+
+    def _insert_sql(self, columns: Tuple[str, ...], on_conflict: Optional[str],
+                    conflict_columns: Optional[Sequence[str]]) -> str:
+        """Return the (cached) INSERT statement for a column set."""
+        key = ('insert', columns, on_conflict, tuple(conflict_columns or ()))
+        return self._cached_sql(key, lambda: self._build_insert(columns, on_conflict, conflict_columns))
+
+    def _build_insert(self, columns: Sequence[str], on_conflict: Optional[str],
+                      conflict_columns: Optional[Sequence[str]]) -> str:
+        """
+        Build the INSERT statement for a column set.
+        Translates to: INSERT INTO table (...) VALUES (...)
+                       [ON CONFLICT (...) DO NOTHING | DO UPDATE SET col = excluded.col]
+        """
+        for col in columns:
             self._validate_column_name(col)
 
-        columns = ', '.join(record.keys())
-        placeholders = ', '.join(['?' for _ in record])
-        values = tuple(record.values())
+        columns_sql = ', '.join(columns)
+        placeholders = ', '.join(['?' for _ in columns])
+        sql = f'INSERT INTO {self.table_name} ({columns_sql}) VALUES ({placeholders})'
+
+        if on_conflict is None:
+            return sql
+        if on_conflict == 'ignore':
+            return sql + ' ON CONFLICT DO NOTHING'
+        if on_conflict != 'update':
+            raise ValueError("on_conflict must be None, 'ignore' or 'update'")
+
+        if not conflict_columns:
+            raise ValueError(f"Table '{self.table_name}' has no primary key; pass conflict_columns")
+        for col in conflict_columns:
+            self._validate_column_name(col)
 
-        cursor = self.conn.cursor()
-        cursor.execute(
-            f'INSERT INTO {self.table_name} ({columns}) VALUES ({placeholders})',
-            values
-        )
-        self.conn.commit()
+        updates = [col for col in columns if col not in conflict_columns]
+        target = ', '.join(conflict_columns)
+        if not updates:
+            return sql + f' ON CONFLICT ({target}) DO NOTHING'
+        set_clause = ', '.join([f"{col} = excluded.{col}" for col in updates])
+        return sql + f' ON CONFLICT ({target}) DO UPDATE SET {set_clause}'
 
-    def insert_many(self, records: List[Dict[str, Any]]) -> None:
+    def insert_many(self, records: Iterable[Dict[str, Any]], chunk_size: int = 1000,
+                    on_conflict: Optional[str] = None,
+                    conflict_columns: Optional[Sequence[str]] = None) -> int:
         """
         Insert multiple records at once.
+        Records are consumed lazily in chunks; each chunk is written with
+        executemany in its own transaction, so generators of any length can
+        be loaded without holding them in memory. Records may have different
+        keys; missing keys fall back to the column defaults.
 
         Args:
-            records: List of dicts, each representing a record
+            records: Iterable of dicts, each representing a record
+            chunk_size: Number of records per transaction
+            on_conflict: None to raise on duplicates, 'ignore' to skip them,
+                         'update' to overwrite the existing row (upsert)
+            conflict_columns: Columns identifying a duplicate for 'update'
+                              (defaults to the primary key)
+
+        Returns:
+            Number of records processed
         """
-        if not records:
-            return
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        if on_conflict == 'update' and conflict_columns is None:
+            conflict_columns = self._primary_key_columns()
 
-        columns = list(records[0].keys())
-        for col in columns:
+        total = 0
+        iterator = iter(records)
+        cursor = self.conn.cursor()
+
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                break
+
+            try:
+                # Consecutive records with the same keys share one executemany,
+                # which keeps the original order for duplicate upserts.
+                for columns, group in groupby(chunk, key=tuple):
+                    if not columns:
+                        raise ValueError("Record cannot be empty")
+                    sql = self._insert_sql(columns, on_conflict, conflict_columns)
+                    cursor.executemany(sql, [tuple(record.values()) for record in group])
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+
+            total += len(chunk)
+
+        return total
+
+    def upsert(self, record: Dict[str, Any], conflict_columns: Optional[Sequence[str]] = None) -> None:
+        """
+        Insert a record, or update the existing row that conflicts with it.
+        Translates to: INSERT ... ON CONFLICT (pk) DO UPDATE SET col = excluded.col
+
+        Args:
+            record: Dict mapping column names to values
+            conflict_columns: Columns identifying a duplicate (defaults to the primary key)
+        """
+        if not record:
+            raise ValueError("Record cannot be empty")
+        self.insert_many([record], on_conflict='update', conflict_columns=conflict_columns)
+
+    def upsert_many(self, records: Iterable[Dict[str, Any]], chunk_size: int = 1000,
+                    conflict_columns: Optional[Sequence[str]] = None) -> int:
+        """Upsert multiple records. See insert_many."""
+        return self.insert_many(records, chunk_size=chunk_size, on_conflict='update',
+                                conflict_columns=conflict_columns)
+
+    def _parse_order_by(self, order_by: Union[str, Sequence[str], None]) -> List[Tuple[str, str]]:
+        """
+        Parse order_by into (column, direction) pairs.
+        Accepts 'col', '-col' (descending), 'col DESC' or a list of those.
+        """
+        if not order_by:
+            return []
+        if isinstance(order_by, str):
+            order_by = [order_by]
+
+        parsed = []
+        for item in order_by:
+            parts = item.split()
+            column, direction = parts[0], parts[1].upper() if len(parts) > 1 else 'ASC'
+            if column.startswith('-'):
+                column, direction = column[1:], 'DESC'
+            if len(parts) > 2 or direction not in ('ASC', 'DESC'):
+                raise ValueError(f"Invalid order_by '{item}'")
+            parsed.append((self._validate_column_name(column), direction))
+        return parsed
+
+    @staticmethod
+    def _condition_shape(conditions: Dict[str, Any]) -> tuple:
+        """Cache key part for keyword conditions: columns and which are None."""
+        return tuple((col, value is None) for col, value in conditions.items())
+
+    @staticmethod
+    def _condition_values(conditions: Dict[str, Any]) -> List[Any]:
+        return [value for value in conditions.values() if value is not None]
+
+    def _where_sql(self, predicates: Sequence[Predicate], conditions: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        """Return (' WHERE ...' or '', values)."""
+        clauses, values = self._where(predicates, conditions)
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), values
+
+    def _filtered_sql(self, prefix: str, predicates: Sequence[Predicate],
+                      conditions: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        """Return '<prefix> table WHERE ...' and its values, cached when there are no predicates."""
+        if predicates:
+            where_clause, values = self._where_sql(predicates, conditions)
+            return f'{prefix} {self.table_name}{where_clause}', values
+
+        key = (prefix, self._condition_shape(conditions))
+        sql = self._cached_sql(key, lambda: f'{prefix} {self.table_name}{self._where_sql((), conditions)[0]}')
+        return sql, self._condition_values(conditions)
+
+    def _where(self, predicates: Sequence[Predicate], conditions: Dict[str, Any]) -> Tuple[List[str], List[Any]]:
+        """
+        Compile predicates and column-value conditions into WHERE clauses.
+        All values are passed as parameters; column names are validated.
+        """
+        clauses = []
+        values = []
+        for predicate in predicates:
+            if not isinstance(predicate, Predicate):
+                raise TypeError(
+                    f"Expected a predicate such as col('name') == value, got {type(predicate).__name__}"
+                )
+            sql, params = predicate.compile(self._validate_column_name)
+            clauses.append(f'({sql})')
+            values.extend(params)
+
+        for col, value in conditions.items():
             self._validate_column_name(col)
+            clauses.append(f"{col} IS NULL" if value is None else f"{col} = ?")
+            if value is not None:
+                values.append(value)
 
-        columns_sql = ', '.join(columns)
-        placeholders = ', '.join(['?' for _ in columns])
+        return clauses, values
 
-        cursor = self.conn.cursor()
-        for record in records:
-            values = tuple(record.get(col) for col in columns)
-            cursor.execute(
-                f'INSERT INTO {self.table_name} ({columns_sql}) VALUES ({placeholders})',
-                values
-            )
-        self.conn.commit()
+    def _build_select(self, clauses: List[str], columns: Optional[Sequence[str]], order_by,
+                      keyset: bool, paged: bool) -> Tuple[str, List[str]]:
+        """
+        Build a SELECT statement.
+        Translates to: SELECT cols FROM table WHERE ... [AND (o1, o2) > (?, ?)]
+                       ORDER BY o1, o2 LIMIT ? OFFSET ?
+
+        Returns:
+            (sql, order_by column names used by the keyset condition)
+        """
+        clauses = list(clauses)
+        if columns:
+            columns_sql = ', '.join(self._validate_column_name(col) for col in columns)
+        else:
+            columns_sql = '*'
+
+        order = self._parse_order_by(order_by)
+        if keyset:
+            if not order:
+                raise ValueError("Keyset pagination (after) requires order_by")
+            if len({direction for _, direction in order}) > 1:
+                raise ValueError("Keyset pagination needs all order_by columns in the same direction")
+            operator = '>' if order[0][1] == 'ASC' else '<'
+            order_columns = ', '.join(col for col, _ in order)
+            placeholders = ', '.join(['?' for _ in order])
+            clauses.append(f"({order_columns}) {operator} ({placeholders})")
+
+        sql = f'SELECT {columns_sql} FROM {self.table_name}'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        if order:
+            sql += ' ORDER BY ' + ', '.join(f"{col} {direction}" for col, direction in order)
+        if paged:
+            sql += ' LIMIT ? OFFSET ?'
+
+        return sql, [col for col, _ in order]
+
+    def _select_sql(self, predicates: Sequence[Predicate], conditions: Dict[str, Any],
+                    columns: Optional[Sequence[str]] = None, order_by=None,
+                    limit: Optional[int] = None, offset: Optional[int] = None,
+                    after: Optional[Dict[str, Any]] = None) -> Tuple[str, tuple]:
+        """
+        Return the SELECT statement and its parameters.
+        Statements without predicates are built once per shape and cached.
+        """
+        keyset = after is not None
+        paged = limit is not None or offset is not None
 
-    def find(self, **conditions) -> List[Dict[str, Any]]:
+        if predicates:
+            clauses, values = self._where(predicates, conditions)
+            sql, order_columns = self._build_select(clauses, columns, order_by, keyset, paged)
+        else:
+            order_key = (order_by,) if isinstance(order_by, str) else tuple(order_by or ())
+            key = ('select', self._condition_shape(conditions), tuple(columns or ()), order_key, keyset, paged)
+            sql, order_columns = self._cached_sql(key, lambda: self._build_select(
+                self._where((), conditions)[0], columns, order_by, keyset, paged
+            ))
+            values = self._condition_values(conditions)
+
+        if keyset:
+            missing = [col for col in order_columns if col not in after]
+            if missing:
+                raise ValueError(f"'after' is missing order_by columns: {', '.join(missing)}")
+            values.extend(after[col] for col in order_columns)
+        if paged:
+            values.extend([-1 if limit is None else int(limit), int(offset or 0)])
+
+        return sql, tuple(values)
+
+    def find(self, *predicates: Predicate, columns: Optional[Sequence[str]] = None, order_by=None,
+             limit: Optional[int] = None, offset: Optional[int] = None,
+             after: Optional[Dict[str, Any]] = None, **conditions) -> List[Dict[str, Any]]:
         """
         Find all records matching the conditions.
         Translates to: SELECT * FROM table WHERE col1 = ? AND col2 = ?
 
         Args:
+            *predicates: Conditions built with col(), e.g. col('size') > 100
+            columns: Columns to return (default: all)
+            order_by: 'col', '-col' (descending), 'col DESC' or a list of those
+            limit: Maximum number of records
+            offset: Number of records to skip
+            after: Keyset pagination; the last record of the previous page
+                   (needs order_by, and is faster than offset on deep pages)
             **conditions: Column-value pairs to match
 
         Returns:
             List of records as dicts
         """
+        sql, values = self._select_sql(predicates, conditions, columns, order_by, limit, offset, after)
         cursor = self.conn.cursor()
+        cursor.execute(sql, values)
 
-        if conditions:
-            for col in conditions.keys():
-                self._validate_column_name(col)
+        names = [desc[0] for desc in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
 
-            where_clause = ' AND '.join([f"{col} = ?" for col in conditions.keys()])
-            values = tuple(conditions.values())
-            cursor.execute(
-                f'SELECT * FROM {self.table_name} WHERE {where_clause}',
-                values
-            )
-        else:
-            cursor.execute(f'SELECT * FROM {self.table_name}')
-
-        columns = [desc[0] for desc in cursor.description]
-        return [dict(zip(columns, row)) for row in cursor.fetchall()]
-
-    def find_one(self, **conditions) -> Optional[Dict[str, Any]]:
+    def iter_find(self, *predicates: Predicate, columns: Optional[Sequence[str]] = None, order_by=None,
+                  limit: Optional[int] = None, offset: Optional[int] = None,
+                  after: Optional[Dict[str, Any]] = None, batch_size: int = 1000,
+                  **conditions) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily yield records matching the conditions.
+        Rows are fetched in batches of batch_size, so walking a table of any
+        size uses constant memory. Takes the same arguments as find.
+        """
+        sql, values = self._select_sql(predicates, conditions, columns, order_by, limit, offset, after)
+        cursor = self.conn.cursor()
+        cursor.execute(sql, values)
+
+        names = [desc[0] for desc in cursor.description]
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(zip(names, row))
+        finally:
+            cursor.close()
+
+    def find_one(self, *predicates: Predicate, columns: Optional[Sequence[str]] = None, order_by=None,
+                 **conditions) -> Optional[Dict[str, Any]]:
         """
         Find the first record matching the conditions.
 
         Args:
+            *predicates: Conditions built with col()
+            columns: Columns to return (default: all)
+            order_by: Ordering that decides which record is first
             **conditions: Column-value pairs to match
 
         Returns:
             Record as dict, or None if not found
         """
-        results = self.find(**conditions)
+        results = self.find(*predicates, columns=columns, order_by=order_by, limit=1, **conditions)
         return results[0] if results else None
 
-    def update(self, conditions: Dict[str, Any], updates: Dict[str, Any]) -> int:
+    def update(self, conditions: Union[Dict[str, Any], Predicate], updates: Dict[str, Any]) -> int:
         """
         Update records matching the conditions.
         Translates to: UPDATE table SET col1 = ?, col2 = ? WHERE col3 = ?
 
         Args:
-            conditions: Dict of column-value pairs to match (WHERE clause)
+            conditions: Dict of column-value pairs to match, or a predicate (WHERE clause)
             updates: Dict of column-value pairs to update (SET clause)
 
         Returns:
@@ -201,88 +518,130 @@ class Table:
         if not updates:
             raise ValueError("Updates cannot be empty")
 
-        for col in updates.keys():
-            self._validate_column_name(col)
-        for col in conditions.keys():
-            self._validate_column_name(col)
-
-        set_clause = ', '.join([f"{col} = ?" for col in updates.keys()])
-        set_values = tuple(updates.values())
-
-        cursor = self.conn.cursor()
+        def build(where_clause):
+            for col in updates.keys():
+                self._validate_column_name(col)
+            set_clause = ', '.join([f"{col} = ?" for col in updates.keys()])
+            return f'UPDATE {self.table_name} SET {set_clause}{where_clause}'
 
-        if conditions:
-            where_clause = ' AND '.join([f"{col} = ?" for col in conditions.keys()])
-            where_values = tuple(conditions.values())
-            cursor.execute(
-                f'UPDATE {self.table_name} SET {set_clause} WHERE {where_clause}',
-                set_values + where_values
-            )
+        if isinstance(conditions, Predicate):
+            where_clause, where_values = self._where_sql([conditions], {})
+            sql = build(where_clause)
         else:
-            cursor.execute(
-                f'UPDATE {self.table_name} SET {set_clause}',
-                set_values
-            )
+            key = ('update', tuple(updates), self._condition_shape(conditions))
+            sql = self._cached_sql(key, lambda: build(self._where_sql((), conditions)[0]))
+            where_values = self._condition_values(conditions)
 
+        cursor = self.conn.cursor()
+        cursor.execute(sql, tuple(updates.values()) + tuple(where_values))
         self.conn.commit()
         return cursor.rowcount
 
-    def delete(self, **conditions) -> int:
+    def delete(self, *predicates: Predicate, **conditions) -> int:
         """
         Delete records matching the conditions.
         Translates to: DELETE FROM table WHERE col1 = ? AND col2 = ?
 
         Args:
+            *predicates: Conditions built with col()
             **conditions: Column-value pairs to match
 
         Returns:
             Number of rows deleted
         """
-        cursor = self.conn.cursor()
-
-        if conditions:
-            for col in conditions.keys():
-                self._validate_column_name(col)
-
-            where_clause = ' AND '.join([f"{col} = ?" for col in conditions.keys()])
-            values = tuple(conditions.values())
-            cursor.execute(
-                f'DELETE FROM {self.table_name} WHERE {where_clause}',
-                values
-            )
-        else:
-            cursor.execute(f'DELETE FROM {self.table_name}')
+        sql, values = self._filtered_sql('DELETE FROM', predicates, conditions)
 
+        cursor = self.conn.cursor()
+        cursor.execute(sql, values)
         self.conn.commit()
         return cursor.rowcount
 
-    def count(self, **conditions) -> int:
+    def count(self, *predicates: Predicate, **conditions) -> int:
         """
         Count records matching the conditions.
         Translates to: SELECT COUNT(*) FROM table WHERE ...
 
         Args:
+            *predicates: Conditions built with col()
             **conditions: Column-value pairs to match
 
         Returns:
             Number of matching records
         """
+        sql, values = self._filtered_sql('SELECT COUNT(*) FROM', predicates, conditions)
+
         cursor = self.conn.cursor()
+        cursor.execute(sql, values)
+        return cursor.fetchone()[0]
 
-        if conditions:
-            for col in conditions.keys():
-                self._validate_column_name(col)
+    def _default_index_name(self, columns: Union[str, Sequence[str]]) -> str:
+        parsed = self._parse_order_by(columns)
+        return f"idx_{self.table_name}_" + '_'.join(
+            col + ('_desc' if direction == 'DESC' else '') for col, direction in parsed
+        )
 
-            where_clause = ' AND '.join([f"{col} = ?" for col in conditions.keys()])
-            values = tuple(conditions.values())
-            cursor.execute(
-                f'SELECT COUNT(*) FROM {self.table_name} WHERE {where_clause}',
-                values
-            )
+    def create_index(self, columns: Union[str, Sequence[str]], name: Optional[str] = None,
+                     unique: bool = False) -> str:
+        """
+        Create an index on one or more columns.
+        Translates to: CREATE [UNIQUE] INDEX IF NOT EXISTS name ON table (col1, col2 DESC)
+
+        Args:
+            columns: Column or list of columns ('-col' or 'col DESC' for descending)
+            name: Index name (default: idx_<table>_<columns>)
+            unique: Create a UNIQUE index
+
+        Returns:
+            Name of the index
+        """
+        parsed = self._parse_order_by(columns)
+        if not parsed:
+            raise ValueError("At least one column is required")
+        name = self._validate_table_name(name) if name else self._default_index_name(columns)
+        columns_sql = ', '.join(f"{col} {direction}" for col, direction in parsed)
+
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f'CREATE {"UNIQUE " if unique else ""}INDEX IF NOT EXISTS {name} '
+            f'ON {self.table_name} ({columns_sql})'
+        )
+        self.conn.commit()
+        return name
+
+    def drop_index(self, name_or_columns: Union[str, Sequence[str]]) -> None:
+        """
+        Drop an index by name, or by the columns it was created with.
+        Translates to: DROP INDEX IF EXISTS name
+        """
+        if isinstance(name_or_columns, str) and name_or_columns in self.indexes():
+            name = name_or_columns
         else:
-            cursor.execute(f'SELECT COUNT(*) FROM {self.table_name}')
+            name = self._default_index_name(name_or_columns)
 
-        return cursor.fetchone()[0]
+        cursor = self.conn.cursor()
+        cursor.execute(f'DROP INDEX IF EXISTS {self._validate_table_name(name)}')
+        self.conn.commit()
+
+    def indexes(self) -> List[str]:
+        """Return the names of the indexes on this table."""
+        cursor = self.conn.cursor()
+        cursor.execute(f'PRAGMA index_list({self.table_name})')
+        return [row[1] for row in cursor.fetchall()]
+
+    def explain(self, *predicates: Predicate, columns: Optional[Sequence[str]] = None, order_by=None,
+                limit: Optional[int] = None, offset: Optional[int] = None,
+                after: Optional[Dict[str, Any]] = None, **conditions) -> List[str]:
+        """
+        Show how SQLite would run the matching find().
+        Translates to: EXPLAIN QUERY PLAN SELECT ...
+
+        Returns:
+            Query plan lines, e.g. ['SEARCH users USING INDEX idx_users_role (role=?)']
+        """
+        sql, values = self._select_sql(predicates, conditions, columns, order_by, limit, offset, after)
+        cursor = self.conn.cursor()
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', values)
+        return [row[3] for row in cursor.fetchall()]
 
     def all(self) -> List[Dict[str, Any]]:
         """
@@ -307,6 +666,7 @@ class Table:
         cursor = self.conn.cursor()
         cursor.execute(f'DROP TABLE IF EXISTS {self.table_name}')
         self.conn.commit()
+        self._sql_cache.clear()
 
     def __len__(self) -> int:
         """Return the number of records in the table."""
@@ -0,0 +1,185 @@
+"""
+Predicates - Composable WHERE conditions for lightsql.Table
+Build conditions in Python; they compile to parameterized SQL
+
+Usage:
+    from lightdb import Table, col
+
+    files = Table('files')
+    files.find(col('size') > 100, owner='andrew')
+    files.find(col('owner').in_(['andrew', 'fybe']) | (col('public') == 1))
+    files.count(col('created').between(start, end) & col('name').startswith('report'))
+"""
+
+from typing import Any, Callable, Iterable, List, Tuple
+
+
+class Predicate:
+    """Base class for conditions. Combine with & (AND), | (OR) and ~ (NOT)."""
+
+    def compile(self, validate: Callable[[str], str]) -> Tuple[str, List[Any]]:
+        """Return (sql, params); validate is applied to every column name."""
+        raise NotImplementedError
+
+    def __and__(self, other: 'Predicate') -> 'Predicate':
+        return Group('AND', [self, other])
+
+    def __or__(self, other: 'Predicate') -> 'Predicate':
+        return Group('OR', [self, other])
+
+    def __invert__(self) -> 'Predicate':
+        return Not(self)
+
+
+class Condition(Predicate):
+    """A single column condition, such as size > ? or owner IN (?, ?)."""
+
+    def __init__(self, column: str, template: str, params: List[Any]):
+        self.column = column
+        self.template = template
+        self.params = params
+
+    def compile(self, validate):
+        return self.template.format(col=validate(self.column)), list(self.params)
+
+    def __repr__(self) -> str:
+        return f"<Condition {self.template.format(col=self.column)} {self.params}>"
+
+
+class Group(Predicate):
+    """Conditions joined by AND or OR."""
+
+    def __init__(self, operator: str, parts: Iterable[Predicate]):
+        self.operator = operator
+        self.parts = []
+        for part in parts:
+            if not isinstance(part, Predicate):
+                raise TypeError(f"Cannot combine a predicate with {type(part).__name__}")
+            if isinstance(part, Group) and part.operator == operator:
+                self.parts.extend(part.parts)
+            else:
+                self.parts.append(part)
+
+    def compile(self, validate):
+        sql_parts, params = [], []
+        for part in self.parts:
+            sql, part_params = part.compile(validate)
+            sql_parts.append(f'({sql})')
+            params.extend(part_params)
+        return f' {self.operator} '.join(sql_parts), params
+
+
+class Not(Predicate):
+    """Negation of a condition."""
+
+    def __init__(self, predicate: Predicate):
+        self.predicate = predicate
+
+    def compile(self, validate):
+        sql, params = self.predicate.compile(validate)
+        return f'NOT ({sql})', params
+
+
+def _prefix_upper_bound(prefix: str):
+    """Smallest string greater than every string starting with prefix, or None."""
+    while prefix:
+        last = ord(prefix[-1])
+        if last < 0x10FFFF:
+            return prefix[:-1] + chr(last + 1)
+        prefix = prefix[:-1]
+    return None
+
+
+class Column:
+    """
+    A column reference used to build conditions.
+    Comparisons return Predicates instead of booleans.
+    """
+
+    __hash__ = None
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def _condition(self, template: str, *params) -> Condition:
+        return Condition(self.name, template, list(params))
+
+    def __eq__(self, value) -> Condition:
+        if value is None:
+            return self.is_null()
+        return self._condition('{col} = ?', value)
+
+    def __ne__(self, value) -> Condition:
+        if value is None:
+            return self.is_not_null()
+        return self._condition('{col} != ?', value)
+
+    def __lt__(self, value) -> Condition:
+        return self._condition('{col} < ?', value)
+
+    def __le__(self, value) -> Condition:
+        return self._condition('{col} <= ?', value)
+
+    def __gt__(self, value) -> Condition:
+        return self._condition('{col} > ?', value)
+
+    def __ge__(self, value) -> Condition:
+        return self._condition('{col} >= ?', value)
+
+    def in_(self, values: Iterable[Any]) -> Condition:
+        """Column value is one of values."""
+        values = list(values)
+        if not values:
+            return self._condition('0')
+        placeholders = ', '.join(['?' for _ in values])
+        return self._condition(f'{{col}} IN ({placeholders})', *values)
+
+    def not_in(self, values: Iterable[Any]) -> Condition:
+        """Column value is none of values."""
+        values = list(values)
+        if not values:
+            return self._condition('1')
+        placeholders = ', '.join(['?' for _ in values])
+        return self._condition(f'{{col}} NOT IN ({placeholders})', *values)
+
+    def between(self, low, high) -> Condition:
+        """low <= column value <= high."""
+        return self._condition('{col} BETWEEN ? AND ?', low, high)
+
+    def startswith(self, prefix: str) -> Condition:
+        """
+        Column value starts with prefix (case-sensitive).
+        Compiled as a range so an index on the column can be used.
+        """
+        upper = _prefix_upper_bound(prefix)
+        if upper is None:
+            return self._condition('{col} >= ?', prefix)
+        return self._condition('{col} >= ? AND {col} < ?', prefix, upper)
+
+    def like(self, pattern: str) -> Condition:
+        """SQL LIKE match (% and _ wildcards, case-insensitive for ASCII)."""
+        return self._condition('{col} LIKE ?', pattern)
+
+    def is_null(self) -> Condition:
+        return self._condition('{col} IS NULL')
+
+    def is_not_null(self) -> Condition:
+        return self._condition('{col} IS NOT NULL')
+
+    def __repr__(self) -> str:
+        return f"col('{self.name}')"
+
+
+def col(name: str) -> Column:
+    """Reference a column to build a condition: col('size') > 100."""
+    return Column(name)
+
+
+def any_of(*predicates: Predicate) -> Predicate:
+    """OR together any number of predicates."""
+    return Group('OR', predicates)
+
+
+def all_of(*predicates: Predicate) -> Predicate:
+    """AND together any number of predicates."""
+    return Group('AND', predicates)
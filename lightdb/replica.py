@@ -0,0 +1,204 @@
+"""
+Replica - Follow a LightDB change log into another SQLite file
+Keeps a read-only copy a few milliseconds behind the primary
+
+Usage:
+    from lightdb import LightDB
+    from lightdb.replica import Follower
+
+    primary = LightDB(changelog=True)
+    follower = Follower(primary, 'replica/db.sqlite')
+    follower.start()                 # Background thread, polls every 5 ms
+    replica = follower.db            # A LightDB on the replica file, for reads
+    ...
+    follower.stop()
+"""
+
+import os
+import sqlite3
+import threading
+from itertools import islice
+from typing import Optional
+
+from .dbconnect import ConnectionManager
+from .lightdb import LightDB, Collection, Change, ChangeLogGap
+
+
+class Follower:
+    """
+    Replays a primary's change log into a replica database file.
+
+    The replica records the last applied sequence number in the same
+    transaction as the changes, so a restarted follower resumes where it
+    stopped. A new replica (or one that fell behind compaction) is seeded
+    from an online backup of the primary and then catches up from the log.
+    """
+
+    def __init__(self, source: LightDB, target_path: str, poll_interval: float = 0.005,
+                 batch_size: int = 1000):
+        """
+        Args:
+            source: LightDB opened with changelog=True
+            target_path: Replica database file (created and seeded if missing)
+            poll_interval: Seconds to wait between polls when there is nothing to apply
+            batch_size: Maximum changes applied per replica transaction
+        """
+        if not source.changelog:
+            raise ValueError("The source LightDB needs changelog=True")
+
+        self.source = source
+        self.target_path = os.path.abspath(target_path)
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.state_table = f'{source.table_name}_replica'
+        self.db: Optional[LightDB] = None
+        self._stop = threading.Event()
+        self._thread = None
+
+        if not os.path.exists(self.target_path):
+            self._seed()
+        self._open()
+
+    def _open(self):
+        self.db = LightDB(ConnectionManager(self.target_path, pragmas=self.source._manager.pragmas),
+                          self.source.table_name)
+        with self.db._write_cursor() as cursor:
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS {self.state_table} (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    seq INTEGER NOT NULL
+                )
+            ''')
+            cursor.execute(f'INSERT OR IGNORE INTO {self.state_table} (id, seq) VALUES (1, 0)')
+
+    def _seed(self):
+        """Copy the primary with an online backup and start from the log position before it."""
+        seq = self.source.last_change_seq()
+        os.makedirs(os.path.dirname(self.target_path), exist_ok=True)
+        self.source.backup(self.target_path)
+
+        conn = sqlite3.connect(self.target_path)
+        try:
+            conn.execute(f'DROP TABLE IF EXISTS {self.source.changes_table}')
+            conn.execute(f'CREATE TABLE {self.state_table} (id INTEGER PRIMARY KEY CHECK (id = 1), seq INTEGER NOT NULL)')
+            conn.execute(f'INSERT INTO {self.state_table} (id, seq) VALUES (1, ?)', (seq,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def resync(self):
+        """Replace the replica with a fresh copy of the primary."""
+        if self.db is not None:
+            self.db._manager.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.target_path + suffix):
+                os.remove(self.target_path + suffix)
+        self._seed()
+        self._open()
+
+    @property
+    def position(self) -> int:
+        """Sequence number of the last change applied to the replica."""
+        cursor = self.db._reader().cursor()
+        cursor.execute(f'SELECT seq FROM {self.state_table} WHERE id = 1')
+        return cursor.fetchone()[0]
+
+    def _apply(self, change: Change):
+        db = self.db
+        if change.op == 'set' and change.version is None:
+            # Logged before rows carried their expiry and version
+            if change.collection is None:
+                db[change.key] = change.value
+            else:
+                Collection(db, change.collection)[change.key] = change.value
+        elif change.op == 'set':
+            self._copy_row(change)
+        elif change.op == 'delete':
+            target = db if change.collection is None else Collection(db, change.collection)
+            try:
+                del target[change.key]
+            except KeyError:
+                pass
+        elif change.op == 'clear':
+            if change.collection is None:
+                db.clear()
+            else:
+                Collection(db, change.collection).clear()
+        elif change.op == 'create':
+            db.create_collection(change.collection)
+        elif change.op == 'drop':
+            if db._is_collection(change.collection):
+                db.drop_collection(change.collection)
+        else:
+            raise ValueError(f"Unknown change operation '{change.op}'")
+
+    def _copy_row(self, change: Change):
+        """Write a set exactly as the primary stored it, expiry and version included."""
+        db = self.db
+        if change.collection is None:
+            table, columns, row = db.table_name, ('key',), (change.key,)
+            cache_key = change.key
+        else:
+            table, columns, row = db.items_table, ('collection', 'key'), (change.collection, change.key)
+            cache_key = (change.collection, change.key)
+        with db._write_cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} ({", ".join(columns)}, value, expires_at, version) '
+                f'VALUES ({", ".join("?" * (len(columns) + 3))}) '
+                f'ON CONFLICT ({", ".join(columns)}) DO UPDATE SET '
+                f'value = excluded.value, expires_at = excluded.expires_at, version = excluded.version',
+                (*row, db._serialize_value(change.value), change.expires_at, change.version)
+            )
+            db._cache_discard(cache_key)
+
+    def sync(self) -> int:
+        """
+        Apply every change the replica hasn't seen yet.
+        Resyncs from a backup if the changes it needs were compacted.
+
+        Returns:
+            Number of changes applied
+        """
+        applied = 0
+        while True:
+            position = self.position
+            try:
+                stream = self.source.changes_since(position, batch_size=self.batch_size)
+                changes = list(islice(stream, self.batch_size))
+            except ChangeLogGap:
+                self.resync()
+                continue
+            if not changes:
+                return applied
+
+            with self.db.batch():
+                for change in changes:
+                    self._apply(change)
+                with self.db._write_cursor() as cursor:
+                    cursor.execute(f'UPDATE {self.state_table} SET seq = ? WHERE id = 1', (changes[-1].seq,))
+            applied += len(changes)
+
+    def run(self):
+        """Apply changes until stop() is called."""
+        while not self._stop.is_set():
+            if not self.sync():
+                self._stop.wait(self.poll_interval)
+
+    def start(self) -> threading.Thread:
+        """Run the follower in a background thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name='lightdb-follower', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        """Stop the background thread and wait for it."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        if self.db is not None:
+            self.db._manager.close()
@@ -0,0 +1,148 @@
+"""
+Serializers - Pluggable value encoders for LightDB
+Choose how values are turned into bytes on disk without breaking old data
+
+Stored values are self-describing:
+    TEXT values are JSON (written by 'json' or 'orjson', readable by both)
+    BLOB values start with a one-byte tag naming the binary format
+
+so a database written with one serializer can always be read with another,
+and entries are converted to the configured format the next time they are written.
+
+'json' is the default. 'orjson' is opt-in because it doesn't round-trip
+everything the standard library does (see OrjsonSerializer); TEXT values
+from unknown writers are therefore decoded with the standard library.
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class JSONSerializer:
+    """Standard library json. Always available, stores TEXT."""
+
+    name = 'json'
+    tag = None
+
+    def dumps(self, value: Any) -> str:
+        return json.dumps(value)
+
+    def loads(self, data: str) -> Any:
+        return json.loads(data)
+
+
+class OrjsonSerializer:
+    """
+    orjson. Same JSON TEXT on disk as 'json', several times faster to encode.
+    Not a drop-in replacement: NaN and Infinity are written as null, integers
+    beyond 64 bits are refused when writing and read back as floats, and
+    non-string dict keys are written as strings. TEXT orjson can't parse
+    (NaN or Infinity written by 'json') is decoded with the standard library.
+    """
+
+    name = 'orjson'
+    tag = None
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("The 'orjson' serializer requires the orjson package")
+
+    def dumps(self, value: Any) -> str:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+    def loads(self, data: str) -> Any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return json.loads(data)
+
+
+class MsgpackSerializer:
+    """
+    msgpack. Compact binary BLOBs tagged with b'M'.
+    JSON-path features (indexes, get_path, ...) need a JSON serializer.
+    """
+
+    name = 'msgpack'
+    tag = b'M'
+
+    def __init__(self):
+        if msgpack is None:
+            raise ImportError("The 'msgpack' serializer requires the msgpack package")
+
+    def dumps(self, value: Any) -> bytes:
+        return self.tag + msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data[1:], raw=False, strict_map_key=False)
+
+
+SERIALIZERS = {
+    'json': JSONSerializer,
+    'orjson': OrjsonSerializer,
+    'msgpack': MsgpackSerializer,
+}
+
+
+def available_serializers() -> list:
+    """Return the names of the serializers usable in this environment."""
+    names = ['json']
+    if orjson is not None:
+        names.append('orjson')
+    if msgpack is not None:
+        names.append('msgpack')
+    return names
+
+
+def get_serializer(serializer: Union[str, Any] = 'json'):
+    """
+    Resolve a serializer by name.
+
+    Args:
+        serializer: 'json', 'orjson', 'msgpack', or an object with
+                    name/tag/dumps/loads
+
+    Returns:
+        Serializer instance
+    """
+    if not isinstance(serializer, str):
+        return serializer
+
+    if serializer not in SERIALIZERS:
+        raise ValueError(
+            f"Unknown serializer '{serializer}'. "
+            f"Choose one of: {', '.join(SERIALIZERS)}"
+        )
+
+    return SERIALIZERS[serializer]()
+
+
+_binary_loaders = {}
+
+
+def decode_value(data: Union[str, bytes]) -> Any:
+    """Decode a stored value, whichever serializer wrote it."""
+    if isinstance(data, str):
+        return json.loads(data)
+
+    tag = bytes(data[:1])
+    loader = _binary_loaders.get(tag)
+    if loader is None:
+        for cls in SERIALIZERS.values():
+            if cls.tag == tag:
+                loader = _binary_loaders[tag] = cls().loads
+                break
+        else:
+            raise ValueError(f"Unknown stored value format tag {tag!r}")
+
+    return loader(data)
@@ -0,0 +1,532 @@
+"""
+Sharded LightDB - Spread keys over several SQLite files
+Every shard has its own writer, so writes to different shards commit in parallel
+
+Usage:
+    from lightdb import ShardedLightDB, open_database
+
+    db = ShardedLightDB(shards=4)       # db.shard0.sqlite ... db.shard3.sqlite
+    db['key'] = 'value'                 # Stored in the shard the key hashes to
+    files = db.create_collection('files')
+    files['a.txt_1234'] = {...}         # Collection entries are spread by their own key
+
+    db = open_database(cache_size=1024) # LightDB, or ShardedLightDB when SHARDS > 1 in config/db.yaml
+"""
+
+import heapq
+import os
+import time
+import zlib
+from contextlib import ExitStack, contextmanager
+from collections.abc import MutableMapping
+from itertools import chain, islice
+from typing import Any, Callable, Iterator, List, Optional
+
+from .backup import backup_shards
+from .dbconnect import get_database_path, get_manager, load_config
+from .lightdb import LightDB, Collection, _LIVE, _stream
+
+
+def shard_index(key: str, shards: int) -> int:
+    """Stable shard number for a key (the same in every process and Python version)."""
+    return zlib.crc32(key.encode('utf-8')) % shards
+
+
+def get_shard_paths(shards: int, config: dict = None) -> List[str]:
+    """Shard file paths next to DATABASE_LOCATION: db.sqlite -> db.shard0.sqlite, ..."""
+    root, ext = os.path.splitext(get_database_path(config))
+    return [f'{root}.shard{i}{ext}' for i in range(shards)]
+
+
+class ShardedCollection(MutableMapping):
+    """
+    A collection spread over all shards; each entry lives in the shard its key hashes to.
+    Supports the same operations as Collection.
+    """
+
+    def __init__(self, db: 'ShardedLightDB', name: str):
+        self._db = db
+        self.name = name
+        self._parts = [Collection(shard, name) for shard in db.shards]
+
+    def _part(self, key: str) -> Collection:
+        return self._parts[shard_index(key, len(self._parts))]
+
+    def __getitem__(self, key: str) -> Any:
+        return self._part(key)[key]
+
+    def __setitem__(self, key: str, value: Any):
+        self._part(key)[key] = value
+
+    def set(self, key: str, value: Any, ttl: float = None):
+        self._part(key).set(key, value, ttl)
+
+    def __delitem__(self, key: str):
+        del self._part(key)[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._part(key)
+
+    def __len__(self) -> int:
+        return sum(len(part) for part in self._parts)
+
+    def __iter__(self) -> Iterator[str]:
+        return chain.from_iterable(self._parts)
+
+    def iterkeys(self, batch_size: int = 1000) -> Iterator[str]:
+        return chain.from_iterable(part.iterkeys(batch_size) for part in self._parts)
+
+    def itervalues(self, batch_size: int = 1000) -> Iterator[Any]:
+        return chain.from_iterable(part.itervalues(batch_size) for part in self._parts)
+
+    def iteritems(self, batch_size: int = 1000) -> Iterator[tuple]:
+        return chain.from_iterable(part.iteritems(batch_size) for part in self._parts)
+
+    def scan(self, prefix: str = None, start: str = None, end: str = None, limit: int = None,
+             batch_size: int = 1000) -> Iterator[tuple]:
+        """Key-ordered scan, merged lazily across shards (see Collection.scan)."""
+        scans = [part.scan(prefix, start, end, limit, batch_size) for part in self._parts]
+        return islice(heapq.merge(*scans, key=lambda item: item[0]), limit)
+
+    def keys(self) -> list:
+        return list(self.iterkeys())
+
+    def values(self) -> list:
+        return list(self.itervalues())
+
+    def items(self) -> list:
+        return list(self.iteritems())
+
+    def get(self, key: str, default=None) -> Any:
+        return self._part(key).get(key, default)
+
+    def pop(self, key: str, *default) -> Any:
+        return self._part(key).pop(key, *default)
+
+    def clear(self):
+        for part in self._parts:
+            part.clear()
+
+    def update(self, other=None, **kwargs):
+        """Update entries; one transaction per shard touched."""
+        groups = [{} for _ in self._parts]
+        pairs = other.items() if hasattr(other, 'items') else (other or [])
+        for key, value in chain(pairs, kwargs.items()):
+            groups[shard_index(key, len(groups))][key] = value
+        for part, group in zip(self._parts, groups):
+            if group:
+                part.update(group)
+
+    def _group(self, keys) -> list:
+        groups = [[] for _ in self._parts]
+        for key in keys:
+            groups[shard_index(key, len(groups))].append(key)
+        return groups
+
+    def get_many(self, keys, default=None) -> dict:
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        for part, group in zip(self._parts, self._group(keys)):
+            if group:
+                found.update(part.get_many(group, default))
+        return {key: found[key] for key in keys}
+
+    def set_many(self, items, ttl: float = None) -> dict:
+        pairs = dict(items.items() if hasattr(items, 'items') else items)
+        created = {}
+        for part, group in zip(self._parts, self._group(pairs)):
+            if group:
+                created.update(part.set_many({key: pairs[key] for key in group}, ttl))
+        return {key: created[key] for key in pairs}
+
+    def delete_many(self, keys) -> dict:
+        keys = list(dict.fromkeys(keys))
+        deleted = {}
+        for part, group in zip(self._parts, self._group(keys)):
+            if group:
+                deleted.update(part.delete_many(group))
+        return {key: deleted[key] for key in keys}
+
+    def get_path(self, key: str, path: str, default=None) -> Any:
+        return self._part(key).get_path(key, path, default)
+
+    def set_path(self, key: str, path: str, value: Any):
+        self._part(key).set_path(key, path, value)
+
+    def remove_path(self, key: str, path: str):
+        self._part(key).remove_path(key, path)
+
+    def append_path(self, key: str, path: str, value: Any):
+        self._part(key).append_path(key, path, value)
+
+    def index_of(self, key: str, field: str, value: Any, path: str = '$'):
+        return self._part(key).index_of(key, field, value, path)
+
+    def get_versioned(self, key: str) -> tuple:
+        return self._part(key).get_versioned(key)
+
+    def compare_and_set(self, key: str, expected_version: int, value: Any) -> bool:
+        return self._part(key).compare_and_set(key, expected_version, value)
+
+    def atomic_update(self, key: str, fn: Callable[[Any], Any], **kwargs) -> Any:
+        return self._part(key).atomic_update(key, fn, **kwargs)
+
+    def create_index(self, field: str):
+        self._db.create_index(field)
+
+    def find(self, conditions: dict = None, **kwargs) -> dict:
+        """Query every shard and merge the results."""
+        results = {}
+        for part in self._parts:
+            results.update(part.find(conditions, **kwargs))
+        return results
+
+    def count(self, conditions: dict = None, **kwargs) -> int:
+        return sum(part.count(conditions, **kwargs) for part in self._parts)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (ShardedCollection, Collection, dict)):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"<ShardedCollection '{self.name}' entries={len(self)}>"
+
+
+class ShardedLightDB(MutableMapping):
+    """
+    LightDB spread over several SQLite files by a stable hash of the key.
+
+    Each shard is a LightDB on the process-wide connection manager of its
+    file (see get_manager), so writes that land in different shards don't
+    wait for each other, and every instance shares one writer per file. Collections exist in
+    every shard and their entries are spread by entry key. Iteration walks the
+    shards one after another without loading them all at once.
+
+    Transactions are per shard: batch() commits every shard when the block
+    exits, but a failure part-way through the commits is not rolled back in
+    the shards that already committed.
+    """
+
+    def __init__(self, shards: int = None, paths: List[str] = None, table_name: str = 'keyvalue',
+                 **options):
+        """
+        Args:
+            shards: Number of shard files (default: SHARDS from config/db.yaml)
+            paths: Explicit shard file paths (overrides shards)
+            table_name: Name of the table to use for key-value storage
+            **options: Passed to every shard's LightDB (serializer, cache_size)
+        """
+        config = load_config()
+        if paths is None:
+            paths = get_shard_paths(shards or config.get('SHARDS', 1), config)
+        if not paths:
+            raise ValueError("A sharded database needs at least one shard")
+
+        self.paths = list(paths)
+        self.shards = [LightDB(get_manager(path), table_name, **options) for path in self.paths]
+        self.table_name = table_name
+
+    def shard_for(self, key: str) -> LightDB:
+        """The shard a key is stored in."""
+        return self.shards[shard_index(key, len(self.shards))]
+
+    def collections(self) -> list:
+        """Names of all collections (registered in every shard)."""
+        return self.shards[0].collections()
+
+    def create_collection(self, name: str) -> ShardedCollection:
+        """
+        Create a collection in every shard. An existing dict value stored
+        under the name is spread across the shards as its entries.
+        """
+        home = self.shard_for(name)
+        existing = None
+        if name in home and not home._is_collection(name):
+            existing = home[name]
+            if not isinstance(existing, dict):
+                raise TypeError(f"Key '{name}' holds a {type(existing).__name__}, not a dict")
+            existing = dict(existing)
+            del home[name]
+
+        for shard in self.shards:
+            shard.create_collection(name)
+
+        collection = ShardedCollection(self, name)
+        if existing:
+            collection.update(existing)
+        return collection
+
+    def drop_collection(self, name: str):
+        for shard in self.shards:
+            shard.drop_collection(name)
+
+    def create_index(self, field: str):
+        for shard in self.shards:
+            shard.create_index(field)
+
+    def drop_index(self, field: str):
+        for shard in self.shards:
+            shard.drop_index(field)
+
+    @contextmanager
+    def batch(self):
+        """Group writes into one transaction per shard (see the class docstring)."""
+        with ExitStack() as stack:
+            for shard in self.shards:
+                stack.enter_context(shard.batch())
+            yield self
+
+    transaction = batch
+
+    @contextmanager
+    def deferred(self):
+        """Don't wait for group commits inside the block, in any shard."""
+        with ExitStack() as stack:
+            for shard in self.shards:
+                stack.enter_context(shard.deferred())
+            yield self
+
+    def flush(self):
+        """Commit every write waiting for a group commit, in every shard."""
+        for shard in self.shards:
+            shard.flush()
+
+    def cache_clear(self):
+        for shard in self.shards:
+            shard.cache_clear()
+
+    def __getitem__(self, key: str) -> Any:
+        shard = self.shard_for(key)
+        if shard._is_collection(key):
+            return ShardedCollection(self, key)
+        return shard[key]
+
+    def __setitem__(self, key: str, value: Any):
+        self.set(key, value)
+
+    def set(self, key: str, value: Any, ttl: float = None):
+        """
+        Set a key-value pair, optionally expiring after ttl seconds.
+        Assigning to a collection replaces its entries in every shard.
+        """
+        if self.shard_for(key)._is_collection(key):
+            if ttl is not None:
+                raise TypeError("A collection can't expire; set ttl on its entries instead")
+            collection = ShardedCollection(self, key)
+            items = dict(value.items()) if hasattr(value, 'items') else dict(value)
+            with self.batch():
+                collection.clear()
+                collection.update(items)
+            return
+        self.shard_for(key).set(key, value, ttl)
+
+    def get_path(self, key: str, path: str, default=None) -> Any:
+        """Read one JSON path of a value (see LightDB.get_path)."""
+        return self.shard_for(key).get_path(key, path, default)
+
+    def set_path(self, key: str, path: str, value: Any):
+        self.shard_for(key).set_path(key, path, value)
+
+    def remove_path(self, key: str, path: str):
+        self.shard_for(key).remove_path(key, path)
+
+    def append_path(self, key: str, path: str, value: Any):
+        self.shard_for(key).append_path(key, path, value)
+
+    def index_of(self, key: str, field: str, value: Any, path: str = '$'):
+        return self.shard_for(key).index_of(key, field, value, path)
+
+    def get_versioned(self, key: str) -> tuple:
+        return self.shard_for(key).get_versioned(key)
+
+    def compare_and_set(self, key: str, expected_version: int, value: Any) -> bool:
+        """Set a key only if it is still at expected_version (see LightDB.compare_and_set)."""
+        return self.shard_for(key).compare_and_set(key, expected_version, value)
+
+    def atomic_update(self, key: str, fn: Callable[[Any], Any], **kwargs) -> Any:
+        """Replace a key's value with fn(value), retrying on conflicts (see LightDB.atomic_update)."""
+        return self.shard_for(key).atomic_update(key, fn, **kwargs)
+
+    def _group(self, keys) -> list:
+        groups = [[] for _ in self.shards]
+        for key in keys:
+            groups[shard_index(key, len(groups))].append(key)
+        return groups
+
+    def get_many(self, keys, default=None) -> dict:
+        """Get several values with one query per shard and chunk (see LightDB.get_many)."""
+        keys = list(dict.fromkeys(keys))
+        collections = set(self.collections())
+        found = {key: ShardedCollection(self, key) for key in keys if key in collections}
+        for shard, group in zip(self.shards, self._group(key for key in keys if key not in collections)):
+            if group:
+                found.update(shard.get_many(group, default))
+        return {key: found[key] for key in keys}
+
+    def set_many(self, items, ttl: float = None) -> dict:
+        """Set several key-value pairs; one transaction per shard."""
+        pairs = dict(items.items() if hasattr(items, 'items') else items)
+        collections = set(self.collections())
+        created = {}
+        with self.batch():
+            for shard, group in zip(self.shards, self._group(key for key in pairs if key not in collections)):
+                if group:
+                    created.update(shard.set_many({key: pairs[key] for key in group}, ttl))
+            for key in pairs:
+                if key in collections:
+                    self[key] = pairs[key]
+                    created[key] = False
+        return {key: created[key] for key in pairs}
+
+    def delete_many(self, keys) -> dict:
+        """Delete several keys; one transaction per shard."""
+        keys = list(dict.fromkeys(keys))
+        collections = set(self.collections())
+        deleted = {}
+        for shard, group in zip(self.shards, self._group(key for key in keys if key not in collections)):
+            if group:
+                deleted.update(shard.delete_many(group))
+        for key in keys:
+            if key in collections:
+                self.drop_collection(key)
+                deleted[key] = True
+        return {key: deleted[key] for key in keys}
+
+    def sweep_expired(self, limit: int = 500, on_expire=None) -> int:
+        """Delete up to limit expired rows in every shard."""
+        return sum(shard.sweep_expired(limit, on_expire) for shard in self.shards)
+
+    def start_sweeper(self, interval: float = 60.0, batch_size: int = 500, on_expire=None):
+        """Start one expiry sweeper per shard."""
+        for shard in self.shards:
+            shard.start_sweeper(interval, batch_size, on_expire)
+
+    def stop_sweeper(self):
+        for shard in self.shards:
+            shard.stop_sweeper()
+
+    def __delitem__(self, key: str):
+        if self.shard_for(key)._is_collection(key):
+            self.drop_collection(key)
+            return
+        del self.shard_for(key)[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.shard_for(key)
+
+    def __len__(self) -> int:
+        plain = 0
+        for shard in self.shards:
+            cursor = shard._reader().cursor()
+            cursor.execute(f'SELECT COUNT(*) FROM {shard.table_name} WHERE {_LIVE}', (time.time(),))
+            plain += cursor.fetchone()[0]
+        return plain + len(self.collections())
+
+    def _iter_rows(self, columns: str, batch_size: int = 1000) -> Iterator[tuple]:
+        """Stream rows of the plain key-value tables, shard by shard."""
+        for shard in self.shards:
+            cursor = shard._reader().cursor()
+            cursor.execute(f'SELECT {columns} FROM {shard.table_name} WHERE {_LIVE}', (time.time(),))
+            for row in _stream(cursor, batch_size):
+                yield shard, row
+
+    def __iter__(self) -> Iterator[str]:
+        return self.iterkeys()
+
+    def iterkeys(self, batch_size: int = 1000) -> Iterator[str]:
+        """Lazily iterate over all keys (collections last), shard by shard."""
+        for _, row in self._iter_rows('key', batch_size):
+            yield row[0]
+        yield from self.collections()
+
+    def itervalues(self, batch_size: int = 1000) -> Iterator[Any]:
+        """Lazily iterate over all values, decoding them one at a time."""
+        for shard, row in self._iter_rows('value', batch_size):
+            yield shard._deserialize_value(row[0])
+        for name in self.collections():
+            yield ShardedCollection(self, name)
+
+    def iteritems(self, batch_size: int = 1000) -> Iterator[tuple]:
+        """Lazily iterate over all (key, value) tuples."""
+        for shard, row in self._iter_rows('key, value', batch_size):
+            yield row[0], shard._deserialize_value(row[1])
+        for name in self.collections():
+            yield name, ShardedCollection(self, name)
+
+    def scan(self, prefix: str = None, start: str = None, end: str = None, limit: int = None,
+             batch_size: int = 1000) -> Iterator[tuple]:
+        """Key-ordered scan, merged lazily across shards (see LightDB.scan)."""
+        scans = [shard.scan(prefix, start, end, limit, batch_size) for shard in self.shards]
+        return islice(heapq.merge(*scans, key=lambda item: item[0]), limit)
+
+    def keys(self) -> list:
+        """Return a list of all keys."""
+        return list(self.iterkeys())
+
+    def values(self) -> list:
+        """Return a list of all values."""
+        return list(self.itervalues())
+
+    def items(self) -> list:
+        """Return a list of (key, value) tuples."""
+        return list(self.iteritems())
+
+    def get(self, key: str, default=None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return self.shard_for(key).get(key, default)
+
+    def clear(self):
+        for shard in self.shards:
+            shard.clear()
+
+    def update(self, other=None, **kwargs):
+        """Update with key-value pairs; one transaction per shard."""
+        pairs = other.items() if hasattr(other, 'items') else (other or [])
+        self.set_many(list(chain(pairs, kwargs.items())))
+
+    def import_from(self, source: LightDB):
+        """Copy every key and collection from an unsharded LightDB."""
+        for key, value in source.items():
+            if isinstance(value, Collection):
+                self.create_collection(key).update(value.items())
+            else:
+                self[key] = value
+
+    def backup(self, directory: str, pages_per_step: int = 256, sleep: float = 0.01,
+               progress: Optional[Callable[[int, int], None]] = None,
+               compress: bool = False, keep: Optional[int] = None) -> List[str]:
+        """
+        Snapshot every shard into directory under one timestamp (see
+        lightdb.backup.backup_shards and LightDB.backup).
+
+        Returns:
+            Paths of the written snapshots, in shard order
+        """
+        return backup_shards([shard._manager for shard in self.shards], directory,
+                             pages_per_step=pages_per_step, sleep=sleep, progress=progress,
+                             compress=compress, keep=keep)
+
+    def close(self):
+        """Stop the sweepers; the shard managers are shared and stay open."""
+        for shard in self.shards:
+            shard.close()
+
+    def __repr__(self) -> str:
+        return f"<ShardedLightDB table='{self.table_name}' shards={len(self.shards)}>"
+
+
+def open_database(**options):
+    """
+    Open the configured database: a LightDB, or a ShardedLightDB when
+    SHARDS in config/db.yaml is greater than 1. CHANGELOG turns on the
+    change log unless changelog is passed.
+    """
+    config = load_config()
+    options.setdefault('changelog', config.get('CHANGELOG', False))
+    shards = config.get('SHARDS', 1)
+    if shards > 1:
+        return ShardedLightDB(shards=shards, **options)
+    return LightDB(**options)
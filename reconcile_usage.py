@@ -0,0 +1,11 @@
+from tools import usage
+from lightdb import open_database
+
+db = open_database()
+db.create_collection('files')
+db.create_collection('usage')
+
+totals = usage.reconcile(db)
+for username, user in sorted(totals.items()):
+    print(f"{username}: {user['files']} files, {round(user['bytes'] / (1024 ** 3), 2)}GB")
+print(f"Rebuilt usage for {len(totals)} users")
@@ -36,119 +36,208 @@ document.addEventListener('DOMContentLoaded', function() {
 
 document.addEventListener('DOMContentLoaded', function() {
     const form = document.getElementById('uploadForm');
-    if (!form) return;
+    if (!form || !form.dataset.sessionUrl) return;
 
     const fileInput = document.getElementById('fileUpload');
     const progress = document.getElementById('uploadProgress');
     const progressContainer = document.getElementById('uploadProgressContainer');
     const progressText = document.getElementById('uploadProgressText');
     const uploadBtn = document.getElementById('uploadBtn');
+    const reusable = form.querySelector('input[name="reusable"]');
+    const sessionUrl = form.dataset.sessionUrl;
+    // Chunks sent at the same time (set by ADRIVE_PARALLEL_CHUNKS on the server)
+    const parallelChunks = Math.max(parseInt(form.dataset.parallelChunks, 10) || 4, 1);
+    const maxAttempts = 5;
 
-    form.addEventListener('submit', function(e) {
-        e.preventDefault();
-        if (!fileInput || !fileInput.files || fileInput.files.length === 0) {
-            return;
+    function showProgress(percent) {
+        if (progress) {
+            if (progressContainer) progressContainer.style.display = 'block';
+            progress.style.width = percent + '%';
+            progress.setAttribute('aria-valuenow', percent);
+            progress.textContent = percent + '%';
+        }
+        if (progressText) {
+            progressText.style.display = 'block';
+            progressText.textContent = percent + '%';
         }
+    }
 
-        const file = fileInput.files[0];
-        const formData = new FormData();
-        formData.append('file', file);
-        // include reusable checkbox if present
-        const reusable = form.querySelector('input[name="reusable"]');
-        if (reusable && reusable.checked) formData.append('reusable', 'on');
-
-        const xhr = new XMLHttpRequest();
-        xhr.open('POST', form.getAttribute('action'));
-
-        xhr.upload.addEventListener('progress', function(ev) {
-            if (ev.lengthComputable) {
-                const percent = Math.round((ev.loaded / ev.total) * 100);
-                if (progress) {
-                    if (progressContainer) progressContainer.style.display = 'block';
-                    progress.style.width = percent + '%';
-                    progress.setAttribute('aria-valuenow', percent);
-                    progress.textContent = percent + '%';
-                }
-                if (progressText) {
-                    progressText.style.display = 'block';
-                    progressText.textContent = percent + '%';
-                }
-                if (uploadBtn) {
-                    uploadBtn.classList.add('yellowBtn');
-                    uploadBtn.value = '· · ·';
-                    uploadBtn.disabled = true;
-                }
-            }
+    function resetForm(message) {
+        if (uploadBtn) {
+            uploadBtn.disabled = false;
+            uploadBtn.classList.remove('yellowBtn');
+            uploadBtn.value = 'Upload';
+        }
+        if (progress) {
+            if (progressContainer) progressContainer.style.display = 'none';
+            progress.style.width = '0%';
+            progress.setAttribute('aria-valuenow', 0);
+            progress.textContent = '0%';
+        }
+        if (progressText) {
+            progressText.textContent = message || '0%';
+            progressText.style.display = message ? 'block' : 'none';
+        }
+    }
+
+    // Replace the page's flash messages with the ones in a returned page
+    function showFlashes(html) {
+        const tmp = document.createElement('div');
+        tmp.innerHTML = html;
+        const newFlashes = tmp.querySelector('ul.flashes');
+        if (!newFlashes) return false;
+        const oldFlashes = document.querySelector('ul.flashes');
+        if (oldFlashes) oldFlashes.replaceWith(newFlashes);
+        else document.body.insertBefore(newFlashes, document.body.firstChild);
+        return true;
+    }
+
+    // The same file picked again after a reload resumes its unfinished upload
+    function resumeKey(file, isReusable) {
+        return 'adrive-upload:' + [file.name, file.size, file.lastModified, isReusable ? 1 : 0].join(':');
+    }
+
+    async function readError(response) {
+        const data = await response.json().catch(function() { return {}; });
+        const error = new Error(data.error || 'Upload failed');
+        error.status = response.status;
+        error.data = data;
+        return error;
+    }
+
+    async function openSession(file, isReusable) {
+        const key = resumeKey(file, isReusable);
+        const saved = localStorage.getItem(key);
+        if (saved) {
+            const response = await fetch(sessionUrl + '/' + saved);
+            if (response.ok) return [key, await response.json()];
+            localStorage.removeItem(key);
+        }
+
+        const response = await fetch(sessionUrl, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ filename: file.name, size: file.size, reusable: isReusable })
         });
+        if (!response.ok) throw await readError(response);
+        const upload = await response.json();
+        localStorage.setItem(key, upload.id);
+        return [key, upload];
+    }
 
-        xhr.addEventListener('load', function() {
-            if (xhr.status >= 200 && xhr.status < 400) {
-                // Try to extract flash messages from the returned HTML and inject them
-                try {
-                    const tmp = document.createElement('div');
-                    tmp.innerHTML = xhr.responseText;
-                    const newFlashes = tmp.querySelector('ul.flashes');
-                    const oldFlashes = document.querySelector('ul.flashes');
-                    if (newFlashes) {
-                        if (oldFlashes) oldFlashes.replaceWith(newFlashes);
-                        else document.body.insertBefore(newFlashes, document.body.firstChild);
-                    } else {
-                        // fallback to full reload if no flashes present
-                        window.location.href = '/upload';
-                        return;
-                    }
-                } catch (e) {
-                    window.location.href = '/upload';
-                    return;
-                    } finally {
-                    if (uploadBtn) {
-                        uploadBtn.disabled = false;
-                        uploadBtn.classList.remove('yellowBtn');
-                        uploadBtn.value = 'Upload';
-                    }
-                    if (progress) {
-                        if (progressContainer) progressContainer.style.display = 'none';
-                        progress.style.width = '0%';
-                        progress.setAttribute('aria-valuenow', 0);
-                        progress.textContent = '0%';
-                    }
-                    if (progressText) { progressText.style.display = 'none'; progressText.textContent = '0%'; }
-                    // clear file input and reusable checkbox after successful upload
-                    if (fileInput) fileInput.value = '';
-                    if (reusable && reusable.checked) reusable.checked = false;
-                }
+    function putChunk(url, blob, onProgress) {
+        return new Promise(function(resolve, reject) {
+            const xhr = new XMLHttpRequest();
+            xhr.open('PUT', url);
+            xhr.upload.addEventListener('progress', function(ev) {
+                onProgress(ev.loaded);
+            });
+            xhr.addEventListener('load', function() {
+                if (xhr.status >= 200 && xhr.status < 300) {
+                    resolve();
                 } else {
-                // error
-                if (progressText) progressText.textContent = 'Upload failed';
-                if (uploadBtn) {
-                    uploadBtn.disabled = false;
-                    uploadBtn.classList.remove('yellowBtn');
-                    uploadBtn.value = 'Upload';
+                    const error = new Error('Chunk upload failed');
+                    error.status = xhr.status;
+                    reject(error);
                 }
-                if (fileInput) fileInput.value = '';
-                if (progress) { progress.style.display = 'none'; progress.value = 0; }
-                if (progressText) progressText.style.display = 'none';
-            }
+            });
+            xhr.addEventListener('error', function() {
+                reject(new Error('Upload error'));
+            });
+            xhr.send(blob);
         });
+    }
+
+    async function uploadChunks(upload, file) {
+        const received = new Set(upload.received);
+        const pending = [];
+        let done = 0;
+        for (let index = 0; index < upload.chunks; index++) {
+            const length = Math.min(upload.chunk_size, file.size - index * upload.chunk_size);
+            if (received.has(index)) done += length;
+            else pending.push(index);
+        }
+
+        const loaded = {};
+        function report() {
+            let total = done;
+            for (const index in loaded) total += loaded[index];
+            showProgress(file.size ? Math.round((total / file.size) * 100) : 100);
+        }
+        report();
 
-        xhr.addEventListener('error', function() {
-            if (progressText) progressText.textContent = 'Upload error';
-            if (uploadBtn) {
-                uploadBtn.disabled = false;
-                uploadBtn.classList.remove('yellowBtn');
-                uploadBtn.value = 'Upload';
+        async function worker() {
+            while (pending.length) {
+                const index = pending.shift();
+                const start = index * upload.chunk_size;
+                const blob = file.slice(start, Math.min(start + upload.chunk_size, file.size));
+                const url = sessionUrl + '/' + upload.id + '/chunks/' + index;
+                for (let attempt = 1; ; attempt++) {
+                    try {
+                        await putChunk(url, blob, function(bytes) {
+                            loaded[index] = bytes;
+                            report();
+                        });
+                        break;
+                    } catch (err) {
+                        loaded[index] = 0;
+                        // 4xx means the session is gone or the chunk is wrong; retrying won't help
+                        if (attempt >= maxAttempts || (err.status >= 400 && err.status < 500)) throw err;
+                        await new Promise(function(r) { setTimeout(r, 1000 * attempt); });
+                    }
+                }
+                delete loaded[index];
+                done += blob.size;
+                report();
             }
-            if (fileInput) fileInput.value = '';
-            if (progress) {
-                if (progressContainer) progressContainer.style.display = 'none';
-                progress.style.width = '0%';
-                progress.setAttribute('aria-valuenow', 0);
-                progress.textContent = '0%';
+        }
+
+        const workers = [];
+        for (let i = 0; i < Math.min(parallelChunks, pending.length); i++) workers.push(worker());
+        await Promise.all(workers);
+    }
+
+    form.addEventListener('submit', async function(e) {
+        e.preventDefault();
+        if (!fileInput || !fileInput.files || fileInput.files.length === 0) {
+            return;
+        }
+
+        const file = fileInput.files[0];
+        const isReusable = !!(reusable && reusable.checked);
+        if (uploadBtn) {
+            uploadBtn.classList.add('yellowBtn');
+            uploadBtn.value = '· · ·';
+            uploadBtn.disabled = true;
+        }
+
+        try {
+            const [key, upload] = await openSession(file, isReusable);
+            let response;
+            for (let attempt = 1; ; attempt++) {
+                await uploadChunks(upload, file);
+                response = await fetch(sessionUrl + '/' + upload.id + '/finish', { method: 'POST' });
+                if (response.ok) break;
+                const error = await readError(response);
+                // The server is missing chunks (e.g. an expired retry); send those again
+                if (error.status !== 409 || attempt >= maxAttempts) throw error;
+                upload.received = [...Array(upload.chunks).keys()].filter(function(index) {
+                    return !error.data.missing.includes(index);
+                });
             }
-            if (progressText) progressText.style.display = 'none';
-        });
 
-        xhr.send(formData);
+            localStorage.removeItem(key);
+            if (!showFlashes(await response.text())) {
+                window.location.href = '/upload';
+                return;
+            }
+            resetForm();
+            // clear file input and reusable checkbox after successful upload
+            if (fileInput) fileInput.value = '';
+            if (reusable && reusable.checked) reusable.checked = false;
+        } catch (err) {
+            resetForm(err.message || 'Upload failed');
+        }
     });
 });
 
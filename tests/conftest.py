@@ -0,0 +1,44 @@
+import pytest
+
+from lightdb import LightDB
+from lightdb.dbconnect import ConnectionManager
+
+WAL = {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 5000}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'db.sqlite')
+
+
+@pytest.fixture
+def manager(db_path):
+    manager = ConnectionManager(db_path, pragmas=WAL)
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def db(manager):
+    db = LightDB(manager, cache_size=128)
+    yield db
+    db.stop_sweeper()
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    """Point config/db.yaml at a database in tmp_path (an absolute DATABASE_LOCATION); call it to set more keys."""
+    import yaml
+    from lightdb import dbconnect
+
+    path = tmp_path / 'db.yaml'
+    settings = {'DATABASE_LOCATION': str(tmp_path / 'configured.sqlite'), 'JOURNAL_MODE': 'WAL'}
+
+    def write(**extra):
+        settings.update(extra)
+        path.write_text(yaml.safe_dump(settings))
+        return settings
+
+    write()
+    monkeypatch.setattr(dbconnect, 'CONFIG_PATH', str(path))
+    return write
@@ -0,0 +1,92 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+from lightdb import AsyncLightDB, AsyncTable, LightDB, dbconnect
+from lightdb.aio import AsyncExecutor, _aiter_batches
+from lightdb.dbconnect import Connection
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_async_lightdb(manager):
+    async def main():
+        db = await AsyncLightDB.open(manager, max_pending=4)
+        await db.set('a', [1, 2])
+        assert await db.get('a') == [1, 2]
+        assert await db.contains('a') and await db.count() == 1
+        files = await db.collection('files')
+        await files.update({f'k{i}': {'owner': f'u{i % 3}'} for i in range(1200)})
+        assert await files.count() == 1200 and await files.count(owner='u1') == 400
+        assert len([key async for key in files]) == 1200
+        results = await asyncio.gather(*[db.get('a') for _ in range(100)])
+        assert results == [[1, 2]] * 100
+        await db.close()
+
+    run(main())
+
+
+def test_close_leaves_a_shared_manager_open(manager):
+    async def main():
+        db = await AsyncLightDB.open(manager)
+        await db.set('a', 1)
+        await db.close()
+
+    run(main())
+    db = LightDB(manager)
+    db['b'] = 2
+    assert db['a'] == 1 and db['b'] == 2
+
+
+def test_default_uses_the_shared_manager(config):
+    config()
+
+    async def main():
+        db = await AsyncLightDB.open()
+        assert db.db._manager is dbconnect.get_manager()
+        await db.set('a', 1)
+        await db.close()
+
+    run(main())
+    assert LightDB()['a'] == 1
+
+
+def test_iterators_stay_on_one_thread():
+    threads = set()
+
+    def numbers():
+        for i in range(2000):
+            threads.add(threading.get_ident())
+            yield i
+
+    async def collect(executor):
+        return [item async for item in _aiter_batches(executor, numbers, batch_size=100)]
+
+    async def main():
+        executor = AsyncExecutor(max_workers=4)
+        busy = [executor.run(time.sleep, 0.002) for _ in range(40)]
+        items, *_ = await asyncio.gather(collect(executor), *busy)
+        executor.shutdown()
+        return items
+
+    assert run(main()) == list(range(2000))
+    assert len(threads) == 1
+
+
+def test_async_table(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 't.sqlite'), check_same_thread=False, factory=Connection)
+
+    async def main():
+        table = await AsyncTable.open('users', {'id': 'INTEGER PRIMARY KEY', 'name': 'TEXT'}, conn)
+        assert await table.insert_many([{'id': i, 'name': f'n{i}'} for i in range(2500)]) == 2500
+        rows = [row async for row in table.iter_find(order_by='id', batch_size=1000)]
+        assert len(rows) == 2500 and rows[-1] == {'id': 2499, 'name': 'n2499'}
+        assert await table.find_one(id=5) == {'id': 5, 'name': 'n5'}
+        await table.close()
+
+    run(main())
+    assert conn.execute('SELECT COUNT(*) FROM users').fetchone()[0] == 2500
+    conn.close()
@@ -0,0 +1,196 @@
+import io
+import os
+import sys
+
+import pytest
+import yaml
+
+pytest.importorskip('flask')
+pytest.importorskip('bcrypt')
+pytest.importorskip('requests')
+
+from lightdb import dbconnect  # noqa: E402
+
+CONTENT = b'0123456789' * 100
+
+
+@pytest.fixture(scope='module')
+def adrive(tmp_path_factory):
+    """The app module, running against a fresh database and upload directory."""
+    root = tmp_path_factory.mktemp('adrive')
+    (root / 'uploads').mkdir()
+    config = root / 'db.yaml'
+    config.write_text(yaml.safe_dump({'DATABASE_LOCATION': str(root / 'db.sqlite'), 'JOURNAL_MODE': 'WAL'}))
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(dbconnect, 'CONFIG_PATH', str(config))
+        monkeypatch.chdir(root)
+        for name in ('app', 'tools.auth', 'tools.chunked', 'tools.db_auth'):
+            sys.modules.pop(name, None)
+        import app as module
+        module.app.config['TESTING'] = True
+        module.l_db['users'] = [{'username': 'ann', 'quota_gb': 1}]
+        yield module
+        module.l_db.stop_sweeper()
+
+
+@pytest.fixture
+def client(adrive):
+    return adrive.app.test_client()
+
+
+def log_in(client, username='ann'):
+    with client.session_transaction() as session:
+        session['loggedIn'] = True
+        session['username'] = username
+
+
+def flashed(client):
+    with client.session_transaction() as session:
+        return [message for _, message in session.pop('_flashes', [])]
+
+
+def upload(client, content=CONTENT, reusable=True):
+    data = {'file': (io.BytesIO(content), 'report.txt')}
+    if reusable:
+        data['reusable'] = '1'
+    client.post('/sendfile', data=data, content_type='multipart/form-data')
+    return flashed(client)[-1].rsplit(' ', 1)[-1]
+
+
+def stored_path(adrive, code):
+    return os.path.join(adrive.app.config['UPLOAD_DIRECTORY'], adrive.codes.lookup(adrive.l_db, code))
+
+
+# Streamed uploads (user-023)
+
+def test_upload_streams_into_the_upload_directory(adrive, client):
+    code = upload(client)
+    with open(stored_path(adrive, code), 'rb') as f:
+        assert f.read() == CONTENT
+    assert not [name for name in os.listdir('uploads') if name.startswith('.upload-')]
+
+
+def test_upload_over_quota_is_refused(adrive, client):
+    adrive.l_db['users'] = [{'username': 'ann', 'quota_gb': 1}, {'username': 'tiny', 'quota_gb': 0.0000001}]
+    log_in(client, 'tiny')
+    client.post('/sendfile', data={'file': (io.BytesIO(CONTENT * 10), 'big.bin')},
+                content_type='multipart/form-data')
+    assert flashed(client) == ['This file is larger than your remaining quota.']
+    assert adrive.usage.get_usage(adrive.l_db, 'tiny')['files'] == 0
+
+
+# Conditional downloads (user-025)
+
+def test_reusable_download_supports_etags_and_ranges(client):
+    code = upload(client)
+    response = client.get(f'/download/{code}')
+    assert response.status_code == 200 and response.data == CONTENT
+    etag = response.headers['ETag']
+    assert client.get(f'/download/{code}', headers={'If-None-Match': etag}).status_code == 304
+    partial = client.get(f'/download/{code}', headers={'Range': 'bytes=10-19'})
+    assert partial.status_code == 206 and partial.data == CONTENT[10:20]
+
+
+def test_one_time_download_is_deleted_once_sent(adrive, client):
+    code = upload(client, reusable=False)
+    path = stored_path(adrive, code)
+    response = client.get(f'/download/{code}')
+    assert response.status_code == 200 and response.data == CONTENT
+    response.close()
+    assert not os.path.exists(path)
+    assert client.get(f'/download/{code}').status_code == 302
+
+
+def test_one_time_code_survives_a_failed_send(adrive, client, monkeypatch):
+    code = upload(client, reusable=False)
+
+    def broken_send_file(*args, **kwargs):
+        raise OSError('disk went away')
+
+    monkeypatch.setattr(adrive, 'send_file', broken_send_file)
+    assert client.get(f'/download/{code}').status_code == 302
+    monkeypatch.undo()
+    response = client.get(f'/download/{code}')
+    assert response.status_code == 200 and response.data == CONTENT
+    assert response.headers['Content-Length'] == str(len(CONTENT))
+    response.close()
+
+
+def test_one_time_code_is_kept_when_the_file_is_missing(adrive, client):
+    code = upload(client, reusable=False)
+    os.remove(stored_path(adrive, code))
+    assert client.get(f'/download/{code}').status_code == 302
+    assert adrive.codes.lookup(adrive.l_db, code) is not None
+
+
+# Chunked uploads (user-024)
+
+def create_session(client, content, **extra):
+    response = client.post('/upload/sessions', json=dict({'filename': 'big.bin', 'size': len(content)}, **extra))
+    return response
+
+
+def put_chunks(client, session, content, order=None):
+    size = session['chunk_size']
+    for index in order or range(session['chunks']):
+        response = client.put(f"/upload/sessions/{session['id']}/chunks/{index}",
+                              data=content[index * size:(index + 1) * size])
+        assert response.status_code == 200
+
+
+def test_chunked_upload_in_any_order(adrive, client, monkeypatch):
+    import tools.chunked
+    monkeypatch.setattr(tools.chunked, 'CHUNK_SIZE', 300)
+    response = create_session(client, CONTENT, reusable=True)
+    assert response.status_code == 201
+    session = response.get_json()
+    assert session['chunks'] == 4
+    put_chunks(client, session, CONTENT, order=[3, 1, 0])
+    status = client.get(f"/upload/sessions/{session['id']}").get_json()
+    assert status['received'] == [0, 1, 3]
+    assert client.post(f"/upload/sessions/{session['id']}/finish").status_code == 409
+    put_chunks(client, session, CONTENT, order=[2])
+    assert client.post(f"/upload/sessions/{session['id']}/finish").status_code == 302
+    code = flashed(client)[-1].rsplit(' ', 1)[-1]
+    with open(stored_path(adrive, code), 'rb') as f:
+        assert f.read() == CONTENT
+    assert client.get(f"/upload/sessions/{session['id']}").status_code == 404
+
+
+def test_chunk_with_the_wrong_length_is_rejected(client):
+    session = create_session(client, CONTENT).get_json()
+    response = client.put(f"/upload/sessions/{session['id']}/chunks/0", data=b'short')
+    assert response.status_code == 400
+
+
+def test_finish_rejects_a_file_that_no_longer_fits_the_quota(adrive, client):
+    adrive.l_db['users'] = [{'username': 'ann', 'quota_gb': 1}, {'username': 'bob', 'quota_gb': 1}]
+    log_in(client, 'bob')
+    session = create_session(client, CONTENT).get_json()
+    put_chunks(client, session, CONTENT)
+    adrive.l_db.set_path('users', '$[1].quota_gb', 0.0000001)
+    response = client.post(f"/upload/sessions/{session['id']}/finish")
+    assert response.status_code == 413
+    assert adrive.usage.get_usage(adrive.l_db, 'bob')['files'] == 0
+    assert not os.path.exists(os.path.join('uploads', f".chunked-{session['id']}.part"))
+    assert client.get(f"/upload/sessions/{session['id']}").status_code == 404
+
+
+def test_open_sessions_are_capped_per_address(client, monkeypatch):
+    import tools.chunked
+    monkeypatch.setattr(tools.chunked, 'MAX_SESSIONS', 2)
+    monkeypatch.setattr(tools.chunked, 'MAX_RESERVED_BYTES', 2500)
+    post = lambda size, addr: client.post('/upload/sessions', json={'filename': 'a', 'size': size},
+                                          environ_base={'REMOTE_ADDR': addr})
+    assert post(1000, '10.0.0.1').status_code == 201
+    assert post(2000, '10.0.0.1').status_code == 413
+    assert post(1000, '10.0.0.1').status_code == 201
+    assert post(10, '10.0.0.1').status_code == 429
+    assert post(1000, '10.0.0.2').status_code == 201
+
+
+def test_chunk_for_a_swept_session_is_not_found(client):
+    session = create_session(client, CONTENT).get_json()
+    os.remove(os.path.join('uploads', f".chunked-{session['id']}.part"))
+    response = client.put(f"/upload/sessions/{session['id']}/chunks/0", data=CONTENT)
+    assert response.status_code == 404
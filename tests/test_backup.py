@@ -0,0 +1,68 @@
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from lightdb import LightDB, ShardedLightDB
+from lightdb.backup import restore_database
+from lightdb.dbconnect import ConnectionManager
+
+
+def count_items(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute('SELECT COUNT(*) FROM keyvalue_items').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_backup_while_writing(db, tmp_path):
+    files = db.create_collection('files')
+    files.update({f'k{i}': {'x': 'y' * 200} for i in range(3000)})
+    stop = threading.Event()
+
+    def write():
+        i = 0
+        while not stop.is_set():
+            files[f'n{i}'] = {'x': 1}
+            i += 1
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    steps = []
+    try:
+        path = db.backup(str(tmp_path / 'snapshot.sqlite'), pages_per_step=20,
+                         progress=lambda done, total: steps.append((done, total)))
+    finally:
+        stop.set()
+        writer.join()
+    assert len(steps) > 1 and steps[-1][0] == steps[-1][1]
+    assert count_items(path) >= 3000
+
+
+def test_directory_snapshots_are_unique_rotated_and_restorable(db, tmp_path):
+    db.create_collection('files').update({'a': 1, 'b': 2})
+    directory = str(tmp_path / 'backups') + os.sep
+    paths = [db.backup(directory, compress=True, keep=2) for _ in range(3)]
+    assert len(set(paths)) == 3
+    assert sorted(os.listdir(directory)) == sorted(os.path.basename(path) for path in paths[1:])
+    restored = restore_database(paths[-1], str(tmp_path / 'restored.sqlite'))
+    assert count_items(restored) == 2
+
+
+def test_backup_refuses_inside_a_batch(db, tmp_path):
+    with db.batch():
+        with pytest.raises(RuntimeError):
+            db.backup(str(tmp_path / 'x.sqlite'))
+
+
+def test_sharded_backup_copies_every_shard(tmp_path):
+    sharded = ShardedLightDB(paths=[str(tmp_path / f'db.shard{i}.sqlite') for i in range(3)])
+    sharded.create_collection('files').update({f'k{i}': i for i in range(60)})
+    paths = sharded.backup(str(tmp_path / 'backups'))
+    assert len(paths) == 3
+    assert len({os.path.basename(path).split('-', 1)[1] for path in paths}) == 1
+    assert sum(count_items(path) for path in paths) == 60
+    restored = LightDB(ConnectionManager(restore_database(paths[0], str(tmp_path / 'r.sqlite'))))
+    assert len(restored.create_collection('files')) == len(sharded['files']._parts[0])
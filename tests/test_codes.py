@@ -0,0 +1,57 @@
+import threading
+
+import pytest
+
+from tools import codes
+
+
+@pytest.fixture
+def files(db):
+    files = db.create_collection('files')
+    codes.open_codes(db)
+    return files
+
+
+def test_open_codes_indexes_existing_files(db):
+    db.create_collection('files')['old.txt_123456'] = {'reusable': True}
+    codes.open_codes(db)
+    assert codes.lookup(db, '123456') == 'old.txt_123456'
+
+
+def test_reserve_add_and_lookup(db, files):
+    code, key = codes.reserve_code(db, 'a.txt')
+    assert key == f'a.txt_{code}'
+    codes.add_file(db, code, key, {'reusable': True})
+    assert codes.lookup(db, code) == key and files[key] == {'reusable': True}
+
+
+def test_released_and_stale_codes_resolve_to_nothing(db, files):
+    code, _ = codes.reserve_code(db, 'b')
+    codes.release_code(db, code)
+    assert codes.lookup(db, code) is None
+    db['codes']['999999'] = 'gone_999999'
+    assert codes.lookup(db, '999999') is None
+    assert '999999' not in db['codes']
+
+
+def test_only_one_caller_takes_a_one_time_file(db, files):
+    code, key = codes.reserve_code(db, 'once')
+    codes.add_file(db, code, key, {'reusable': False})
+    taken = []
+    threads = [threading.Thread(target=lambda: taken.append(codes.take_file(db, code))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [result for result in taken if result is not None] == [(key, {'reusable': False})]
+    assert codes.lookup(db, code) is None and key not in files
+
+
+def test_remove_files(db, files):
+    keys = []
+    for name in ('a', 'b'):
+        code, key = codes.reserve_code(db, name)
+        codes.add_file(db, code, key, {})
+        keys.append(key)
+    codes.remove_files(db, keys)
+    assert len(db['codes']) == 0 and len(files) == 0
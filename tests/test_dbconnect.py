@@ -0,0 +1,89 @@
+import sqlite3
+import threading
+import time
+
+from lightdb import LightDB
+from lightdb.dbconnect import ConnectionManager, get_manager
+
+
+def test_threads_get_their_own_readers(manager):
+    mine = manager.reader()
+    assert manager.reader() is mine
+    readers = []
+    thread = threading.Thread(target=lambda: readers.append(manager.reader()))
+    thread.start()
+    thread.join()
+    assert readers[0] is not mine
+
+
+def test_writer_holder_reads_through_the_writer(manager):
+    with manager.writer() as conn:
+        assert manager.holds_writer()
+        assert manager.reader() is conn
+    assert not manager.holds_writer()
+
+
+def test_get_manager_is_shared_per_path(config, tmp_path):
+    path = str(tmp_path / 'other.sqlite')
+    assert get_manager() is get_manager()
+    assert get_manager(path) is get_manager(path)
+    assert get_manager(path) is not get_manager()
+
+
+# Group commit (user-019)
+
+def test_group_commit_waits_for_durable_writes(manager, db_path):
+    manager.enable_group_commit(interval=0.01, max_ops=50)
+    db = LightDB(manager)
+    db['a'] = 1
+    other = sqlite3.connect(db_path)
+    assert other.execute("SELECT COUNT(*) FROM keyvalue WHERE key = 'a'").fetchone()[0] == 1
+    other.close()
+
+
+def test_deferred_writes_commit_in_the_background(manager, db_path):
+    manager.enable_group_commit(interval=0.01, max_ops=50)
+    db = LightDB(manager)
+    with db.deferred():
+        db['b'] = 2
+    assert manager.uncommitted == 1
+    deadline = time.time() + 2
+    while manager.uncommitted and time.time() < deadline:
+        time.sleep(0.005)
+    assert manager.uncommitted == 0
+    other = sqlite3.connect(db_path)
+    assert other.execute("SELECT COUNT(*) FROM keyvalue WHERE key = 'b'").fetchone()[0] == 1
+    other.close()
+
+
+def test_failed_write_only_undoes_itself(manager):
+    manager.enable_group_commit(interval=0.5, max_ops=1000)
+    db = LightDB(manager)
+    with db.deferred():
+        db['kept'] = 1
+        try:
+            with db.batch():
+                db['dropped'] = 2
+                raise RuntimeError
+        except RuntimeError:
+            pass
+    db.flush()
+    assert 'kept' in db and 'dropped' not in db
+
+
+def test_group_commit_under_concurrency(manager):
+    manager.enable_group_commit(interval=0.005, max_ops=20)
+    db = LightDB(manager)
+
+    def work(i):
+        for j in range(50):
+            db[f'k{i}_{j}'] = j
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(db.keys()) == 300
+    manager.disable_group_commit()
+    assert not manager.group_commit
@@ -0,0 +1,299 @@
+import threading
+import time
+
+import pytest
+
+from lightdb import Collection, LightDB, VersionConflict
+from lightdb.dbconnect import ConnectionManager
+
+from .conftest import WAL
+
+
+def expire(seconds=0.05):
+    time.sleep(seconds + 0.02)
+
+
+# Key-value basics and auto-saving proxies
+
+def test_set_get_delete(db):
+    db['a'] = 1
+    db['b'] = {'x': [1, 2]}
+    assert db['a'] == 1 and db['b'] == {'x': [1, 2]}
+    assert 'a' in db and len(db) == 2
+    del db['a']
+    assert 'a' not in db
+    with pytest.raises(KeyError):
+        db['a']
+    assert db.get('a', 'default') == 'default'
+
+
+def test_proxies_save_changes(db):
+    db['users'] = []
+    db['users'].append({'username': 'a'})
+    db['settings'] = {}
+    db['settings']['theme'] = 'dark'
+    assert db['users'] == [{'username': 'a'}]
+    assert db['settings'] == {'theme': 'dark'}
+
+
+# Collections (user-001)
+
+def test_create_collection_moves_an_existing_dict(db):
+    db['files'] = {'a_1': {'owner': 'x'}, 'b_2': {'owner': 'y'}}
+    files = db.create_collection('files')
+    assert isinstance(files, Collection)
+    assert dict(files.items()) == {'a_1': {'owner': 'x'}, 'b_2': {'owner': 'y'}}
+    assert isinstance(db['files'], Collection)
+    assert 'files' in db.collections()
+
+
+def test_collection_entries_are_rows(db):
+    files = db.create_collection('files')
+    files['a'] = {'n': 1}
+    files.update({'b': {'n': 2}, 'c': {'n': 3}})
+    assert len(files) == 3 and 'b' in files
+    assert files.pop('b') == {'n': 2}
+    assert sorted(files.keys()) == ['a', 'c']
+    db['files'] = {'only': 1}
+    assert dict(db['files'].items()) == {'only': 1}
+    db.drop_collection('files')
+    assert 'files' not in db
+
+
+# Batches (user-002)
+
+def test_batch_commits_together(db):
+    files = db.create_collection('files')
+    with db.batch():
+        files['a'] = 1
+        db['users'] = []
+        db['users'].append('x')
+        assert files['a'] == 1 and db['users'] == ['x']
+    assert files['a'] == 1 and db['users'] == ['x']
+
+
+def test_batch_rolls_back_on_error(db):
+    files = db.create_collection('files')
+    db['users'] = ['a']
+    with pytest.raises(RuntimeError):
+        with db.batch():
+            files['b'] = 1
+            db['users'].append('b')
+            raise RuntimeError
+    assert 'b' not in files
+    assert db['users'] == ['a']
+
+
+# Read cache (user-004)
+
+def test_cache_hits_and_invalidation(db):
+    db['k'] = {'v': 1}
+    db['k']
+    db['k']
+    assert db.cache_info().hits >= 1
+    db['k'] = {'v': 2}
+    assert db['k'] == {'v': 2}
+
+
+def test_cached_values_are_copies(db):
+    db['k'] = {'v': [1]}
+    first = dict(db['k'])
+    first['v'].append(2)
+    assert db['k'] == {'v': [1]}
+
+
+def test_cache_sees_writes_from_other_connections(db_path, db):
+    db['k'] = 1
+    assert db['k'] == 1
+    other = LightDB(ConnectionManager(db_path, pragmas=WAL))
+    other['k'] = 2
+    assert db['k'] == 2
+    other._manager.close()
+
+
+def test_cache_never_serves_uncommitted_batch_values(db):
+    files = db.create_collection('files')
+    files['k'] = {'v': 0}
+    db['k'] = {'v': 0}
+    inside, done = threading.Event(), threading.Event()
+
+    def writer():
+        with pytest.raises(RuntimeError):
+            with db.batch():
+                files['k'] = {'v': 1}
+                db['k'] = {'v': 1}
+                assert files['k'] == {'v': 1} and db['k'] == {'v': 1}
+                inside.set()
+                done.wait()
+                raise RuntimeError
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    inside.wait()
+    seen = []
+    reader = threading.Thread(target=lambda: seen.extend([files['k'], dict(db['k'])]))
+    reader.start()
+    reader.join()
+    done.set()
+    thread.join()
+    assert seen == [{'v': 0}, {'v': 0}]
+    assert files['k'] == {'v': 0} and db['k'] == {'v': 0}
+
+
+# Concurrent writers through one manager (user-005)
+
+def test_concurrent_proxy_appends_are_not_lost(db):
+    db['items'] = []
+
+    def work(i):
+        for j in range(25):
+            db['items'].append(f'{i}-{j}')
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(db['items']) == 150
+
+
+# Indexed queries (user-006)
+
+def test_collection_find_and_count(db):
+    files = db.create_collection('files')
+    files.create_index('owner')
+    files.update({f'k{i}': {'owner': f'u{i % 3}', 'size': i} for i in range(30)})
+    assert files.count(owner='u1') == 10
+    assert set(files.find(owner='u2')) == {f'k{i}' for i in range(2, 30, 3)}
+
+
+# Bulk operations (user-016)
+
+def test_get_set_delete_many(db):
+    assert db.set_many({'a': 1, 'b': 2}) == {'a': True, 'b': True}
+    assert db.get_many(['a', 'b', 'c'], default=0) == {'a': 1, 'b': 2, 'c': 0}
+    assert db.delete_many(['a', 'c']) == {'a': True, 'c': False}
+    files = db.create_collection('files')
+    files.set_many({f'k{i}': i for i in range(2000)})
+    assert len(files.get_many([f'k{i}' for i in range(2000)])) == 2000
+    files.delete_many([f'k{i}' for i in range(1000)])
+    assert len(files) == 1000
+
+
+# Streaming iteration and key ranges (user-017)
+
+def test_scan_prefix_and_range(db):
+    files = db.create_collection('files')
+    files.update({'a1': 1, 'a2': 2, 'b1': 3, 'c1': 4})
+    assert [key for key, _ in files.scan(prefix='a')] == ['a1', 'a2']
+    assert [key for key, _ in files.scan(start='a2', end='c1')] == ['a2', 'b1']
+    assert list(files.scan(limit=1)) == [('a1', 1)]
+    assert sorted(files.iterkeys(batch_size=2)) == ['a1', 'a2', 'b1', 'c1']
+
+
+# JSON paths (user-018)
+
+def test_json_paths(db):
+    db['users'] = [{'username': 'a', 'quota_gb': 1}, {'username': 'b', 'quota_gb': 2}]
+    index = db.index_of('users', 'username', 'b')
+    assert index == 1
+    assert db.get_path('users', f'$[{index}].quota_gb') == 2
+    db.set_path('users', '$[1].quota_gb', 5)
+    db.append_path('users', '$', {'username': 'c'})
+    db.remove_path('users', '$[0]')
+    assert db['users'] == [{'username': 'b', 'quota_gb': 5}, {'username': 'c'}]
+    assert db.get_path('users', '$[9].quota_gb', 'missing') == 'missing'
+
+
+# TTLs and the sweeper (user-015)
+
+def test_ttl_hides_and_sweeps_expired_keys(db):
+    files = db.create_collection('files')
+    db.set('k', 1, ttl=0.05)
+    files.set('e', {'n': 1}, ttl=0.05)
+    assert db['k'] == 1 and files['e'] == {'n': 1}
+    expire()
+    assert 'k' not in db and files.get('e') is None and len(files) == 0
+    expired = []
+    assert db.sweep_expired(on_expire=lambda *row: expired.append(row)) == 2
+    assert sorted(expired, key=str) == sorted([(None, 'k', 1), ('files', 'e', {'n': 1})], key=str)
+
+
+def test_setting_without_ttl_clears_the_expiry(db):
+    db.set('k', 1, ttl=0.05)
+    db['k'] = 2
+    expire()
+    assert db['k'] == 2
+
+
+def test_collection_cannot_expire(db):
+    db.create_collection('files')
+    with pytest.raises(TypeError):
+        db.set('files', {}, ttl=10)
+
+
+# Versions and compare-and-set (user-020)
+
+def test_versions_and_compare_and_set(db):
+    db['x'] = 1
+    assert db.get_versioned('x') == (1, 1)
+    db['x'] = 2
+    assert db.get_versioned('x') == (2, 2)
+    assert db.compare_and_set('x', 2, 3)
+    assert not db.compare_and_set('x', 2, 4)
+    assert db['x'] == 3
+    assert db.compare_and_set('new', 0, 'a')
+    assert not db.compare_and_set('new', 0, 'b')
+
+
+def test_atomic_update_under_contention(db):
+    db['counter'] = 0
+
+    def work():
+        for _ in range(30):
+            db.atomic_update('counter', lambda n: n + 1, retries=1000)
+
+    threads = [threading.Thread(target=work) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert db['counter'] == 150
+    assert db.atomic_update('missing', lambda n: n + 1, default=0) == 1
+
+
+def test_stale_proxies_replay_their_changes(db):
+    db['files'] = {}
+    first, second = db['files'], db['files']
+    first['one'] = 1
+    second['two'] = 2
+    assert db['files'] == {'one': 1, 'two': 2}
+
+    db['list'] = [1, 2]
+    first, second = db['list'], db['list']
+    first.remove(2)
+    with pytest.raises(VersionConflict):
+        second.remove(2)
+
+
+def test_collection_compare_and_set(db):
+    files = db.create_collection('files')
+    files['a'] = {'n': 1}
+    assert files.get_versioned('a') == ({'n': 1}, 1)
+    assert files.compare_and_set('a', 1, {'n': 2})
+    assert not files.compare_and_set('a', 1, {'n': 3})
+    files.atomic_update('a', lambda entry: {'n': entry['n'] + 1})
+    assert files['a'] == {'n': 3}
+
+
+def test_compare_and_set_takes_over_an_expired_key(db):
+    files = db.create_collection('files')
+    db.set('k', 'old', ttl=0.05)
+    files.set('e', 'old', ttl=0.05)
+    expire()
+    assert db.compare_and_set('k', 0, 'new')
+    assert files.compare_and_set('e', 0, 'new')
+    assert db.get('k') == 'new' and files.get('e') == 'new'
+    assert db.atomic_update('k', lambda value: value + '!', default='') == 'new!'
+    assert db.sweep_expired() == 0
+    assert db['k'] == 'new!' and files['e'] == 'new'
@@ -0,0 +1,85 @@
+import sqlite3
+
+import pytest
+
+from lightdb import Table, any_of, col
+
+SCHEMA = {'id': 'INTEGER PRIMARY KEY', 'owner': 'TEXT NOT NULL', 'size': 'REAL'}
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def table(conn):
+    table = Table('files', SCHEMA, connection=conn)
+    table.insert_many(({'id': i, 'owner': f'u{i % 3}', 'size': i} for i in range(10)), chunk_size=3)
+    return table
+
+
+# Bulk insert and upsert (user-007)
+
+def test_insert_many_and_conflicts(table):
+    assert table.count() == 10
+    assert table.insert_many([{'id': 1, 'owner': 'zz'}], on_conflict='ignore') == 1
+    assert table.find_one(id=1)['owner'] == 'u1'
+    table.upsert({'id': 1, 'owner': 'new'})
+    assert table.find_one(id=1) == {'id': 1, 'owner': 'new', 'size': 1}
+    assert table.upsert_many([{'id': 2, 'owner': 'x'}, {'id': 50, 'owner': 'y'}]) == 2
+    assert table.count() == 11
+
+
+def test_failed_chunk_is_rolled_back(table):
+    with pytest.raises(sqlite3.IntegrityError):
+        table.insert_many([{'id': 200, 'owner': 'a'}, {'id': 200, 'owner': 'b'}])
+    assert table.count(id=200) == 0
+
+
+# Projection, ordering and paging (user-008)
+
+def test_find_columns_order_and_paging(table):
+    assert table.find(columns=['id'], order_by='-id', limit=3) == [{'id': 9}, {'id': 8}, {'id': 7}]
+    assert table.find(columns=['id'], order_by='id', limit=2, after={'id': 5}) == [{'id': 6}, {'id': 7}]
+    assert table.find(columns=['id'], order_by='id', limit=2, offset=8) == [{'id': 8}, {'id': 9}]
+    assert [row['id'] for row in table.iter_find(order_by='id', batch_size=2, limit=4)] == [0, 1, 2, 3]
+
+
+def test_rejects_injection_in_names(table):
+    with pytest.raises(ValueError):
+        table.find(order_by='id; DROP TABLE files')
+    with pytest.raises(ValueError):
+        table.find(**{'id OR 1=1': 1})
+
+
+# Predicates and indexes (user-009)
+
+def test_predicates(table):
+    assert table.count(any_of(col('owner').in_(['u0', 'u1']), col('size') > 8)) == 7
+    assert [row['id'] for row in table.find(col('owner').startswith('u'), order_by='id', limit=2)] == [0, 1]
+    assert table.update(col('id') < 3, {'size': None}) == 3
+    assert table.count(col('size').is_null()) == 3
+    assert table.delete(col('id').between(0, 1)) == 2
+
+
+def test_indexes(table):
+    name = table.create_index('owner')
+    assert name in table.indexes()
+    assert any('INDEX' in line for line in table.explain(owner='u1'))
+    table.drop_index('owner')
+    assert name not in table.indexes()
+
+
+# Opening existing tables in place (user-010)
+
+def test_reopening_keeps_rows_and_adds_columns(conn, table):
+    reopened = Table('files', dict(SCHEMA, extra='TEXT'), connection=conn)
+    assert reopened.count() == 10
+    assert 'extra' in reopened.columns()
+
+
+def test_recreate_drops_rows(conn, table):
+    assert Table('files', SCHEMA, connection=conn, recreate=True).count() == 0
@@ -0,0 +1,112 @@
+import sqlite3
+import time
+
+import pytest
+
+from lightdb import LightDB
+from lightdb.dbconnect import ConnectionManager
+from lightdb.lightdb import ChangeLogGap
+from lightdb.replica import Follower
+
+from .conftest import WAL
+
+
+@pytest.fixture
+def primary(tmp_path):
+    db = LightDB(ConnectionManager(str(tmp_path / 'primary.sqlite'), pragmas=WAL), changelog=True)
+    yield db
+    db._manager.close()
+
+
+def wait_for(follower, primary, timeout=5):
+    deadline = time.time() + timeout
+    while follower.position < primary.last_change_seq():
+        assert time.time() < deadline, 'follower fell behind'
+        time.sleep(0.002)
+
+
+def test_change_log_records_writes(primary):
+    primary['users'] = []
+    files = primary.create_collection('files')
+    with primary.batch():
+        files['a'] = 1
+        files.pop('a')
+    assert [(change.op, change.collection, change.key) for change in primary.changes_since(0)] == [
+        ('set', None, 'users'), ('create', 'files', None), ('set', 'files', 'a'), ('delete', 'files', 'a'),
+    ]
+
+
+def test_follower_seeds_and_follows(primary, tmp_path):
+    primary['users'] = [{'u': 'a'}]
+    files = primary.create_collection('files')
+    files['a'] = {'owner': 'x'}
+    follower = Follower(primary, str(tmp_path / 'replica' / 'db.sqlite'))
+    assert follower.db['users'] == [{'u': 'a'}]
+    follower.start()
+    try:
+        for i in range(50):
+            files[f'k{i}'] = {'owner': 'z'}
+        del primary['users']
+        primary['n'] = 1
+        wait_for(follower, primary)
+    finally:
+        follower.stop()
+    assert len(follower.db['files']) == 51
+    assert 'users' not in follower.db and follower.db['n'] == 1
+    follower.close()
+
+
+def test_follower_keeps_expiry_and_versions(primary, tmp_path):
+    follower = Follower(primary, str(tmp_path / 'replica.sqlite'))
+    files = primary.create_collection('files')
+    primary.set('session', {'u': 'a'}, ttl=0.05)
+    files.set('e', 1, ttl=0.05)
+    primary['n'] = 1
+    primary['n'] = 2
+    assert primary.compare_and_set('n', 2, 3)
+    follower.sync()
+    assert follower.db.get_versioned('n') == primary.get_versioned('n') == (3, 3)
+    assert follower.db['session'] == {'u': 'a'}
+    time.sleep(0.07)
+    assert 'session' not in follower.db and follower.db['files'].get('e') is None
+    assert primary.sweep_expired() == 2
+    follower.sync()
+    assert follower.db.sweep_expired() == 0
+    assert follower.db.get_versioned('n') == (3, 3)
+    follower.close()
+
+
+def test_old_change_log_gains_expiry_and_version(tmp_path):
+    path = str(tmp_path / 'old.sqlite')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE keyvalue_changes (seq INTEGER PRIMARY KEY AUTOINCREMENT, op TEXT NOT NULL, '
+                 'collection TEXT, key TEXT, value, timestamp REAL NOT NULL)')
+    conn.execute("INSERT INTO keyvalue_changes (op, key, value, timestamp) VALUES ('set', 'old', '1', 0)")
+    conn.commit()
+    conn.close()
+    db = LightDB(ConnectionManager(path, pragmas=WAL), changelog=True)
+    db.set('new', 2, ttl=60)
+    old, new = db.changes_since(0)
+    assert (old.value, old.version, old.expires_at) == (1, None, None)
+    assert new.value == 2 and new.version == 1 and new.expires_at > time.time()
+    db._manager.close()
+
+
+def test_compaction_and_resync(primary, tmp_path):
+    for i in range(20):
+        primary[f'k{i}'] = i
+    assert primary.compact_changes(keep=5) == 15
+    with pytest.raises(ChangeLogGap):
+        list(primary.changes_since(0))
+    follower = Follower(primary, str(tmp_path / 'replica.sqlite'))
+    primary['after'] = 1
+    with follower.db._write_cursor() as cursor:
+        cursor.execute(f'UPDATE {follower.state_table} SET seq = 1')
+    follower.sync()
+    assert follower.db['after'] == 1 and follower.position == primary.last_change_seq()
+    follower.close()
+
+
+def test_change_log_must_be_enabled(db):
+    with pytest.raises(ValueError):
+        db.last_change_seq()
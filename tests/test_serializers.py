@@ -0,0 +1,41 @@
+import math
+
+import pytest
+
+from lightdb import LightDB
+from lightdb.serializers import available_serializers, decode_value, get_serializer
+
+DOCUMENT = {'files': [{'name': 'a.txt', 'size': 1.5, 'reusable': True}], 'count': 2}
+
+
+@pytest.mark.parametrize('name', available_serializers())
+def test_round_trip(name):
+    serializer = get_serializer(name)
+    assert serializer.loads(serializer.dumps(DOCUMENT)) == DOCUMENT
+    assert decode_value(serializer.dumps(DOCUMENT)) == DOCUMENT
+
+
+def test_unknown_serializer():
+    with pytest.raises(ValueError):
+        get_serializer('pickle')
+
+
+@pytest.mark.parametrize('name', available_serializers())
+def test_values_stay_readable_across_serializers(manager, name):
+    LightDB(manager, serializer=name)['doc'] = DOCUMENT
+    for other in available_serializers():
+        assert LightDB(manager, serializer=other)['doc'] == DOCUMENT
+
+
+def test_json_is_the_default(manager):
+    assert get_serializer().name == 'json'
+    assert LightDB(manager).serializer.name == 'json'
+
+
+def test_default_keeps_values_orjson_cannot_represent(manager):
+    db = LightDB(manager)
+    db['doc'] = {'big': 2 ** 70, 'nan': float('nan')}
+    value = db['doc']
+    assert value['big'] == 2 ** 70 and math.isnan(value['nan'])
+    if 'orjson' in available_serializers():
+        assert math.isnan(LightDB(manager, serializer='orjson')['doc']['nan'])
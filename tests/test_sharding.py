@@ -0,0 +1,83 @@
+import threading
+
+import pytest
+
+from lightdb import LightDB, ShardedLightDB, open_database
+from lightdb.dbconnect import ConnectionManager
+
+
+@pytest.fixture
+def sharded(tmp_path):
+    db = ShardedLightDB(paths=[str(tmp_path / f'db.shard{i}.sqlite') for i in range(3)], cache_size=64)
+    yield db
+    db.close()
+
+
+def test_keys_are_spread_and_found(sharded):
+    sharded['users'] = [{'username': 'a'}]
+    sharded['users'].append({'username': 'b'})
+    assert sharded['users'] == [{'username': 'a'}, {'username': 'b'}]
+    files = sharded.create_collection('files')
+    files.create_index('owner')
+    files.update({f'k{i}': {'owner': f'u{i % 3}'} for i in range(300)})
+    assert len(files) == 300 and files.count(owner='u1') == 100
+    assert all(len(part) for part in files._parts)
+    assert sorted(sharded.keys()) == ['files', 'users']
+
+
+def test_assigning_a_collection_replaces_it_everywhere(sharded):
+    files = sharded.create_collection('files')
+    files.update({f'k{i}': i for i in range(30)})
+    sharded.set('files', {'only': 1})
+    assert len(sharded['files']) == 1
+    sharded['files'] = {'a': 1, 'b': 2}
+    assert dict(sharded['files'].items()) == {'a': 1, 'b': 2}
+    with pytest.raises(TypeError):
+        sharded.set('files', {}, ttl=10)
+
+
+def test_keys_values_and_items_are_lists(sharded):
+    sharded.update({'a': 1, 'b': 2, 'c': 3})
+    sharded.create_collection('files')['x'] = 1
+    for result in (sharded.keys(), sharded.values(), sharded.items(),
+                   sharded['files'].keys(), sharded['files'].values(), sharded['files'].items()):
+        assert isinstance(result, list)
+    assert sorted(sharded.keys()) == ['a', 'b', 'c', 'files']
+    assert sorted(pair for pair in sharded.items() if pair[0] != 'files') == [('a', 1), ('b', 2), ('c', 3)]
+    assert sorted(sharded.iterkeys(batch_size=1)) == sorted(sharded)
+
+
+def test_concurrent_writes(sharded):
+    files = sharded.create_collection('files')
+
+    def work(i):
+        for j in range(40):
+            files[f't{i}_{j}'] = {'owner': 'z'}
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert files.count(owner='z') == 240
+
+
+def test_import_from_lightdb(sharded, tmp_path):
+    source = LightDB(ConnectionManager(str(tmp_path / 'source.sqlite')))
+    source['a'] = 1
+    source.create_collection('c')['e'] = {'v': 1}
+    sharded.import_from(source)
+    assert sharded['a'] == 1 and sharded['c']['e'] == {'v': 1}
+
+
+def test_instances_share_one_manager_per_file(tmp_path):
+    paths = [str(tmp_path / f's{i}.sqlite') for i in range(2)]
+    first, second = ShardedLightDB(paths=paths), ShardedLightDB(paths=paths)
+    assert all(a._manager is b._manager for a, b in zip(first.shards, second.shards))
+
+
+def test_open_database_follows_config(config):
+    assert isinstance(open_database(), LightDB)
+    config(SHARDS=3)
+    db = open_database()
+    assert isinstance(db, ShardedLightDB) and len(db.shards) == 3
@@ -0,0 +1,28 @@
+import os
+import stat
+
+import pytest
+
+pytest.importorskip('flask')
+
+from tools.uploads import FILE_MODE, QuotaExceeded, UploadFile  # noqa: E402
+
+
+def test_commit_moves_the_upload_into_place(tmp_path):
+    upload = UploadFile(str(tmp_path), limit=10)
+    upload.write(b'12345')
+    upload.seek(0)
+    assert upload.read() == b'12345'
+    target = tmp_path / 'stored'
+    assert upload.commit(str(target)) == 5
+    assert target.read_bytes() == b'12345'
+    assert stat.S_IMODE(os.stat(target).st_mode) == FILE_MODE
+    assert os.listdir(tmp_path) == ['stored']
+
+
+def test_limit_stops_the_upload_and_close_cleans_up(tmp_path):
+    upload = UploadFile(str(tmp_path), limit=10)
+    with pytest.raises(QuotaExceeded):
+        upload.write(b'x' * 11)
+    upload.close()
+    assert os.listdir(tmp_path) == []
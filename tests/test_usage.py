@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+
+from tools import codes, usage
+
+
+@pytest.fixture
+def files(db):
+    files = db.create_collection('files')
+    files['old_111111'] = {'owner': 'bob', 'size_megabytes': 1.0}
+    codes.open_codes(db)
+    usage.open_usage(db)
+    return files
+
+
+def store(db, name, entry):
+    code, key = codes.reserve_code(db, name)
+    with db.batch():
+        codes.add_file(db, code, key, entry)
+        usage.add_file(db, key, entry)
+    return key
+
+
+def test_open_usage_builds_totals_from_files(db, files):
+    assert usage.get_usage(db, 'bob') == {'bytes': 1048576, 'files': 1, 'keys': ['old_111111']}
+    assert usage.usage_gb(db, 'nobody') == 0
+
+
+def test_concurrent_uploads_are_all_counted(db, files):
+    threads = [threading.Thread(target=store, args=(db, f'f{i}', {'owner': 'ann', 'size_bytes': 1000}))
+               for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    totals = usage.get_usage(db, 'ann')
+    assert totals['bytes'] == 20000 and totals['files'] == 20 and len(totals['keys']) == 20
+
+
+def test_remove_file_counts_once(db, files):
+    key = store(db, 'f', {'owner': 'ann', 'size_bytes': 1000})
+    entry = files[key]
+    usage.remove_file(db, key, entry)
+    usage.remove_file(db, key, entry)
+    assert usage.get_usage(db, 'ann') == {'bytes': 0, 'files': 0, 'keys': []}
+
+
+def test_quota(db, files):
+    db['users'] = [{'username': 'ann', 'quota_gb': 1}]
+    store(db, 'f', {'owner': 'ann', 'size_bytes': 1000})
+    assert usage.user_quota_gb(db, 'ann') == 1 and usage.user_quota_gb(db, 'nobody') == 0
+    assert usage.remaining_bytes(db, 'ann', 1) == 1024 ** 3 - 1000
+
+
+def test_reconcile_and_drop_user(db, files):
+    store(db, 'f', {'owner': 'ann', 'size_bytes': 1000})
+    db['usage']['ann'] = {'bytes': 0, 'files': 0, 'keys': []}
+    assert usage.reconcile(db)['ann']['files'] == 1
+    assert usage.get_usage(db, 'ann')['bytes'] == 1000
+    usage.drop_user(db, 'ann')
+    assert usage.get_usage(db, 'ann')['files'] == 0
@@ -8,11 +8,11 @@ from flask import (
     url_for
 )
 from tools.db_auth import *
-from lightdb import LightDB
+from lightdb import open_database
 
 auth_bp = Blueprint('auth', __name__)
 
-l_db = LightDB()
+l_db = open_database()
 
 @auth_bp.route('/logout')
 def logout():
@@ -0,0 +1,235 @@
+"""
+Chunked uploads - resumable uploads sent as numbered chunks, several at a time
+
+    POST /upload/sessions                     {"filename", "size", "reusable"} -> session
+    GET  /upload/sessions/<id>                which chunks the server already has
+    PUT  /upload/sessions/<id>/chunks/<n>     raw bytes of chunk n
+    POST /upload/sessions/<id>/finish         store the file and flash its code
+
+A session preallocates a hidden file in the upload directory and every chunk
+is written at its own offset, so chunks can arrive in any order, in parallel,
+and finishing is a rename. Sessions live in the 'uploads' collection and
+expire (with their partial file) SESSION_TTL seconds after they start.
+
+Preallocated space counts against the uploader before any chunk arrives:
+each user or anonymous address may keep MAX_SESSIONS sessions open, a user's
+open sessions must fit the remaining quota, and an anonymous address may
+reserve at most MAX_RESERVED_BYTES.
+"""
+
+import os
+import uuid
+
+from flask import (
+    Blueprint,
+    current_app,
+    flash,
+    jsonify,
+    request,
+    session,
+    url_for
+)
+from tools.utils import redirect
+from tools import codes, usage
+from werkzeug.utils import secure_filename
+from lightdb import open_database
+
+CHUNK_SIZE = int(os.environ.get('ADRIVE_CHUNK_SIZE', 8 * 1024 * 1024))
+PARALLEL_CHUNKS = int(os.environ.get('ADRIVE_PARALLEL_CHUNKS', 4))
+SESSION_TTL = float(os.environ.get('ADRIVE_UPLOAD_SESSION_TTL', 24 * 3600))
+MAX_SESSIONS = int(os.environ.get('ADRIVE_MAX_UPLOAD_SESSIONS', 16))
+MAX_RESERVED_BYTES = int(os.environ.get('ADRIVE_MAX_RESERVED_BYTES', 10 * 1024 ** 3))
+
+_COPY_SIZE = 1024 * 1024
+
+chunked_bp = Blueprint('chunked', __name__, url_prefix='/upload/sessions')
+
+l_db = open_database(cache_size=256)
+l_db.create_collection('uploads').create_index('client')
+
+
+def _temp_path(upload_id: str) -> str:
+    return os.path.join(current_app.config['UPLOAD_DIRECTORY'], f'.chunked-{upload_id}.part')
+
+
+def _chunk_length(upload: dict, index: int) -> int:
+    return min(upload['chunk_size'], upload['size'] - index * upload['chunk_size'])
+
+
+def _status(upload_id: str, upload: dict) -> dict:
+    return {
+        'id': upload_id,
+        'size': upload['size'],
+        'chunk_size': upload['chunk_size'],
+        'chunks': upload['chunks'],
+        'received': sorted(upload['received'])
+    }
+
+
+def _get_upload(upload_id: str):
+    """The caller's session, or None (unknown, expired or someone else's)."""
+    upload = l_db['uploads'].get(upload_id)
+    if upload is None or upload.get('owner') != (session.get('username') if session.get('loggedIn') else None):
+        return None
+    return upload
+
+
+def remove_expired_session(upload_id: str, upload: dict) -> None:
+    """Sweeper callback: delete the partial file of an expired session."""
+    try:
+        os.remove(os.path.join(upload['directory'], f'.chunked-{upload_id}.part'))
+    except FileNotFoundError:
+        pass
+
+
+@chunked_bp.app_context_processor
+def upload_settings():
+    return {'upload_chunk_size': CHUNK_SIZE, 'upload_parallel_chunks': PARALLEL_CHUNKS}
+
+
+@chunked_bp.route('', methods=['POST'])
+def create_session():
+    data = request.get_json(silent=True) or {}
+    filename = str(data.get('filename') or '')
+    try:
+        size = int(data.get('size'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'size is required'}), 400
+    if size < 0 or size > current_app.config['MAX_CONTENT_LENGTH']:
+        return jsonify({'error': 'File is larger than the size limit.'}), 413
+
+    owner = session.get('username') if session.get('loggedIn') else None
+    client = f'user:{owner}' if owner else f'ip:{request.remote_addr}'
+    upload_id = uuid.uuid4().hex
+    upload = {
+        'filename': filename,
+        'size': size,
+        'chunk_size': CHUNK_SIZE,
+        'chunks': max(-(-size // CHUNK_SIZE), 1),
+        'received': [],
+        'reusable': bool(data.get('reusable')),
+        'owner': owner,
+        'client': client,
+        'directory': current_app.config['UPLOAD_DIRECTORY']
+    }
+
+    # Checked and recorded in one batch, so parallel requests can't overshoot the limits.
+    with l_db.batch():
+        open_sessions = l_db['uploads'].find(client=client)
+        if len(open_sessions) >= MAX_SESSIONS:
+            return jsonify({'error': 'Too many unfinished uploads. Finish or wait for one first.'}), 429
+        reserved = sum(other['size'] for other in open_sessions.values())
+        if owner:
+            if reserved + size > usage.remaining_bytes(l_db, owner, usage.user_quota_gb(l_db, owner)):
+                return jsonify({'error': 'This file is larger than your remaining quota.'}), 413
+        elif reserved + size > MAX_RESERVED_BYTES:
+            return jsonify({'error': 'Your unfinished uploads already use the space you may reserve.'}), 413
+
+        with open(_temp_path(upload_id), 'wb') as f:
+            f.truncate(size)
+        l_db['uploads'].set(upload_id, upload, ttl=SESSION_TTL)
+    return jsonify(_status(upload_id, upload)), 201
+
+
+@chunked_bp.route('/<upload_id>', methods=['GET'])
+def session_status(upload_id):
+    upload = _get_upload(upload_id)
+    if upload is None:
+        return jsonify({'error': 'Unknown or expired upload'}), 404
+    return jsonify(_status(upload_id, upload))
+
+
+@chunked_bp.route('/<upload_id>/chunks/<int:index>', methods=['PUT'])
+def put_chunk(upload_id, index):
+    upload = _get_upload(upload_id)
+    if upload is None:
+        return jsonify({'error': 'Unknown or expired upload'}), 404
+    if not 0 <= index < upload['chunks']:
+        return jsonify({'error': 'Chunk index out of range'}), 400
+
+    length = _chunk_length(upload, index)
+    if (request.content_length or 0) != length:
+        return jsonify({'error': f'Chunk {index} must be {length} bytes'}), 400
+
+    offset = index * upload['chunk_size']
+    written = 0
+    try:
+        fd = os.open(_temp_path(upload_id), os.O_WRONLY)
+    except FileNotFoundError:
+        # Expired and swept, or finished by another request, since the lookup above
+        return jsonify({'error': 'Unknown or expired upload'}), 404
+    try:
+        while written < length:
+            data = request.stream.read(min(_COPY_SIZE, length - written))
+            if not data:
+                break
+            os.pwrite(fd, data, offset + written)
+            written += len(data)
+    finally:
+        os.close(fd)
+    if written != length:
+        return jsonify({'error': 'Chunk body was cut short'}), 400
+
+    def mark_received(upload):
+        if index not in upload['received']:
+            upload['received'].append(index)
+        return upload
+
+    try:
+        upload = l_db['uploads'].atomic_update(upload_id, mark_received)
+    except KeyError:
+        return jsonify({'error': 'Unknown or expired upload'}), 404
+    return jsonify(_status(upload_id, upload))
+
+
+@chunked_bp.route('/<upload_id>/finish', methods=['POST'])
+def finish(upload_id):
+    upload = _get_upload(upload_id)
+    if upload is None:
+        return jsonify({'error': 'Unknown or expired upload'}), 404
+    missing = sorted(set(range(upload['chunks'])) - set(upload['received']))
+    if missing:
+        return jsonify({'error': 'Missing chunks', 'missing': missing}), 409
+
+    # Moving the partial file claims it, so a repeated finish can't store it twice.
+    # The session is kept until the file is recorded, so a failed move can be retried.
+    safe_filename = secure_filename(upload['filename']) or 'file'
+    fileid, dest_name = codes.reserve_code(l_db, safe_filename)
+    try:
+        os.replace(_temp_path(upload_id), os.path.join(current_app.config['UPLOAD_DIRECTORY'], dest_name))
+    except FileNotFoundError:
+        codes.release_code(l_db, fileid)
+        return jsonify({'error': 'Unknown or expired upload'}), 404
+    except BaseException:
+        codes.release_code(l_db, fileid)
+        raise
+
+    size_bytes = upload['size']
+    entry = {
+        "reusable": upload['reusable'],
+        "size_megabytes": round(size_bytes / (1024 * 1024), 1),
+        "size_bytes": size_bytes,
+        "original_filename": upload['filename']
+    }
+    owner = upload['owner']
+    if owner:
+        entry["owner"] = owner
+    with l_db.batch():
+        l_db['uploads'].pop(upload_id, None)
+        # The quota may have shrunk, or other uploads finished, since the session started
+        over_quota = bool(owner) and size_bytes > usage.remaining_bytes(l_db, owner, usage.user_quota_gb(l_db, owner))
+        if over_quota:
+            codes.release_code(l_db, fileid)
+        else:
+            codes.add_file(l_db, fileid, dest_name, entry,
+                           ttl=current_app.config['REUSABLE_CODE_TTL' if upload['reusable'] else 'ONE_TIME_CODE_TTL'])
+            usage.add_file(l_db, dest_name, entry)
+    if over_quota:
+        os.remove(os.path.join(current_app.config['UPLOAD_DIRECTORY'], dest_name))
+        return jsonify({'error': 'This file is larger than your remaining quota.'}), 413
+
+    if upload['reusable']:
+        flash('Download code: ' + fileid, 'info')
+    else:
+        flash('1-Time Download code: ' + fileid, 'info')
+    return redirect(url_for('upload'))
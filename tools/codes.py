@@ -0,0 +1,100 @@
+"""
+Download codes - the code -> stored file index next to the 'files' collection
+
+Stored file keys end in their code ('report.pdf_12345678'). The 'codes'
+collection maps each code to its key, so resolving, claiming and deleting a
+code are single primary-key lookups instead of directory listings or scans.
+"""
+
+import random
+from typing import Iterable, Optional
+
+# Seconds a reserved code stays claimed while its upload is still being written
+RESERVATION_TTL = 3600
+CODE_ATTEMPTS = 20
+
+
+def code_of(file_key: str) -> str:
+    return file_key.rsplit('_', 1)[-1]
+
+
+def open_codes(db):
+    """Create the codes collection, indexing files uploaded before it existed."""
+    created = 'codes' not in db.collections()
+    codes = db.create_collection('codes')
+    if created:
+        codes.set_many({code_of(file_key): file_key for file_key in db['files'].iterkeys()})
+    return codes
+
+
+def reserve_code(db, filename: str, ttl: float = RESERVATION_TTL) -> tuple:
+    """
+    Claim an unused code for a new upload of filename.
+    The claim is a compare-and-set, so two uploads never get the same code.
+
+    Returns:
+        (code, file_key)
+    """
+    codes = db['codes']
+    for _ in range(CODE_ATTEMPTS):
+        code = str(random.randint(100000, 99999999))
+        file_key = f'{filename}_{code}'
+        with db.batch():
+            if codes.compare_and_set(code, 0, file_key):
+                codes.set(code, file_key, ttl=ttl)
+                return code, file_key
+    raise RuntimeError('Could not find an unused download code')
+
+
+def release_code(db, code: str) -> None:
+    """Give back a reserved code whose upload failed."""
+    db['codes'].pop(code, None)
+
+
+def add_file(db, code: str, file_key: str, entry: dict, ttl: Optional[float] = None) -> None:
+    """Store a file entry and its code together; both expire after ttl seconds."""
+    with db.batch():
+        db['codes'].set(code, file_key, ttl=ttl)
+        db['files'].set(file_key, entry, ttl=ttl)
+
+
+def lookup(db, code: str) -> Optional[str]:
+    """File key for a code, or None. A code whose file entry is gone is dropped."""
+    codes = db['codes']
+    file_key = codes.get(code)
+    if file_key is None:
+        return None
+    if file_key not in db['files']:
+        with db.batch():
+            if codes.get(code) == file_key and file_key not in db['files']:
+                codes.pop(code, None)
+        return None
+    return file_key
+
+
+def take_file(db, code: str) -> Optional[tuple]:
+    """
+    Remove a code and its file entry in one transaction (one-time downloads).
+    Only the first caller gets the entry.
+
+    Returns:
+        (file_key, entry), or None if the code is unknown or already taken
+    """
+    with db.batch():
+        file_key = db['codes'].pop(code, None)
+        if file_key is None:
+            return None
+        entry = db['files'].pop(file_key, None)
+    if entry is None:
+        return None
+    return file_key, entry
+
+
+def remove_files(db, file_keys: Iterable[str]) -> None:
+    """Delete file entries and their codes in one transaction."""
+    file_keys = set(file_keys)
+    codes = db['codes']
+    with db.batch():
+        db['files'].delete_many(file_keys)
+        current = codes.get_many([code_of(file_key) for file_key in file_keys])
+        codes.delete_many([code for code, file_key in current.items() if file_key in file_keys])
@@ -1,7 +1,7 @@
 import bcrypt
-from lightdb import LightDB
+from lightdb import open_database
 
-l_db = LightDB()
+l_db = open_database(cache_size=64)
 
 
 def _hash_password(password: str) -> str:
@@ -21,26 +21,24 @@ def register_user(username: str, password: str, quota_gb: int = 5, is_admin: boo
 
     if 'users' not in l_db:
         l_db['users'] = []
-    if 'files' not in l_db:
-        l_db['files'] = {}
-
-    users = l_db['users']
-    for i, user in enumerate(users):
-        if user.get('username') == username:
-            updated = dict(user)
-            updated['password'] = _hash_password(password)
-            updated['quota_gb'] = quota_gb
-            updated['is_admin'] = is_admin
-            users[i] = updated
+    l_db.create_collection('files')
+
+    hashed_password = _hash_password(password)
+    with l_db.batch():
+        index = l_db.index_of('users', 'username', username)
+        if index is not None:
+            l_db.set_path('users', f'$[{index}].password', hashed_password)
+            l_db.set_path('users', f'$[{index}].quota_gb', quota_gb)
+            l_db.set_path('users', f'$[{index}].is_admin', is_admin)
             return
 
-    user = {
-        'username': username,
-        'password': _hash_password(password),
-        'quota_gb': quota_gb,
-        'is_admin': is_admin
-    }
-    l_db['users'].append(user)
+        user = {
+            'username': username,
+            'password': hashed_password,
+            'quota_gb': quota_gb,
+            'is_admin': is_admin
+        }
+        l_db.append_path('users', '$', user)
 
 def check_if_user_exists(username: str) -> bool:
     global l_db
@@ -0,0 +1,91 @@
+"""
+Streaming uploads - multipart file parts are written straight into the upload directory
+
+Werkzeug normally spools every file part to a temporary file that the view
+then copies to its destination. UploadRequest hands the form parser an
+UploadFile instead: a hidden temp file in the upload directory that counts
+the bytes written and stops the upload once a byte limit is passed. The view
+renames it into place with commit(), so the body is written to disk once.
+"""
+
+import io
+import os
+import tempfile
+
+from flask import Request
+from werkzeug.exceptions import RequestEntityTooLarge
+
+# Bytes of multipart framing and form fields tolerated on top of the file itself
+FORM_OVERHEAD = 64 * 1024
+
+
+def _file_mode() -> int:
+    # Read the umask once at import; changing it later isn't thread-safe
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+# mkstemp creates files as 0600; stored uploads get the usual umask-based mode
+FILE_MODE = _file_mode()
+
+
+class QuotaExceeded(RequestEntityTooLarge):
+    description = 'The upload is larger than your remaining quota.'
+
+
+class UploadFile(io.FileIO):
+    """A temp file in the upload directory that counts and limits what is written to it."""
+
+    def __init__(self, directory: str, limit: int = None):
+        fd, self.temp_path = tempfile.mkstemp(prefix='.upload-', suffix='.part', dir=directory)
+        super().__init__(fd, 'r+')
+        self.limit = limit
+        self.size = 0
+        self.committed = False
+
+    def write(self, data) -> int:
+        self.size += len(data)
+        if self.limit is not None and self.size > self.limit:
+            raise QuotaExceeded()
+        return super().write(data)
+
+    def commit(self, path: str) -> int:
+        """
+        Move the finished upload to path (atomically, same filesystem).
+
+        Returns:
+            Size in bytes
+        """
+        self.committed = True
+        super().close()
+        try:
+            os.chmod(self.temp_path, FILE_MODE)
+            os.replace(self.temp_path, path)
+        except OSError:
+            os.remove(self.temp_path)
+            raise
+        return self.size
+
+    def close(self):
+        super().close()
+        if not self.committed:
+            self.committed = True
+            try:
+                os.remove(self.temp_path)
+            except FileNotFoundError:
+                pass
+
+
+class UploadRequest(Request):
+    """
+    Request whose uploaded files stream into upload_directory as UploadFiles.
+    Set upload_limit (bytes per file) before the form is first read to cap
+    an upload while it is still arriving.
+    """
+
+    upload_directory = 'uploads/'
+    upload_limit = None
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return UploadFile(self.upload_directory, self.upload_limit)
@@ -0,0 +1,105 @@
+"""
+Per-user usage - bytes, file count and file keys of every owner
+
+The 'usage' collection holds one entry per user, updated in the same batch
+as the file entry it accounts for, so quota checks and page renders read one
+row instead of walking the user's files. reconcile() rebuilds it from 'files'.
+"""
+
+_EMPTY = {'bytes': 0, 'files': 0, 'keys': []}
+
+
+def file_size(entry: dict) -> int:
+    """Size in bytes of a file entry (estimated from size_megabytes for old entries)."""
+    if entry.get('size_bytes') is not None:
+        return entry['size_bytes']
+    return round((entry.get('size_megabytes') or 0) * 1024 * 1024)
+
+
+def open_usage(db):
+    """Create the usage collection, building it from the files on first use."""
+    created = 'usage' not in db.collections()
+    usage = db.create_collection('usage')
+    if created:
+        reconcile(db)
+    return usage
+
+
+def get_usage(db, username: str) -> dict:
+    """{'bytes', 'files', 'keys'} of a user (zeros if they own nothing)."""
+    return db['usage'].get(username) or dict(_EMPTY, keys=[])
+
+
+def usage_gb(db, username: str) -> float:
+    return round(get_usage(db, username)['bytes'] / (1024 ** 3), 1)
+
+
+def user_quota_gb(db, username: str) -> float:
+    """Quota of a user from the users list (0 if they don't exist)."""
+    index = db.index_of('users', 'username', username)
+    return db.get_path('users', f'$[{index}].quota_gb', 0) if index is not None else 0
+
+
+def remaining_bytes(db, username: str, quota_gb: float) -> int:
+    """Bytes a user can still upload under quota_gb."""
+    return max(int(quota_gb * 1024 ** 3) - get_usage(db, username)['bytes'], 0)
+
+
+def add_file(db, file_key: str, entry: dict) -> None:
+    """Count a new file against its owner."""
+    owner = entry.get('owner')
+    if not owner:
+        return
+
+    def add(totals):
+        if file_key not in totals['keys']:
+            totals['bytes'] += file_size(entry)
+            totals['files'] += 1
+            totals['keys'].append(file_key)
+        return totals
+
+    db['usage'].atomic_update(owner, add, default=_EMPTY)
+
+
+def remove_file(db, file_key: str, entry: dict) -> None:
+    """Stop counting a deleted, downloaded or expired file."""
+    owner = entry.get('owner')
+    if not owner:
+        return
+
+    def remove(totals):
+        if file_key in totals['keys']:
+            totals['bytes'] = max(totals['bytes'] - file_size(entry), 0)
+            totals['files'] -= 1
+            totals['keys'].remove(file_key)
+        return totals
+
+    db['usage'].atomic_update(owner, remove, default=_EMPTY)
+
+
+def drop_user(db, username: str) -> None:
+    db['usage'].pop(username, None)
+
+
+def reconcile(db) -> dict:
+    """
+    Rebuild every user's usage from the files collection.
+
+    Returns:
+        username -> rebuilt usage
+    """
+    with db.batch():
+        totals = {}
+        for file_key, entry in db['files'].iteritems():
+            owner = entry.get('owner')
+            if not owner:
+                continue
+            user = totals.setdefault(owner, dict(_EMPTY, keys=[]))
+            user['bytes'] += file_size(entry)
+            user['files'] += 1
+            user['keys'].append(file_key)
+
+        usage = db['usage']
+        usage.clear()
+        usage.update(totals)
+    return totals
@@ -1,8 +1,10 @@
 from tools.db_auth import register_user
-from lightdb import LightDB
+from lightdb import open_database
 
-db = LightDB()
+db = open_database()
 db['users'] = []
-db['files'] = {}
+db.create_collection('files').clear()
+db.create_collection('codes').clear()
+db.create_collection('usage').clear()
 
 register_user('admin', 'admin', quota_gb=10, is_admin=True)